@@ -2,9 +2,9 @@ import os
 from dotenv import load_dotenv
 # Explicitly load .env from the project root
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '..', '.env'))
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
+import json
 from flask_cors import CORS
-from playwright.sync_api import sync_playwright
 import re
 from sources import weebcentral, asurascans
 from sources import mangadex
@@ -25,6 +25,13 @@ from preload_manager import PreloadManager
 
 # Import simple search service
 from services.simple_search import simple_search_service
+from services.browser_pool import browser_pool
+from services.single_flight import single_flight
+from services.compression import init_compression, json_response, precompressed_store
+from services.title_index import title_index
+from services.local_index import local_index
+from services.series_grouping import series_grouper
+from services.preloaded_store import preloaded_store
 
 print("TEST_ENV_CHECK:", os.getenv("TEST_ENV_CHECK"))
 print("MAIL_USERNAME:", os.getenv("MAIL_USERNAME"))
@@ -50,6 +57,9 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"]
 )
 
+# Compress large JSON responses (manga details, read history)
+init_compression(app)
+
 # Initialize authentication
 init_auth(app)
 
@@ -122,6 +132,10 @@ def search_manga():
     query = request.args.get('q', '')
     sources_param = request.args.get('sources', None)
     force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+    # Optional cap on results, which are ordered by relevance across sources
+    top_k = request.args.get('limit', None, type=int)
+    # Collapse the same series listed by several sources into one result
+    group = request.args.get('group', 'false').lower() == 'true'
     
     # Get user_id from request context (None for anonymous users)
     user_id = getattr(request, 'current_user', None)
@@ -140,107 +154,162 @@ def search_manga():
         return jsonify({'error': 'No sources enabled or selected'}), 400
 
     try:
-        # Use the simple search service with TTL cache
-        results = simple_search_service.search(query, sources_to_use, force_refresh)
+        # Use the simple search service with TTL cache; sources that miss their
+        # deadline are reported in timed_out and land in cache when they finish
+        # When grouping, the limit applies to series, so it is taken after grouping
+        result = simple_search_service.search_with_status(query, sources_to_use, force_refresh,
+                                                          None if group else top_k)
+        if group:
+            result['results'] = series_grouper.group(result['results'])[:top_k]
+            # New source links are written in the background, off the request path
+            series_grouper.persist_later(result['results'], app)
         
-        # Determine if results are from cache
-        cached = any(r.get('cached', False) for r in results) if results else False
-                    
-        return jsonify({'results': results, 'cached': cached})
+        response = jsonify(result)
+        if result['timed_out']:
+            # Partial results must not be cached downstream; the late sources
+            # will be in the next response
+            response.headers['Cache-Control'] = 'no-store'
+        return response
     except Exception as e:
         return jsonify({'error': f'Failed to search manga: {str(e)}'}), 500
 
+@app.route('/search/stream', methods=['GET'])
+@auth_manager.optional_auth
+def search_manga_stream():
+    """Stream search results as newline-delimited JSON, one frame per source as it finishes"""
+    query = request.args.get('q', '')
+    sources_param = request.args.get('sources', None)
+    force_refresh = request.args.get('refresh', 'false').lower() == 'true'
+    
+    if not query:
+        return jsonify({'error': 'Query parameter is required'}), 400
+
+    if sources_param:
+        requested_sources = [s.strip().lower() for s in sources_param.split(',')]
+        sources_to_use = [s for s in requested_sources if ENABLED_SOURCES.get(s)]
+    else:
+        sources_to_use = [s for s, enabled in ENABLED_SOURCES.items() if enabled]
+    if not sources_to_use:
+        return jsonify({'error': 'No sources enabled or selected'}), 400
+
+    def generate():
+        try:
+            for frame in simple_search_service.search_stream(query, sources_to_use, force_refresh):
+                yield json.dumps(frame) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'source': None, 'error': f'Failed to search manga: {str(e)}'}) + '\n'
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/search/suggest', methods=['GET'])
+def search_suggest():
+    """Typeahead suggestions from the in-memory title index (never scrapes)"""
+    query = request.args.get('q', '')
+    sources_param = request.args.get('sources', None)
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    
+    if sources_param:
+        sources_to_use = [s.strip().lower() for s in sources_param.split(',') if ENABLED_SOURCES.get(s.strip().lower())]
+    else:
+        sources_to_use = [s for s, enabled in ENABLED_SOURCES.items() if enabled]
+    
+    return jsonify({'results': local_index.search(query, sources_to_use, limit=limit)})
+
+@app.route('/series/<int:series_id>', methods=['GET'])
+def get_series(series_id):
+    """A canonical series with its per-source links; details should be fetched from ``preferred``"""
+    series = series_grouper.get_series(series_id)
+    if not series:
+        return jsonify({'error': 'Series not found'}), 404
+    return jsonify(series)
+
 @app.route('/manga/<source>/<manga_id>', methods=['GET'])
 @auth_manager.optional_auth
 def get_manga_details(source, manga_id):
     source = source.lower()
     force_refresh = request.args.get('refresh', 'false').lower() == 'true'
     
-    # Get user_id from request context (None for anonymous users)
-    user_id = getattr(request, 'current_user', None)
-    user_id = user_id.id if user_id else None
-    
     if source not in ENABLED_SOURCES or not ENABLED_SOURCES[source]:
         return jsonify({'error': f'Source {source} is not enabled'}), 400
     
     try:
-        # For now, use the old cache manager for manga details
-        # TODO: Implement manga details caching in simple search service
-        details = cache_manager.get_manga_details(manga_id, source, user_id)
+        # Details come from the shared content cache, so one scrape serves every user
+        details = cache_manager.get_cached_manga(manga_id, source)
         
         if not details or force_refresh:
-            # Scrape fresh details
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                source_module = SOURCE_MODULES.get(source)
-                if source_module:
-                    details = source_module.get_details(page, manga_id)
-                    if details:
-                        details['source'] = source
-                        details['cached'] = False
-                        # Cache the fresh details
-                        cache_manager.cache_manga_details(manga_id, source, details, user_id)
-                
-                browser.close()
+            # Scrape fresh details with a pooled browser; concurrent misses share one scrape
+            source_module = SOURCE_MODULES.get(source)
+            if source_module:
+                details = single_flight.do(f"manga:{source}:{manga_id}",
+                                           browser_pool.call, source_module, 'get_details', manga_id)
+                if details:
+                    details['source'] = source
+                    details['cached'] = False
+                    # Cache the fresh details
+                    cache_manager.cache_manga_details(manga_id, source, details)
         
         if not details:
             return jsonify({'error': 'Manga not found'}), 404
-            
-        return jsonify(details)
+        
+        # Chapter lists can be huge; the compressed payload is built once and reused
+        return json_response(details)
     except Exception as e:
         return jsonify({'error': f'Failed to fetch manga details: {str(e)}'}), 500
 
 @app.route('/cache/stats', methods=['GET'])
 @auth_manager.login_required
 def get_cache_stats():
-    """Get cache statistics for the current user"""
+    """Get statistics for the shared content cache"""
     try:
-        # Get user_id from request context
-        user_id = request.current_user.id
-        stats = cache_manager.get_cache_stats(user_id)
+        stats = cache_manager.get_cache_stats()
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': f'Failed to get cache stats: {str(e)}'}), 500
 
 @app.route('/cache/clear', methods=['POST'])
-@auth_manager.login_required
+@admin_required
 def clear_cache():
-    """Clear cache based on parameters for the current user"""
+    """Invalidate one query or manga in the shared content cache (admin only).
+
+    The cache is shared by all users, so only admins may evict entries, and
+    only a given query or manga; wiping whole tables is left to
+    /admin/cache/clear.
+    """
     try:
-        # Get user_id from request context
-        user_id = request.current_user.id
-        
         data = request.get_json() or {}
-        cache_type = data.get('type', 'all')  # 'all', 'search', 'manga', 'chapter'
+        cache_type = data.get('type', 'all')  # 'search' or 'manga'
         source = data.get('source')
         query = data.get('query')
         manga_id = data.get('manga_id')
         
         if cache_type == 'search':
-            cache_manager.clear_search_cache(user_id, query, source)
+            if not query:
+                return jsonify({'error': 'A query is required to clear search cache entries'}), 400
+            cache_manager.clear_search_cache(query, source)
         elif cache_type == 'manga':
-            cache_manager.clear_manga_cache(user_id, manga_id, source)
-        elif cache_type == 'chapter':
-            cache_manager.clear_chapter_cache(user_id, source)
-        else:  # 'all'
-            cache_manager.clear_search_cache(user_id)
-            cache_manager.clear_manga_cache(user_id)
-            cache_manager.clear_chapter_cache(user_id)
+            if not manga_id or not source:
+                return jsonify({'error': 'A manga_id and source are required to clear manga cache entries'}), 400
+            cache_manager.clear_manga_cache(manga_id, source)
+        else:
+            return jsonify({
+                'error': f"Cache type '{cache_type}' is not supported here; use /admin/cache/clear to clear whole tables",
+                'type': cache_type
+            }), 400
         
         return jsonify({'message': f'Cache cleared successfully', 'type': cache_type})
     except Exception as e:
         return jsonify({'error': f'Failed to clear cache: {str(e)}'}), 500
 
 @app.route('/cache/cleanup', methods=['POST'])
-@auth_manager.login_required
+@admin_required
 def cleanup_cache():
-    """Clean up expired cache entries for the current user"""
+    """Clean up expired entries in the shared content cache (admin only, like /cache/clear)"""
     try:
-        # Get user_id from request context
-        user_id = request.current_user.id
-        cache_manager.clear_expired_cache(user_id)
+        cache_manager.clear_expired_cache()
         return jsonify({'message': 'Expired cache entries cleaned up successfully'})
     except Exception as e:
         return jsonify({'error': f'Failed to cleanup cache: {str(e)}'}), 500
@@ -251,7 +320,7 @@ def cleanup_cache():
 def admin_get_cache_stats():
     """Get cache statistics for all users (admin only)"""
     try:
-        stats = cache_manager.get_cache_stats()  # No user_id = all users
+        stats = cache_manager.get_cache_stats()
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': f'Failed to get cache stats: {str(e)}'}), 500
@@ -268,15 +337,15 @@ def admin_clear_cache():
         manga_id = data.get('manga_id')
         
         if cache_type == 'search':
-            cache_manager.clear_search_cache(None, query, source)  # None = all users
+            cache_manager.clear_search_cache(query, source)
         elif cache_type == 'manga':
-            cache_manager.clear_manga_cache(None, manga_id, source)  # None = all users
+            cache_manager.clear_manga_cache(manga_id, source)
         elif cache_type == 'chapter':
-            cache_manager.clear_chapter_cache(None, source)  # None = all users
+            cache_manager.clear_chapter_cache(source)
         else:  # 'all'
-            cache_manager.clear_search_cache()  # None = all users
-            cache_manager.clear_manga_cache()  # None = all users
-            cache_manager.clear_chapter_cache()  # None = all users
+            cache_manager.clear_search_cache()
+            cache_manager.clear_manga_cache()
+            cache_manager.clear_chapter_cache()
         
         return jsonify({'message': f'All users cache cleared successfully', 'type': cache_type})
     except Exception as e:
@@ -287,7 +356,7 @@ def admin_clear_cache():
 def admin_cleanup_cache():
     """Clean up expired cache entries for all users (admin only)"""
     try:
-        cache_manager.clear_expired_cache()  # None = all users
+        cache_manager.clear_expired_cache()
         return jsonify({'message': 'All users expired cache entries cleaned up successfully'})
     except Exception as e:
         return jsonify({'error': f'Failed to cleanup cache: {str(e)}'}), 500
@@ -302,6 +371,10 @@ def get_performance_metrics():
     """Get search performance metrics"""
     try:
         metrics = simple_search_service.get_metrics()
+        metrics['precompressed'] = precompressed_store.get_stats()
+        metrics['title_index'] = title_index.get_stats()
+        metrics['series_grouping'] = series_grouper.get_stats()
+        metrics['preloaded_store'] = preloaded_store.get_stats()
         return jsonify(metrics)
     except Exception as e:
         return jsonify({'error': f'Failed to get metrics: {str(e)}'}), 500
@@ -310,10 +383,10 @@ def get_performance_metrics():
 def test_clear_cache():
     """Clear cache for testing purposes (no auth required)"""
     try:
-        # Clear all cache types for all users
-        cache_manager.clear_search_cache()  # None = all users
-        cache_manager.clear_manga_cache()   # None = all users
-        cache_manager.clear_chapter_cache() # None = all users
+        # Clear all cache types
+        cache_manager.clear_search_cache()
+        cache_manager.clear_manga_cache()
+        cache_manager.clear_chapter_cache()
         
         # Also clear preloaded manga for testing
         from models import PreloadedManga
@@ -728,9 +801,20 @@ def get_preload_status():
     except Exception as e:
         return jsonify({'error': f'Failed to get preload status: {str(e)}'}), 500
 
+# Set up tables and title indexes at import, so WSGI servers get them as well as app.run
+with app.app_context():
+    db.create_all()
+    # FTS5 (SQLite) or pg_trgm (Postgres) index over preloaded titles
+    title_index.install(db.engine)
+    # In-memory title index for typeahead and scrape-free searches
+    local_index.attach()
+    local_index.load_from_db()
+    series_grouper.load_from_db()
+    # Simple TTL cache system - no scheduler needed
+
 if __name__ == '__main__':
     port = int(os.getenv('PLAYWRIGHT_PORT', 5000))
-    with app.app_context():
-        db.create_all()
-        # Simple TTL cache system - no scheduler needed
+    # Warm up the shared browser pool in the serving process (not the reloader parent)
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        browser_pool.start()
     app.run(host='0.0.0.0', port=port, debug=True) 
\ No newline at end of file
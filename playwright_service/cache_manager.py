@@ -1,40 +1,94 @@
 import sqlite3
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 import hashlib
+from services.compact_encoding import encode_list, decode_list
+
+# Per-connection SQLite tuning; negative cache_size is in KiB
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SQLITE_CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', 256))
+
+# Store chapter lists and image URL lists as compressed columnar blobs instead of JSON text
+COMPACT_ENCODING = os.getenv('CACHE_COMPACT_ENCODING', 'true').lower() == 'true'
 
 class CacheManager:
     def __init__(self, db_path: str = "manga_cache.db"):
         self.db_path = db_path
+        # One long-lived connection per thread, reused by every method
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a tuned connection: WAL so reads never wait on a writer"""
+        # Only the owning thread uses a connection; close() may run elsewhere
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                               cached_statements=SQLITE_CACHED_STATEMENTS, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        return conn
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection.
+
+        Used as ``with self._connection() as conn:`` the connection commits or
+        rolls back on exit but stays open, so statements prepared on it are
+        reused by later calls from the same thread.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self) -> None:
+        """Close every connection opened by this manager"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
     def init_database(self):
         """Initialize the database with required tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
-            # Search cache table - add user_id column
+            # Scraped content is the same for every user, so the cache tables form a
+            # single shared tier keyed on the content itself; per-user data (history,
+            # preferences) lives in the user database
+            migrated = self._migrate_per_user_tables(cursor)
+            
+            # Search cache table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS search_cache (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
                     query_hash TEXT NOT NULL,
                     query TEXT NOT NULL,
                     source TEXT NOT NULL,
                     results TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     expires_at TIMESTAMP NOT NULL,
-                    UNIQUE(user_id, query_hash, source)
+                    UNIQUE(query_hash, source)
                 )
             ''')
             
-            # Manga metadata cache table - add user_id column
+            # Manga metadata cache table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS manga_cache (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
                     manga_id TEXT NOT NULL,
                     source TEXT NOT NULL,
                     title TEXT NOT NULL,
@@ -45,77 +99,148 @@ class CacheManager:
                     chapters TEXT,
                     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_refreshed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id, manga_id, source)
+                    UNIQUE(source, manga_id)
                 )
             ''')
             
-            # Chapter cache table - add user_id column
+            # Chapter cache table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS chapter_cache (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    chapter_url TEXT NOT NULL,
+                    chapter_url TEXT NOT NULL UNIQUE,
                     source TEXT NOT NULL,
                     images TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE(user_id, chapter_url)
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
             
-            # Create indexes for better performance
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_user_query_hash ON search_cache(user_id, query_hash)')
+            if migrated:
+                self._copy_per_user_rows(cursor, migrated)
+            
+            # Lookups use the UNIQUE indexes; these serve expiry and recency scans
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_search_expires ON search_cache(expires_at)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_manga_user_id_source ON manga_cache(user_id, manga_id, source)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_manga_last_updated ON manga_cache(last_updated)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_chapter_user_url ON chapter_cache(user_id, chapter_url)')
             
             conn.commit()
+        
+        if migrated:
+            # Reclaim the space held by the duplicated per-user rows
+            self.vacuum()
+    
+    def vacuum(self) -> None:
+        """Rebuild the database file to return freed pages to the filesystem"""
+        self._connection().execute('VACUUM')
+    
+    def _migrate_per_user_tables(self, cursor) -> List[str]:
+        """Move legacy per-user cache tables aside so the shared tables can be created"""
+        migrated = []
+        for table in ('search_cache', 'manga_cache', 'chapter_cache'):
+            columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+            if 'user_id' in columns:
+                cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_per_user')
+                migrated.append(table)
+        # Indexes follow a renamed table; drop them so the names can be reused
+        for index in ('idx_search_user_query_hash', 'idx_search_expires', 'idx_manga_user_id_source',
+                      'idx_manga_last_updated', 'idx_chapter_user_url'):
+            cursor.execute(f'DROP INDEX IF EXISTS {index}')
+        return migrated
+    
+    def _copy_per_user_rows(self, cursor, tables: List[str]) -> None:
+        """Fold per-user rows into the shared tables, keeping the freshest copy of each entry"""
+        copies = {
+            'search_cache': ('''
+                INSERT OR IGNORE INTO search_cache (query_hash, query, source, results, created_at, expires_at)
+                SELECT query_hash, query, source, results, created_at, expires_at
+                FROM search_cache_per_user ORDER BY expires_at DESC
+            '''),
+            'manga_cache': ('''
+                INSERT OR IGNORE INTO manga_cache
+                (manga_id, source, title, image_url, status, author, description, chapters, last_updated, last_refreshed)
+                SELECT manga_id, source, title, image_url, status, author, description, chapters, last_updated, last_refreshed
+                FROM manga_cache_per_user ORDER BY last_updated DESC
+            '''),
+            'chapter_cache': ('''
+                INSERT OR IGNORE INTO chapter_cache (chapter_url, source, images, created_at)
+                SELECT chapter_url, source, images, created_at
+                FROM chapter_cache_per_user ORDER BY created_at DESC
+            ''')
+        }
+        for table in tables:
+            cursor.execute(copies[table])
+            cursor.execute(f'DROP TABLE {table}_per_user')
+    
+    def _encode_list(self, items: List[Any]):
+        return encode_list(items) if COMPACT_ENCODING else json.dumps(items)
+    
+    def migrate_compact_encoding(self, batch_size: int = 200) -> Dict[str, int]:
+        """Re-encode chapter and image lists still stored as JSON text; returns rows converted per table"""
+        converted = {}
+        for table, column in (('manga_cache', 'chapters'), ('chapter_cache', 'images')):
+            converted[table] = 0
+            last_id = 0
+            while True:
+                with self._connection() as conn:
+                    rows = conn.execute(
+                        f"SELECT id, {column} FROM {table} WHERE id > ? AND typeof({column}) = 'text' "
+                        f"ORDER BY id LIMIT ?", (last_id, batch_size)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    updates = []
+                    for row_id, value in rows:
+                        try:
+                            updates.append((encode_list(json.loads(value)), row_id))
+                        except (ValueError, TypeError):
+                            continue
+                    conn.executemany(f'UPDATE {table} SET {column} = ? WHERE id = ?', updates)
+                    converted[table] += len(updates)
+                    last_id = rows[-1][0]
+        return converted
     
     def _hash_query(self, query: str) -> str:
         """Create a hash for the search query"""
         return hashlib.md5(query.lower().strip().encode()).hexdigest()
     
-    def get_cached_search(self, query: str, source: str, user_id: Optional[int] = None) -> Optional[List[Dict]]:
+    def get_cached_search(self, query: str, source: str) -> Optional[List[Dict]]:
         """Get cached search results"""
         query_hash = self._hash_query(query)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT results, expires_at FROM search_cache 
-                WHERE user_id = ? AND query_hash = ? AND source = ? AND expires_at > ?
-            ''', (user_id, query_hash, source, datetime.now()))
+                WHERE query_hash = ? AND source = ? AND expires_at > ?
+            ''', (query_hash, source, datetime.now()))
             
             result = cursor.fetchone()
             if result:
                 return json.loads(result[0])
             return None
     
-    def cache_search_results(self, query: str, source: str, results: List[Dict], 
-                           user_id: Optional[int] = None, expire_hours: int = 24) -> None:
+    def cache_search_results(self, query: str, source: str, results: List[Dict], expire_hours: int = 24) -> None:
         """Cache search results"""
         query_hash = self._hash_query(query)
         expires_at = datetime.now() + timedelta(hours=expire_hours)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO search_cache 
-                (user_id, query_hash, query, source, results, expires_at) 
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, query_hash, query, source, json.dumps(results), expires_at))
+                (query_hash, query, source, results, expires_at) 
+                VALUES (?, ?, ?, ?, ?)
+            ''', (query_hash, query, source, json.dumps(results), expires_at))
             conn.commit()
     
-    def get_cached_manga(self, manga_id: str, source: str, user_id: Optional[int] = None) -> Optional[Dict]:
+    def get_cached_manga(self, manga_id: str, source: str) -> Optional[Dict]:
         """Get cached manga details"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT title, image_url, status, author, description, chapters, 
                        last_updated, last_refreshed 
                 FROM manga_cache 
-                WHERE user_id = ? AND manga_id = ? AND source = ?
-            ''', (user_id, manga_id, source))
+                WHERE source = ? AND manga_id = ?
+            ''', (source, manga_id))
             
             result = cursor.fetchone()
             if result:
@@ -125,177 +250,132 @@ class CacheManager:
                     'status': result[2],
                     'author': result[3],
                     'description': result[4],
-                    'chapters': json.loads(result[5]) if result[5] else [],
+                    'chapters': decode_list(result[5]),
                     'last_updated': result[6],
                     'last_refreshed': result[7]
                 }
             return None
     
-    def cache_manga_details(self, manga_id: str, source: str, manga_data: Dict, user_id: Optional[int] = None) -> None:
+    def cache_manga_details(self, manga_id: str, source: str, manga_data: Dict) -> None:
         """Cache manga details"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO manga_cache 
-                (user_id, manga_id, source, title, image_url, status, author, description, chapters, last_updated, last_refreshed) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                (manga_id, source, title, image_url, status, author, description, chapters, last_updated, last_refreshed) 
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
-                user_id, manga_id, source, manga_data.get('title'), manga_data.get('image'),
+                manga_id, source, manga_data.get('title'), manga_data.get('image'),
                 manga_data.get('status'), manga_data.get('author'), manga_data.get('description'),
-                json.dumps(manga_data.get('chapters', [])), datetime.now(), datetime.now()
+                self._encode_list(manga_data.get('chapters', [])), datetime.now(), datetime.now()
             ))
             conn.commit()
     
-    def update_manga_refresh_time(self, manga_id: str, source: str, user_id: Optional[int] = None) -> None:
+    def update_manga_refresh_time(self, manga_id: str, source: str) -> None:
         """Update the last refresh time for a manga"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE manga_cache 
                 SET last_refreshed = ? 
-                WHERE user_id = ? AND manga_id = ? AND source = ?
-            ''', (datetime.now(), user_id, manga_id, source))
+                WHERE source = ? AND manga_id = ?
+            ''', (datetime.now(), source, manga_id))
             conn.commit()
     
-    def get_cached_chapter_images(self, chapter_url: str, user_id: Optional[int] = None) -> Optional[List[str]]:
+    def get_cached_chapter_images(self, chapter_url: str) -> Optional[List[str]]:
         """Get cached chapter images"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT images FROM chapter_cache 
-                WHERE user_id = ? AND chapter_url = ?
-            ''', (user_id, chapter_url))
+                WHERE chapter_url = ?
+            ''', (chapter_url,))
             
             result = cursor.fetchone()
             if result:
-                return json.loads(result[0])
+                return decode_list(result[0])
             return None
     
-    def cache_chapter_images(self, chapter_url: str, source: str, images: List[str], user_id: Optional[int] = None) -> None:
+    def cache_chapter_images(self, chapter_url: str, source: str, images: List[str]) -> None:
         """Cache chapter images"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO chapter_cache 
-                (user_id, chapter_url, source, images) 
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, chapter_url, source, json.dumps(images)))
+                (chapter_url, source, images) 
+                VALUES (?, ?, ?)
+            ''', (chapter_url, source, self._encode_list(images)))
             conn.commit()
     
-    def clear_expired_cache(self, user_id: Optional[int] = None) -> None:
+    def clear_expired_cache(self) -> None:
         """Clear expired search cache entries"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
-            if user_id is not None:
-                cursor.execute('DELETE FROM search_cache WHERE user_id = ? AND expires_at < ?', (user_id, datetime.now()))
-            else:
-                cursor.execute('DELETE FROM search_cache WHERE expires_at < ?', (datetime.now(),))
+            cursor.execute('DELETE FROM search_cache WHERE expires_at < ?', (datetime.now(),))
             conn.commit()
     
-    def clear_manga_cache(self, user_id: Optional[int] = None, manga_id: Optional[str] = None, source: Optional[str] = None) -> None:
-        """Clear manga cache for specific user, manga or source"""
-        with sqlite3.connect(self.db_path) as conn:
+    def clear_manga_cache(self, manga_id: Optional[str] = None, source: Optional[str] = None) -> None:
+        """Clear manga cache for a specific manga or source"""
+        with self._connection() as conn:
             cursor = conn.cursor()
-            if user_id is not None:
-                if manga_id and source:
-                    cursor.execute('DELETE FROM manga_cache WHERE user_id = ? AND manga_id = ? AND source = ?', 
-                                 (user_id, manga_id, source))
-                elif source:
-                    cursor.execute('DELETE FROM manga_cache WHERE user_id = ? AND source = ?', (user_id, source))
-                elif manga_id:
-                    cursor.execute('DELETE FROM manga_cache WHERE user_id = ? AND manga_id = ?', (user_id, manga_id))
-                else:
-                    cursor.execute('DELETE FROM manga_cache WHERE user_id = ?', (user_id,))
+            if manga_id and source:
+                cursor.execute('DELETE FROM manga_cache WHERE source = ? AND manga_id = ?', (source, manga_id))
+            elif source:
+                cursor.execute('DELETE FROM manga_cache WHERE source = ?', (source,))
+            elif manga_id:
+                cursor.execute('DELETE FROM manga_cache WHERE manga_id = ?', (manga_id,))
             else:
-                if manga_id and source:
-                    cursor.execute('DELETE FROM manga_cache WHERE manga_id = ? AND source = ?', 
-                                 (manga_id, source))
-                elif source:
-                    cursor.execute('DELETE FROM manga_cache WHERE source = ?', (source,))
-                elif manga_id:
-                    cursor.execute('DELETE FROM manga_cache WHERE manga_id = ?', (manga_id,))
-                else:
-                    cursor.execute('DELETE FROM manga_cache')
+                cursor.execute('DELETE FROM manga_cache')
             conn.commit()
     
-    def clear_search_cache(self, user_id: Optional[int] = None, query: Optional[str] = None, source: Optional[str] = None) -> None:
-        """Clear search cache for specific user, query or source"""
-        with sqlite3.connect(self.db_path) as conn:
+    def clear_search_cache(self, query: Optional[str] = None, source: Optional[str] = None) -> None:
+        """Clear search cache for a specific query or source"""
+        with self._connection() as conn:
             cursor = conn.cursor()
-            if user_id is not None:
-                if query and source:
-                    query_hash = self._hash_query(query)
-                    cursor.execute('DELETE FROM search_cache WHERE user_id = ? AND query_hash = ? AND source = ?', 
-                                 (user_id, query_hash, source))
-                elif source:
-                    cursor.execute('DELETE FROM search_cache WHERE user_id = ? AND source = ?', (user_id, source))
-                elif query:
-                    query_hash = self._hash_query(query)
-                    cursor.execute('DELETE FROM search_cache WHERE user_id = ? AND query_hash = ?', (user_id, query_hash))
-                else:
-                    cursor.execute('DELETE FROM search_cache WHERE user_id = ?', (user_id,))
+            if query and source:
+                query_hash = self._hash_query(query)
+                cursor.execute('DELETE FROM search_cache WHERE query_hash = ? AND source = ?', (query_hash, source))
+            elif source:
+                cursor.execute('DELETE FROM search_cache WHERE source = ?', (source,))
+            elif query:
+                query_hash = self._hash_query(query)
+                cursor.execute('DELETE FROM search_cache WHERE query_hash = ?', (query_hash,))
             else:
-                if query and source:
-                    query_hash = self._hash_query(query)
-                    cursor.execute('DELETE FROM search_cache WHERE query_hash = ? AND source = ?', 
-                                 (query_hash, source))
-                elif source:
-                    cursor.execute('DELETE FROM search_cache WHERE source = ?', (source,))
-                elif query:
-                    query_hash = self._hash_query(query)
-                    cursor.execute('DELETE FROM search_cache WHERE query_hash = ?', (query_hash,))
-                else:
-                    cursor.execute('DELETE FROM search_cache')
+                cursor.execute('DELETE FROM search_cache')
             conn.commit()
     
-    def clear_chapter_cache(self, user_id: Optional[int] = None, source: Optional[str] = None) -> None:
-        """Clear chapter cache for specific user or source"""
-        with sqlite3.connect(self.db_path) as conn:
+    def clear_chapter_cache(self, source: Optional[str] = None) -> None:
+        """Clear chapter cache for a specific source"""
+        with self._connection() as conn:
             cursor = conn.cursor()
-            if user_id is not None:
-                if source:
-                    cursor.execute('DELETE FROM chapter_cache WHERE user_id = ? AND source = ?', (user_id, source))
-                else:
-                    cursor.execute('DELETE FROM chapter_cache WHERE user_id = ?', (user_id,))
+            if source:
+                cursor.execute('DELETE FROM chapter_cache WHERE source = ?', (source,))
             else:
-                if source:
-                    cursor.execute('DELETE FROM chapter_cache WHERE source = ?', (source,))
-                else:
-                    cursor.execute('DELETE FROM chapter_cache')
+                cursor.execute('DELETE FROM chapter_cache')
             conn.commit()
     
-    def get_cache_stats(self, user_id: Optional[int] = None) -> Dict[str, Any]:
-        """Get cache statistics for specific user or all users"""
-        with sqlite3.connect(self.db_path) as conn:
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get statistics for the shared content cache"""
+        with self._connection() as conn:
             cursor = conn.cursor()
             
-            # Build WHERE clause for user filtering
-            user_filter = "WHERE user_id = ?" if user_id is not None else ""
-            user_params = (user_id,) if user_id is not None else ()
-            
             # Search cache stats
-            cursor.execute(f'SELECT COUNT(*) FROM search_cache {user_filter}', user_params)
+            cursor.execute('SELECT COUNT(*) FROM search_cache')
             search_count = cursor.fetchone()[0]
             
-            if user_id is not None:
-                cursor.execute('SELECT COUNT(*) FROM search_cache WHERE user_id = ? AND expires_at < ?', (user_id, datetime.now()))
-            else:
-                cursor.execute('SELECT COUNT(*) FROM search_cache WHERE expires_at < ?', (datetime.now(),))
+            cursor.execute('SELECT COUNT(*) FROM search_cache WHERE expires_at < ?', (datetime.now(),))
             expired_search_count = cursor.fetchone()[0]
             
             # Manga cache stats
-            cursor.execute(f'SELECT COUNT(*) FROM manga_cache {user_filter}', user_params)
+            cursor.execute('SELECT COUNT(*) FROM manga_cache')
             manga_count = cursor.fetchone()[0]
             
             # Chapter cache stats
-            cursor.execute(f'SELECT COUNT(*) FROM chapter_cache {user_filter}', user_params)
+            cursor.execute('SELECT COUNT(*) FROM chapter_cache')
             chapter_count = cursor.fetchone()[0]
             
             # Source breakdown
-            if user_id is not None:
-                cursor.execute('SELECT source, COUNT(*) FROM manga_cache WHERE user_id = ? GROUP BY source', (user_id,))
-            else:
-                cursor.execute('SELECT source, COUNT(*) FROM manga_cache GROUP BY source')
+            cursor.execute('SELECT source, COUNT(*) FROM manga_cache GROUP BY source')
             source_breakdown = dict(cursor.fetchall())
             
             return {
@@ -311,4 +391,4 @@ class CacheManager:
                 'chapter_cache': {
                     'total': chapter_count
                 }
-            } 
\ No newline at end of file
+            }
\ No newline at end of file
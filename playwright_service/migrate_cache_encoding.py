@@ -0,0 +1,28 @@
+"""
+Script to convert cached chapter lists and image URL lists to the compact encoding
+Run this once after upgrading; new rows are written compactly already
+"""
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache_manager import CacheManager
+
+def migrate_cache_encoding(db_path="manga_cache.db"):
+    """Re-encode legacy JSON rows in the cache database"""
+    cache_manager = CacheManager(db_path)
+    before = os.path.getsize(db_path)
+    converted = cache_manager.migrate_compact_encoding()
+    for table, count in converted.items():
+        print(f"✅ {table}: {count} rows converted")
+
+    # Reclaim the space freed by the smaller rows
+    cache_manager.vacuum()
+    cache_manager.close()
+    after = os.path.getsize(db_path)
+    print(f"📦 Database size: {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+
+if __name__ == "__main__":
+    migrate_cache_encoding(sys.argv[1] if len(sys.argv) > 1 else "manga_cache.db")
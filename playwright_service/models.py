@@ -73,4 +73,34 @@ class PreloadedManga(db.Model):
     @staticmethod
     def normalize_title(title):
         """Normalize title for case-insensitive search"""
-        return title.strip().lower() if title else '' 
\ No newline at end of file
+        return title.strip().lower() if title else ''
+
+class CanonicalSeries(db.Model):
+    """One series as it exists across sources (grouped by normalized title / alt titles / author)"""
+    __tablename__ = 'canonical_series'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    series_key = db.Column(db.String(255), unique=True, nullable=False)  # normalized title
+    title = db.Column(db.String(255), nullable=False)
+    author = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    links = db.relationship('SeriesSourceLink', backref='series', lazy='select')
+    
+    def __repr__(self):
+        return f'<CanonicalSeries {self.title}>'
+
+class SeriesSourceLink(db.Model):
+    """Maps a source's listing of a series to its canonical series"""
+    __tablename__ = 'series_source_links'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    series_id = db.Column(db.Integer, db.ForeignKey('canonical_series.id'), nullable=False, index=True)
+    source = db.Column(db.String(64), nullable=False)
+    manga_id = db.Column(db.String(255), nullable=False)
+    details_url = db.Column(db.String(512), unique=True, nullable=False)
+    title = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SeriesSourceLink {self.source}:{self.manga_id} -> {self.series_id}>'
@@ -8,10 +8,11 @@ import threading
 from datetime import datetime, timedelta, date
 from typing import List, Dict, Optional, Any, Tuple
 from urllib.parse import urlparse
-from playwright.sync_api import sync_playwright
 from models import db, PreloadJob, PreloadStats, RobotsTxtCache
 from sources import weebcentral, asurascans, mangadex
 from cache_manager import CacheManager
+from services.browser_pool import browser_pool
+from services.compact_encoding import decode_list
 import logging
 
 # Configure logging
@@ -244,7 +245,7 @@ class PreloadManager:
                 for row in cursor.fetchall():
                     manga_id, source, title, chapters_json, last_updated = row
                     try:
-                        chapters = json.loads(chapters_json) if chapters_json else []
+                        chapters = decode_list(chapters_json)
                         results.append({
                             'source': source,
                             'manga_id': manga_id,
@@ -349,29 +350,18 @@ class PreloadManager:
     def _preload_search(self, source: str, query: str) -> bool:
         """Preload search results"""
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                # Set user agent
-                page.set_extra_http_headers({
-                    'User-Agent': self.source_configs[source]['user_agent']
-                })
-                
-                source_module = self._get_source_module(source)
-                if not source_module:
-                    return False
-                
-                results = source_module.search(page, query)
-                
-                # Cache results for anonymous users (global cache)
-                self.cache_manager.cache_search_results(query, source, results, user_id=None)
-                
-                page.close()
-                browser.close()
-                
-                logger.info(f"Preloaded search: {query} for {source} - {len(results)} results")
-                return True
+            source_module = self._get_source_module(source)
+            if not source_module:
+                return False
+            
+            results = browser_pool.call(source_module, 'search', query,
+                                        context_options=self._context_options(source))
+            
+            # Cache results for anonymous users (global cache)
+            self.cache_manager.cache_search_results(query, source, results)
+            
+            logger.info(f"Preloaded search: {query} for {source} - {len(results)} results")
+            return True
                 
         except Exception as e:
             logger.error(f"Error preloading search {query} for {source}: {e}")
@@ -380,29 +370,18 @@ class PreloadManager:
     def _preload_manga_details(self, source: str, manga_id: str) -> bool:
         """Preload manga details"""
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                # Set user agent
-                page.set_extra_http_headers({
-                    'User-Agent': self.source_configs[source]['user_agent']
-                })
-                
-                source_module = self._get_source_module(source)
-                if not source_module:
-                    return False
-                
-                details = source_module.get_details(page, manga_id)
-                
-                # Cache details for anonymous users (global cache)
-                self.cache_manager.cache_manga_details(manga_id, source, details, user_id=None)
-                
-                page.close()
-                browser.close()
-                
-                logger.info(f"Preloaded manga details: {manga_id} for {source}")
-                return True
+            source_module = self._get_source_module(source)
+            if not source_module:
+                return False
+            
+            details = browser_pool.call(source_module, 'get_details', manga_id,
+                                        context_options=self._context_options(source))
+            
+            # Cache details for anonymous users (global cache)
+            self.cache_manager.cache_manga_details(manga_id, source, details)
+            
+            logger.info(f"Preloaded manga details: {manga_id} for {source}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error preloading manga details {manga_id} for {source}: {e}")
@@ -411,46 +390,40 @@ class PreloadManager:
     def _preload_chapter_images(self, source: str, chapter_url: str) -> bool:
         """Preload chapter images"""
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                # Set user agent
-                page.set_extra_http_headers({
-                    'User-Agent': self.source_configs[source]['user_agent']
-                })
-                
-                source_module = self._get_source_module(source)
-                if not source_module:
-                    return False
-                
-                # Get chapter images
-                if source == 'mangadex':
-                    # For MangaDex, extract UUID from URL
-                    import re
-                    uuid_match = re.search(r'/([a-f0-9-]{36})', chapter_url)
-                    if uuid_match:
-                        chapter_uuid = uuid_match.group(1)
-                        images = source_module.get_chapter_images(page, chapter_uuid)
-                    else:
-                        logger.error(f"Invalid MangaDex chapter URL: {chapter_url}")
-                        return False
+            source_module = self._get_source_module(source)
+            if not source_module:
+                return False
+            
+            # Get chapter images
+            if source == 'mangadex':
+                # For MangaDex, extract UUID from URL
+                import re
+                uuid_match = re.search(r'/([a-f0-9-]{36})', chapter_url)
+                if uuid_match:
+                    chapter_uuid = uuid_match.group(1)
+                    images = browser_pool.call(source_module, 'get_chapter_images', chapter_uuid,
+                                               context_options=self._context_options(source))
                 else:
-                    images = source_module.get_chapter_images(page, chapter_url)
-                
-                # Cache images for anonymous users (global cache)
-                self.cache_manager.cache_chapter_images(chapter_url, source, images, user_id=None)
-                
-                page.close()
-                browser.close()
-                
-                logger.info(f"Preloaded chapter images: {chapter_url} for {source} - {len(images)} images")
-                return True
+                    logger.error(f"Invalid MangaDex chapter URL: {chapter_url}")
+                    return False
+            else:
+                images = browser_pool.call(source_module, 'get_chapter_images', chapter_url,
+                                           context_options=self._context_options(source))
+            
+            # Cache images for anonymous users (global cache)
+            self.cache_manager.cache_chapter_images(chapter_url, source, images)
+            
+            logger.info(f"Preloaded chapter images: {chapter_url} for {source} - {len(images)} images")
+            return True
                 
         except Exception as e:
             logger.error(f"Error preloading chapter images {chapter_url} for {source}: {e}")
             return False
     
+    def _context_options(self, source: str) -> Dict:
+        """Browser context options (user agent) for a source"""
+        return {'user_agent': self.source_configs[source]['user_agent']}
+    
     def _get_source_module(self, source: str):
         """Get the source module for a given source"""
         source_modules = {
@@ -0,0 +1,203 @@
+import os
+import sys
+import atexit
+import asyncio
+import threading
+import functools
+import concurrent.futures
+from typing import Any, Callable, Dict, Optional
+import logging
+from playwright.async_api import async_playwright
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sources import weebcentral, asurascans, mangadex
+from services.browser_pool import BROWSER_ARGS
+from services.resource_blocking import resource_blocker
+
+logger = logging.getLogger(__name__)
+
+# Maximum concurrent scrapes per source (pages open at once against that site)
+DEFAULT_SOURCE_CONCURRENCY = {
+    'weebcentral': int(os.getenv('SCRAPE_CONCURRENCY_WEEBCENTRAL', 12)),
+    'asurascans': int(os.getenv('SCRAPE_CONCURRENCY_ASURASCANS', 8)),
+    'mangadex': int(os.getenv('SCRAPE_CONCURRENCY_MANGADEX', 16))
+}
+
+class AsyncScrapeEngine:
+    """Async Playwright scraping engine running on one background event loop.
+
+    A single Chromium instance serves every scrape through its own context, so
+    the number of in-flight cache misses is bounded by the per-source
+    semaphores rather than by threads. Flask handlers talk to the engine
+    through ``submit``/``run``, which return ``concurrent.futures.Future``
+    objects that are safe to wait on from any thread.
+
+    Only searches run here; manga details and chapter images are scraped on
+    the sync ``browser_pool``.
+    """
+
+    def __init__(self, source_concurrency: Optional[Dict[str, int]] = None, job_timeout: Optional[float] = None):
+        self.sources = {
+            'weebcentral': weebcentral,
+            'asurascans': asurascans,
+            'mangadex': mangadex
+        }
+        self.source_concurrency = dict(source_concurrency or DEFAULT_SOURCE_CONCURRENCY)
+        self.job_timeout = job_timeout or float(os.getenv('SCRAPE_JOB_TIMEOUT', 60))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {
+            'submitted': 0,
+            'in_flight': 0,
+            'completed': 0,
+            'failed': 0,
+            'browser_launches': 0,
+            'http_hits': 0,
+            'http_fallbacks': 0
+        }
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        """Start the event-loop thread (idempotent; also called lazily on first submit)"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, args=(ready,),
+                                            name='async-scrape-engine', daemon=True)
+            self._thread.start()
+            ready.wait()
+            logger.info("Async scrape engine started")
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._browser_lock = asyncio.Lock()
+        self._semaphores = {
+            source: asyncio.Semaphore(limit) for source, limit in self.source_concurrency.items()
+        }
+        ready.set()
+        self._loop.run_forever()
+
+    def shutdown(self) -> None:
+        """Close the browser and stop the event loop"""
+        if not self._loop or not self._loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop).result(timeout=10)
+        except Exception as e:
+            logger.debug(f"Async scrape engine close error: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        logger.info("Async scrape engine shut down")
+
+    async def _close(self) -> None:
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def _get_browser(self):
+        """Return the shared browser, relaunching it if it crashed"""
+        async with self._browser_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            self.stats['browser_launches'] += 1
+            logger.info(f"Async scrape engine launched Chromium (launch #{self.stats['browser_launches']})")
+            return self._browser
+
+    # --- Thread-safe bridge ---
+
+    def submit(self, coro_fn: Callable, *args, **kwargs) -> concurrent.futures.Future:
+        """Schedule ``coro_fn(*args, **kwargs)`` on the engine loop from any thread"""
+        if not self._loop or not self._loop.is_running():
+            self.start()
+        self.stats['submitted'] += 1
+        return asyncio.run_coroutine_threadsafe(self._tracked(coro_fn(*args, **kwargs)), self._loop)
+
+    def run(self, coro_fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """Run ``coro_fn`` on the engine loop and block the calling thread for its result"""
+        return self.submit(coro_fn, *args, **kwargs).result(timeout=timeout)
+
+    async def _tracked(self, coro) -> Any:
+        self.stats['in_flight'] += 1
+        try:
+            result = await coro
+            self.stats['completed'] += 1
+            return result
+        except Exception:
+            self.stats['failed'] += 1
+            raise
+        finally:
+            self.stats['in_flight'] -= 1
+
+    # --- Scraping coroutines ---
+
+    async def with_page(self, source: str, fn: Callable, *args, context_options: Optional[Dict] = None) -> Any:
+        """Run ``fn(page, *args)`` in a fresh browser context, bounded by the source semaphore"""
+        async with self._semaphores[source]:
+            browser = await self._get_browser()
+            context = await browser.new_context(**(context_options or {}))
+            try:
+                await resource_blocker.async_apply(context, source)
+                page = await context.new_page()
+                page.set_default_timeout(self.job_timeout * 1000)
+                return await fn(page, *args)
+            finally:
+                await context.close()
+
+    async def _call(self, source: str, func_name: str, *args) -> Any:
+        """Dispatch to the source's async function, or run browser-less sources in the default executor.
+
+        Sources may provide a ``<func_name>_http`` fast path; it is tried first
+        and the browser is only used when it returns None.
+        """
+        source_module = self.sources[source]
+        loop = asyncio.get_running_loop()
+        if not getattr(source_module, 'USES_BROWSER', True):
+            async with self._semaphores[source]:
+                return await loop.run_in_executor(
+                    None, functools.partial(getattr(source_module, func_name), None, *args)
+                )
+        http_fn = getattr(source_module, f"{func_name}_http", None)
+        if http_fn is not None:
+            async with self._semaphores[source]:
+                result = await loop.run_in_executor(None, functools.partial(http_fn, *args))
+            if result is not None:
+                self.stats['http_hits'] += 1
+                return result
+            self.stats['http_fallbacks'] += 1
+            logger.info(f"{source} {func_name} HTTP fast path failed, falling back to browser")
+        return await self.with_page(source, getattr(source_module, f"async_{func_name}"), *args)
+
+    def search(self, source: str, query: str) -> concurrent.futures.Future:
+        """Search one source; returns a future with the result list"""
+        return self.submit(self._call, source, 'search', query)
+
+    def get_stats(self) -> Dict:
+        """Get engine statistics"""
+        return {
+            **self.stats,
+            'running': bool(self._loop and self._loop.is_running()),
+            'browser_connected': bool(self._browser and self._browser.is_connected()),
+            'source_concurrency': self.source_concurrency,
+            'job_timeout': self.job_timeout,
+            'resource_blocking': resource_blocker.get_stats()
+        }
+
+# Global scraping engine instance
+scrape_engine = AsyncScrapeEngine()
+atexit.register(scrape_engine.shutdown)
@@ -0,0 +1,262 @@
+import os
+import queue
+import time
+import atexit
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from playwright.sync_api import sync_playwright
+from services.resource_blocking import resource_blocker
+
+logger = logging.getLogger(__name__)
+
+# Chromium flags shared by every pooled browser
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--disable-features=VizDisplayCompositor'
+]
+
+class _Job:
+    """A unit of work handed to a pooled browser"""
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: Dict, context_options: Optional[Dict],
+                 source: Optional[str] = None):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.context_options = context_options or {}
+        self.source = source
+        self.future = concurrent.futures.Future()
+
+class _BrowserWorker:
+    """Owns one warm Chromium instance on a dedicated thread.
+
+    Playwright's sync API is bound to the thread that started it, so each
+    browser lives on its own thread and jobs reach it through the pool queue.
+    """
+
+    def __init__(self, pool: 'BrowserPool', index: int):
+        self.pool = pool
+        self.index = index
+        self.browser = None
+        self.uses = 0
+        self.launches = 0
+        self.crashes = 0
+        self.busy = False
+        self.thread = threading.Thread(target=self._run, name=f"browser-pool-{index}", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def _run(self) -> None:
+        """Thread main loop; restarts the Playwright driver if it dies"""
+        while not self.pool._shutdown.is_set():
+            try:
+                with sync_playwright() as p:
+                    self._serve(p)
+            except Exception as e:
+                self.crashes += 1
+                self.browser = None
+                logger.error(f"Browser worker {self.index} driver failed: {e}")
+                time.sleep(1)
+
+    def _serve(self, playwright) -> None:
+        """Process jobs until shutdown, keeping the browser healthy between jobs"""
+        try:
+            self._ensure_browser(playwright)
+            while not self.pool._shutdown.is_set():
+                try:
+                    job = self.pool._jobs.get(timeout=self.pool.health_check_interval)
+                except queue.Empty:
+                    self._ensure_browser(playwright)
+                    continue
+                if job is None:
+                    break
+                self._execute(playwright, job)
+        finally:
+            self._close_browser()
+
+    def _ensure_browser(self, playwright) -> None:
+        """Health check: relaunch the browser if it is missing or disconnected"""
+        if self.browser is not None and self.browser.is_connected():
+            return
+        if self.browser is not None:
+            self.crashes += 1
+            logger.warning(f"Browser worker {self.index} lost its browser, relaunching")
+        self.browser = playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        self.uses = 0
+        self.launches += 1
+        logger.info(f"Browser worker {self.index} launched Chromium (launch #{self.launches})")
+
+    def _close_browser(self) -> None:
+        if self.browser is None:
+            return
+        try:
+            self.browser.close()
+        except Exception as e:
+            logger.debug(f"Browser worker {self.index} close error: {e}")
+        self.browser = None
+
+    def _execute(self, playwright, job: _Job) -> None:
+        """Run a job in a fresh, isolated context and recycle the browser when due"""
+        if not job.future.set_running_or_notify_cancel():
+            return
+
+        self.busy = True
+        context = None
+        try:
+            self._ensure_browser(playwright)
+            context = self.browser.new_context(**job.context_options)
+            if job.source:
+                resource_blocker.apply(context, job.source)
+            page = context.new_page()
+            # Bound every page operation so a hung page cannot hold the worker forever
+            page.set_default_timeout(self.pool.job_timeout * 1000)
+            job.future.set_result(job.fn(page, *job.args, **job.kwargs))
+        except Exception as e:
+            job.future.set_exception(e)
+        finally:
+            if context is not None:
+                try:
+                    context.close()
+                except Exception as e:
+                    logger.debug(f"Browser worker {self.index} context close error: {e}")
+            self.busy = False
+            self.uses += 1
+
+        if self.browser is not None and not self.browser.is_connected():
+            # Crashed mid-job; the next health check relaunches it
+            self._ensure_browser(playwright)
+        elif self.uses >= self.pool.max_uses:
+            logger.info(f"Browser worker {self.index} recycling after {self.uses} uses")
+            self._close_browser()
+            self._ensure_browser(playwright)
+
+class BrowserPool:
+    """Process-wide pool of warm Chromium browsers shared by all scraping paths.
+
+    Callers hand in a function taking a ``page`` as its first argument; the pool
+    runs it on one of its browsers inside a brand new context, so cookies and
+    storage never leak between requests.
+    """
+
+    def __init__(self, size: Optional[int] = None, max_uses: Optional[int] = None,
+                 health_check_interval: float = 30.0, job_timeout: Optional[float] = None):
+        self.size = size or int(os.getenv('BROWSER_POOL_SIZE', 2))
+        self.max_uses = max_uses or int(os.getenv('BROWSER_POOL_MAX_USES', 100))
+        self.job_timeout = job_timeout or float(os.getenv('BROWSER_POOL_JOB_TIMEOUT', 60))
+        self.health_check_interval = health_check_interval
+        self._jobs = queue.Queue()
+        self._workers: List[_BrowserWorker] = []
+        self._lock = threading.Lock()
+        self._shutdown = threading.Event()
+        self.stats = {
+            'http_hits': 0,
+            'http_fallbacks': 0,
+            'timeouts': 0
+        }
+
+    def start(self) -> None:
+        """Launch the pooled browsers (idempotent; also called lazily on first use)"""
+        with self._lock:
+            if self._workers:
+                return
+            self._shutdown.clear()
+            for index in range(self.size):
+                worker = _BrowserWorker(self, index)
+                worker.start()
+                self._workers.append(worker)
+            logger.info(f"Browser pool started with {self.size} browsers")
+
+    def submit(self, fn: Callable, *args, context_options: Optional[Dict] = None,
+               source: Optional[str] = None, **kwargs) -> concurrent.futures.Future:
+        """Schedule ``fn(page, *args, **kwargs)`` on a pooled browser
+
+        With ``source``, the context gets that source's resource blocking profile.
+        """
+        if not self._workers:
+            self.start()
+        job = _Job(fn, args, kwargs, context_options, source)
+        self._jobs.put(job)
+        return job.future
+
+    def run(self, fn: Callable, *args, timeout: Optional[float] = None,
+            context_options: Optional[Dict] = None, source: Optional[str] = None, **kwargs) -> Any:
+        """Run ``fn(page, *args, **kwargs)`` on a pooled browser and wait for the result
+
+        Waits at most ``timeout`` seconds (the pool's ``job_timeout`` by default)
+        and raises ``concurrent.futures.TimeoutError`` past that; a job still
+        queued at that point is cancelled so it never reaches a browser.
+        """
+        future = self.submit(fn, *args, context_options=context_options, source=source, **kwargs)
+        try:
+            return future.result(timeout=timeout if timeout is not None else self.job_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.stats['timeouts'] += 1
+            logger.warning(f"Browser pool job {getattr(fn, '__name__', fn)} timed out")
+            raise
+
+    def call(self, source_module, func_name: str, *args, timeout: Optional[float] = None,
+             context_options: Optional[Dict] = None, **kwargs) -> Any:
+        """Call a source function, borrowing a page only if the source needs a browser.
+
+        A ``<func_name>_http`` fast path on the source module is tried first;
+        the browser is only used when it returns None. ``timeout`` and
+        ``context_options`` only apply to browser jobs; other keyword arguments
+        are forwarded to the source function on every path.
+        """
+        func = getattr(source_module, func_name)
+        if not getattr(source_module, 'USES_BROWSER', True):
+            return func(None, *args, **kwargs)
+        http_fn = getattr(source_module, f"{func_name}_http", None)
+        if http_fn is not None:
+            result = http_fn(*args, **kwargs)
+            if result is not None:
+                self.stats['http_hits'] += 1
+                return result
+            self.stats['http_fallbacks'] += 1
+            logger.info(f"{source_module.__name__} {func_name} HTTP fast path failed, falling back to browser")
+        return self.run(func, *args, timeout=timeout, context_options=context_options,
+                        source=source_module.__name__.rsplit('.', 1)[-1], **kwargs)
+
+    def shutdown(self) -> None:
+        """Close all pooled browsers"""
+        with self._lock:
+            if not self._workers:
+                return
+            self._shutdown.set()
+            for _ in self._workers:
+                self._jobs.put(None)
+            for worker in self._workers:
+                worker.thread.join(timeout=10)
+            self._workers = []
+            logger.info("Browser pool shut down")
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics"""
+        return {
+            'size': self.size,
+            'max_uses': self.max_uses,
+            'job_timeout': self.job_timeout,
+            'queued_jobs': self._jobs.qsize(),
+            **self.stats,
+            'resource_blocking': resource_blocker.get_stats(),
+            'browsers': [
+                {
+                    'index': worker.index,
+                    'connected': bool(worker.browser and worker.browser.is_connected()),
+                    'busy': worker.busy,
+                    'uses': worker.uses,
+                    'launches': worker.launches,
+                    'crashes': worker.crashes
+                } for worker in self._workers
+            ]
+        }
+
+# Global browser pool instance
+browser_pool = BrowserPool()
+atexit.register(browser_pool.shutdown)
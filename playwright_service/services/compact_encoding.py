@@ -0,0 +1,67 @@
+import os
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Union
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of an encoded blob; anything else is treated as legacy JSON text
+MAGIC = b'MC1'
+ZLIB_LEVEL = int(os.getenv('CACHE_COMPACT_ZLIB_LEVEL', 6))
+
+def _common_prefix(values: List[str]) -> str:
+    """Longest shared prefix, cut back to the last '/' so suffixes stay readable"""
+    prefix = os.path.commonprefix(values)
+    if len(values) > 1 and '/' in prefix:
+        prefix = prefix[:prefix.rindex('/') + 1]
+    return prefix
+
+def _pack_column(values: List[Any]) -> Dict:
+    """Factor the shared prefix out of a column of strings (URLs, ids)"""
+    if len(values) > 1 and all(isinstance(value, str) for value in values):
+        prefix = _common_prefix(values)
+        if prefix:
+            return {'p': prefix, 's': [value[len(prefix):] for value in values]}
+    return {'v': values}
+
+def _unpack_column(column: Dict) -> List[Any]:
+    if 'p' in column:
+        prefix = column['p']
+        return [prefix + suffix for suffix in column['s']]
+    return column['v']
+
+def _pack(items: List[Any]) -> Dict:
+    """Columnar layout for lists of same-shaped dicts, prefix-factored lists of strings otherwise"""
+    if items and all(isinstance(item, dict) for item in items):
+        keys = list(items[0].keys())
+        key_set = set(keys)
+        if all(item.keys() == key_set for item in items):
+            return {'k': keys, 'c': [_pack_column([item[key] for item in items]) for key in keys], 'n': len(items)}
+        return {'v': items}
+    return _pack_column(items)
+
+def _unpack(payload: Dict) -> List[Any]:
+    if 'k' in payload:
+        columns = [_unpack_column(column) for column in payload['c']]
+        return [dict(zip(payload['k'], row)) for row in zip(*columns)] if columns else [{}] * payload['n']
+    return _unpack_column(payload)
+
+def encode_list(items: List[Any]) -> bytes:
+    """Encode a chapter list or image URL list as a compressed columnar blob"""
+    payload = json.dumps(_pack(items), separators=(',', ':')).encode('utf-8')
+    return MAGIC + zlib.compress(payload, ZLIB_LEVEL)
+
+def decode_list(value: Optional[Union[bytes, str]]) -> List[Any]:
+    """Decode a stored list, accepting both compact blobs and legacy JSON text"""
+    if not value:
+        return []
+    if isinstance(value, (bytes, memoryview)):
+        value = bytes(value)
+        if value.startswith(MAGIC):
+            return _unpack(json.loads(zlib.decompress(value[len(MAGIC):])))
+        value = value.decode('utf-8')
+    return json.loads(value)
+
+def is_compact(value: Optional[Union[bytes, str]]) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(MAGIC)]) == MAGIC
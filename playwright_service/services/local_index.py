@@ -0,0 +1,292 @@
+import os
+import re
+import math
+import time
+import bisect
+import threading
+from array import array
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A search answered locally with at least this many prefix/substring matches skips scraping
+LOCAL_INDEX_MIN_RESULTS = int(os.getenv('LOCAL_INDEX_MIN_RESULTS', 10))
+
+# Share of the query's trigrams a title must contain to count as a fuzzy match
+FUZZY_MIN_OVERLAP = float(os.getenv('LOCAL_INDEX_FUZZY_MIN_OVERLAP', 0.5))
+
+# Scores: title prefix > substring > fuzzy (trigram Dice coefficient, at most 1.0)
+PREFIX_SCORE = 2.0
+SUBSTRING_SCORE = 1.5
+
+_SPACES = re.compile(r'\s+')
+
+# Session.info key holding PreloadedManga changes flushed but not yet committed
+PENDING_KEY = 'local_index_pending'
+
+def normalize(title: Optional[str]) -> str:
+    return _SPACES.sub(' ', title.strip().lower()) if title else ''
+
+def title_trigrams(title: str) -> Set[str]:
+    padded = f' {title} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def query_trigrams(query: str) -> Set[str]:
+    # Only the start is padded, so a partially typed last word still matches fully
+    padded = f' {query}'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class LocalTitleIndex:
+    """In-process search index over preloaded titles.
+
+    Titles are kept in flat arrays indexed by slot: normalized titles, the
+    result dicts served to clients and per-title trigram counts. Trigram
+    posting lists are ``array('I')`` of slots, and a sorted title list serves
+    prefix lookups. Updates replace a slot in place; postings of removed slots
+    are skipped at query time and dropped when the index is compacted.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self._attached = False
+        self.stats = {
+            'queries': 0,
+            'answered': 0,
+            'total_us': 0.0,
+            'rebuilds': 0
+        }
+
+    def _reset(self) -> None:
+        self._titles: List[str] = []
+        self._docs: List[Optional[Dict]] = []
+        self._gram_counts = array('H')
+        self._postings: Dict[str, array] = {}
+        self._sorted: List[tuple] = []
+        self._slots: Dict[str, int] = {}
+        self._dead = 0
+
+    def build(self, docs: Iterable[Dict]) -> int:
+        """Replace the index contents; returns the number of titles indexed"""
+        with self._lock:
+            self._reset()
+            for doc in docs:
+                self._add(doc)
+            self._sorted.sort()
+            self.stats['rebuilds'] += 1
+            return len(self._slots)
+
+    def upsert(self, doc: Dict) -> None:
+        """Add or replace a title, keyed by its ``details_url``"""
+        with self._lock:
+            slot = self._slots.get(doc['details_url'])
+            if slot is not None:
+                self._remove_slot(slot)
+            self._add(doc, keep_sorted=True)
+
+    def remove(self, details_url: str) -> None:
+        with self._lock:
+            slot = self._slots.get(details_url)
+            if slot is not None:
+                self._remove_slot(slot)
+
+    def _add(self, doc: Dict, keep_sorted: bool = False) -> None:
+        slot = len(self._docs)
+        title = normalize(doc.get('title'))
+        grams = title_trigrams(title)
+        self._titles.append(title)
+        self._docs.append(doc)
+        self._gram_counts.append(min(len(grams), 0xFFFF))
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array('I')
+            postings.append(slot)
+        if keep_sorted:
+            bisect.insort(self._sorted, (title, slot))
+        else:
+            self._sorted.append((title, slot))
+        self._slots[doc['details_url']] = slot
+
+    def _remove_slot(self, slot: int) -> None:
+        doc = self._docs[slot]
+        del self._slots[doc['details_url']]
+        position = bisect.bisect_left(self._sorted, (self._titles[slot], slot))
+        if position < len(self._sorted) and self._sorted[position][1] == slot:
+            del self._sorted[position]
+        self._docs[slot] = None
+        self._dead += 1
+        if self._dead > 1000 and self._dead > len(self._slots):
+            self.build([doc for doc in self._docs if doc is not None])
+
+    def search(self, query: str, sources: Optional[List[str]] = None, limit: int = 20) -> List[Dict]:
+        """Prefix, substring and typo-tolerant title search, best match first
+
+        Each result's ``match`` is ``prefix``, ``substring`` or ``fuzzy``.
+        """
+        start = time.perf_counter()
+        q = normalize(query)
+        if not q:
+            return []
+        allowed = set(sources) if sources else None
+
+        with self._lock:
+            scores: Dict[int, float] = {}
+
+            # Title prefixes from the sorted list
+            position = bisect.bisect_left(self._sorted, (q,))
+            while position < len(self._sorted) and len(scores) < limit * 10:
+                title, slot = self._sorted[position]
+                if not title.startswith(q):
+                    break
+                scores[slot] = PREFIX_SCORE
+                position += 1
+
+            # Substrings and near misses from the trigram postings
+            if len(q) >= 3:
+                grams = query_trigrams(q)
+                needed = max(1, math.ceil(len(grams) * FUZZY_MIN_OVERLAP))
+                counts = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+                for slot, hits in counts.items():
+                    if hits < needed or slot in scores or self._docs[slot] is None:
+                        continue
+                    if q in self._titles[slot]:
+                        scores[slot] = SUBSTRING_SCORE
+                    else:
+                        scores[slot] = 2 * hits / (len(grams) + self._gram_counts[slot])
+
+            docs = self._docs
+            ranked = sorted(
+                (slot for slot in scores
+                 if docs[slot] is not None and (allowed is None or docs[slot]['source'] in allowed)),
+                key=lambda slot: (-scores[slot], -(docs[slot].get('popularity') or 0))
+            )[:limit]
+            results = [dict(docs[slot], cached=True, local=True, match=self._match_type(scores[slot]))
+                       for slot in ranked]
+
+            self.stats['queries'] += 1
+            if results:
+                self.stats['answered'] += 1
+            self.stats['total_us'] += (time.perf_counter() - start) * 1_000_000
+        return results
+
+    @staticmethod
+    def _match_type(score: float) -> str:
+        if score >= PREFIX_SCORE:
+            return 'prefix'
+        return 'substring' if score >= SUBSTRING_SCORE else 'fuzzy'
+
+    def load_from_db(self) -> int:
+        """Build the index from PreloadedManga without constructing ORM objects"""
+        from models import db, PreloadedManga
+        from services.search_service import search_service
+
+        rows = db.session.query(
+            PreloadedManga.title, PreloadedManga.source_url, PreloadedManga.cover_url,
+            PreloadedManga.source, PreloadedManga.status, PreloadedManga.popularity,
+            db.func.json_array_length(PreloadedManga.chapters)
+        ).all()
+        count = self.build(self._row_docs(rows, search_service))
+        logger.info(f"Local title index built with {count} titles")
+        return count
+
+    def refresh(self, rows) -> None:
+        """Apply PreloadedManga rows written outside the ORM (bulk upserts); a no-op unless attached.
+
+        Rows have the same columns as ``load_from_db`` selects.
+        """
+        if not self._attached:
+            return
+        from services.search_service import search_service
+        with self._lock:
+            for doc in self._row_docs(rows, search_service):
+                self.upsert(doc)
+
+    @classmethod
+    def _row_docs(cls, rows, search_service) -> Iterable[Dict]:
+        for title, source_url, cover_url, source, status, popularity, chapter_count in rows:
+            yield cls._doc(search_service._extract_manga_id(source_url, source), title, source_url,
+                           cover_url, source, status, popularity, chapter_count)
+
+    def attach(self) -> None:
+        """Keep the index in step with committed PreloadedManga inserts, updates and deletes
+
+        Changes are collected per session at flush time and only applied once
+        that session commits, so rolled-back writes never reach the index.
+        """
+        if self._attached:
+            return
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session, object_session
+        from models import PreloadedManga
+        from services.search_service import search_service
+
+        def pending(target) -> Dict[str, Optional[Dict]]:
+            return object_session(target).info.setdefault(PENDING_KEY, {})
+
+        def on_change(mapper, connection, target):
+            pending(target)[target.source_url] = self._doc(
+                search_service._extract_manga_id(target.source_url, target.source), target.title,
+                target.source_url, target.cover_url, target.source, target.status, target.popularity,
+                len(target.chapters or [])
+            )
+
+        def on_delete(mapper, connection, target):
+            pending(target)[target.source_url] = None
+
+        def on_commit(session):
+            changes = session.info.pop(PENDING_KEY, None)
+            if not changes:
+                return
+            with self._lock:
+                for source_url, doc in changes.items():
+                    if doc is None:
+                        self.remove(source_url)
+                    else:
+                        self.upsert(doc)
+
+        def on_rollback(session):
+            session.info.pop(PENDING_KEY, None)
+
+        event.listen(PreloadedManga, 'after_insert', on_change)
+        event.listen(PreloadedManga, 'after_update', on_change)
+        event.listen(PreloadedManga, 'after_delete', on_delete)
+        event.listen(Session, 'after_commit', on_commit)
+        event.listen(Session, 'after_rollback', on_rollback)
+        self._attached = True
+
+    @staticmethod
+    def _doc(manga_id, title, source_url, cover_url, source, status, popularity, chapter_count) -> Dict:
+        """Result dict in the same shape as scraped search results"""
+        return {
+            'id': manga_id,
+            'title': title,
+            'status': status or '',
+            'chapter': f"{chapter_count} chapters" if chapter_count else '',
+            'image': cover_url,
+            'details_url': source_url,
+            'source': source,
+            'popularity': popularity or 0
+        }
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._slots)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            queries = self.stats['queries']
+            return {
+                'titles': len(self._slots),
+                'trigrams': len(self._postings),
+                'queries': queries,
+                'answered': self.stats['answered'],
+                'avg_us': round(self.stats['total_us'] / queries, 1) if queries else 0.0,
+                'rebuilds': self.stats['rebuilds']
+            }
+
+# Global local title index instance
+local_index = LocalTitleIndex()
@@ -0,0 +1,163 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement; 500 rows x 12 columns stays under SQLite's 32766 bound variables
+UPSERT_CHUNK_ROWS = int(os.getenv('PRELOADED_UPSERT_CHUNK_ROWS', 500))
+
+class PreloadedStore:
+    """Bulk writes to PreloadedManga.
+
+    A scrape batch is written with one ``INSERT ... ON CONFLICT(source_url)
+    DO UPDATE`` per chunk and a single commit, instead of a lookup and an ORM
+    flush per row. Conflicting rows only get the columns the caller names,
+    plus ``last_updated`` and the popularity increment. SQLite and Postgres
+    use their native upsert; other dialects fall back to the ORM per row.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            'batches': 0,
+            'rows': 0,
+            'fallback_batches': 0,
+            'total_ms': 0.0
+        }
+
+    def upsert_many(self, rows: Iterable[Dict], update_columns: Sequence[str] = (),
+                    popularity_increment: int = 0) -> int:
+        """Insert new rows and update existing ones by ``source_url`` in one transaction.
+
+        ``rows`` use PreloadedManga column names. New rows start with a
+        popularity of ``popularity_increment`` (unless they carry their own);
+        existing rows get it added. Returns the number of distinct rows written.
+        """
+        from models import db, PreloadedManga
+
+        batch = self._prepare(rows, popularity_increment)
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        dialect = db.engine.dialect.name
+        try:
+            if dialect in ('sqlite', 'postgresql'):
+                written = self._upsert_native(db, PreloadedManga, dialect, batch,
+                                              update_columns, popularity_increment)
+            else:
+                self._upsert_orm(db, PreloadedManga, batch, update_columns, popularity_increment)
+                written = []
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if written:
+            self._refresh_local_index(written)
+        with self._lock:
+            self.stats['batches'] += 1
+            self.stats['rows'] += len(batch)
+            if dialect not in ('sqlite', 'postgresql'):
+                self.stats['fallback_batches'] += 1
+            self.stats['total_ms'] += (time.perf_counter() - start) * 1000
+        return len(batch)
+
+    @staticmethod
+    def _prepare(rows: Iterable[Dict], popularity_increment: int) -> List[Dict]:
+        """Complete rows to the full column set and merge duplicates by source_url.
+
+        Postgres rejects an upsert touching the same row twice, so duplicates
+        collapse into one row (later values win, popularity adds up).
+        """
+        from models import PreloadedManga
+
+        now = datetime.utcnow()
+        merged: Dict[str, Dict] = {}
+        for row in rows:
+            source_url = row.get('source_url')
+            if not source_url:
+                continue
+            title = row.get('title') or 'Unknown'
+            values = {
+                'title': title,
+                'normalized_title': row.get('normalized_title') or PreloadedManga.normalize_title(title),
+                'source_url': source_url,
+                'cover_url': row.get('cover_url'),
+                'description': row.get('description'),
+                'chapters': row.get('chapters') or [],
+                'source': row.get('source'),
+                'author': row.get('author'),
+                'status': row.get('status'),
+                'popularity': row.get('popularity', popularity_increment) or 0,
+                'last_accessed': row.get('last_accessed'),
+                'last_updated': row.get('last_updated') or now
+            }
+            previous = merged.get(source_url)
+            if previous is not None:
+                values['popularity'] += previous['popularity']
+            merged[source_url] = values
+        return list(merged.values())
+
+    @staticmethod
+    def _upsert_native(db, model, dialect: str, batch: List[Dict],
+                       update_columns: Sequence[str], popularity_increment: int) -> List:
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        written = []
+        for offset in range(0, len(batch), UPSERT_CHUNK_ROWS):
+            stmt = insert(model).values(batch[offset:offset + UPSERT_CHUNK_ROWS])
+            excluded = stmt.excluded
+            updates = {column: getattr(excluded, column) for column in update_columns}
+            updates['last_updated'] = excluded.last_updated
+            if popularity_increment:
+                updates['popularity'] = db.func.coalesce(model.popularity, 0) + excluded.popularity
+            stmt = stmt.on_conflict_do_update(index_elements=[model.source_url], set_=updates).returning(
+                model.title, model.source_url, model.cover_url, model.source, model.status,
+                model.popularity, db.func.json_array_length(model.chapters)
+            )
+            written.extend(db.session.execute(stmt).all())
+        return written
+
+    @staticmethod
+    def _upsert_orm(db, model, batch: List[Dict], update_columns: Sequence[str],
+                    popularity_increment: int) -> None:
+        """Per-row path for databases without ON CONFLICT, still in one transaction"""
+        existing = {
+            manga.source_url: manga
+            for manga in model.query.filter(model.source_url.in_([row['source_url'] for row in batch])).all()
+        }
+        for row in batch:
+            manga = existing.get(row['source_url'])
+            if manga is None:
+                db.session.add(model(**row))
+                continue
+            for column in update_columns:
+                setattr(manga, column, row[column])
+            manga.last_updated = row['last_updated']
+            if popularity_increment:
+                manga.popularity = (manga.popularity or 0) + row['popularity']
+
+    @staticmethod
+    def _refresh_local_index(written: List) -> None:
+        """Core statements skip the ORM events that keep the local index current"""
+        from services.local_index import local_index
+        local_index.refresh(written)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            batches = self.stats['batches']
+            return {
+                **self.stats,
+                'avg_batch_ms': round(self.stats['total_ms'] / batches, 2) if batches else 0.0
+            }
+
+# Global preloaded store instance
+preloaded_store = PreloadedStore()
@@ -4,12 +4,12 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import logging
 from sqlalchemy import or_
-from sqlalchemy.exc import IntegrityError
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import db, PreloadedManga
+from services.preloaded_store import preloaded_store
 from sources import weebcentral, asurascans, mangadex
 from playwright.sync_api import sync_playwright
 import time
@@ -66,51 +66,16 @@ class PreloaderService:
                 # Extract manga data from the page
                 manga_list = self._extract_manga_list(page, source)
                 
-                for manga_data in manga_list[:page_limit * 20]:  # Assuming ~20 manga per page
-                    try:
-                        # Check if manga already exists
-                        existing = PreloadedManga.query.filter_by(
-                            source_url=manga_data.get('source_url')
-                        ).first()
-                        
-                        if existing:
-                            # Update existing manga
-                            existing.last_updated = datetime.utcnow()
-                            existing.chapters = manga_data.get('chapters', [])
-                            existing.status = manga_data.get('status')
-                        else:
-                            # Create new manga entry
-                            manga = PreloadedManga(
-                                title=manga_data.get('title', 'Unknown'),
-                                normalized_title=PreloadedManga.normalize_title(
-                                    manga_data.get('title', '')
-                                ),
-                                source_url=manga_data.get('source_url'),
-                                cover_url=manga_data.get('cover_url'),
-                                description=manga_data.get('description'),
-                                chapters=manga_data.get('chapters', []),
-                                source=source,
-                                author=manga_data.get('author'),
-                                status=manga_data.get('status'),
-                                last_updated=datetime.utcnow()
-                            )
-                            db.session.add(manga)
-                        
-                        manga_count += 1
-                        
-                        # Rate limiting
-                        time.sleep(self.rate_limits.get(source, 1.0))
-                        
-                    except IntegrityError:
-                        db.session.rollback()
-                        logger.warning(f"Duplicate manga: {manga_data.get('title')}")
-                        continue
-                    except Exception as e:
-                        db.session.rollback()
-                        logger.error(f"Error saving manga: {e}")
-                        continue
+                # Write the batch in one upsert; existing manga get fresh chapters and status
+                try:
+                    manga_count = preloaded_store.upsert_many(
+                        (dict(manga_data, source=source)
+                         for manga_data in manga_list[:page_limit * 20]),  # Assuming ~20 manga per page
+                        update_columns=('chapters', 'status')
+                    )
+                except Exception as e:
+                    logger.error(f"Error saving manga from {source}: {e}")
                 
-                db.session.commit()
                 browser.close()
                 
                 logger.info(f"Preloaded {manga_count} manga from {source}")
@@ -317,46 +282,26 @@ class PreloaderService:
                                 # Use the source's search function
                                 results = source_module.search(page, term, fuzzy=False)
                                 
-                                # Cache the results
-                                for result in results[:5]:  # Limit to top 5 results per term
-                                    try:
-                                        # Check if already exists
-                                        existing = PreloadedManga.query.filter_by(
-                                            source_url=result.get('details_url')
-                                        ).first()
-                                        
-                                        if existing:
-                                            # Update popularity
-                                            existing.popularity += 1
-                                            existing.last_updated = datetime.utcnow()
-                                        else:
-                                            # Create new entry
-                                            manga = PreloadedManga(
-                                                title=result.get('title', 'Unknown'),
-                                                normalized_title=PreloadedManga.normalize_title(
-                                                    result.get('title', '')
-                                                ),
-                                                source_url=result.get('details_url'),
-                                                cover_url=result.get('image'),
-                                                description=result.get('description', ''),
-                                                chapters=result.get('chapters', []),
-                                                source=source_name,
-                                                author=result.get('author', ''),
-                                                status=result.get('status', ''),
-                                                popularity=1,
-                                                last_updated=datetime.utcnow()
-                                            )
-                                            db.session.add(manga)
-                                        
-                                        db.session.commit()
-                                        
-                                    except IntegrityError:
-                                        db.session.rollback()
-                                        continue
-                                    except Exception as e:
-                                        logger.error(f"Error saving manga for term '{term}': {e}")
-                                        db.session.rollback()
-                                        continue
+                                # Cache the top 5 results per term in one upsert, bumping popularity
+                                try:
+                                    preloaded_store.upsert_many(
+                                        (
+                                            {
+                                                'title': result.get('title', 'Unknown'),
+                                                'source_url': result.get('details_url'),
+                                                'cover_url': result.get('image'),
+                                                'description': result.get('description', ''),
+                                                'chapters': result.get('chapters', []),
+                                                'source': source_name,
+                                                'author': result.get('author', ''),
+                                                'status': result.get('status', '')
+                                            }
+                                            for result in results[:5]
+                                        ),
+                                        popularity_increment=1
+                                    )
+                                except Exception as e:
+                                    logger.error(f"Error saving manga for term '{term}': {e}")
                                 
                                 # Rate limiting between sources
                                 time.sleep(self.rate_limits.get(source_name, 1.0))
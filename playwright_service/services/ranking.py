@@ -0,0 +1,71 @@
+import os
+import re
+import functools
+from typing import Dict, List, Optional, Sequence
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Minimum relevance for best_match to return anything. Scores run lower than
+# the difflib ratios asurascans used to compare against 0.7; 0.6 keeps the
+# same decisions for full titles and typos while partial queries ("solo",
+# "mount hua") still get every result instead of a single guess
+BEST_MATCH_THRESHOLD = float(os.getenv('RANKING_BEST_MATCH_THRESHOLD', 0.6))
+
+# Relevance = TRIGRAM_WEIGHT * trigram Jaccard + (1 - TRIGRAM_WEIGHT) * share of query words in the title
+TRIGRAM_WEIGHT = 0.6
+
+_WORDS = re.compile(r'\w+')
+
+@functools.lru_cache(maxsize=int(os.getenv('RANKING_FEATURE_CACHE', 50000)))
+def _features(title: str):
+    """Normalized title with its trigram and word sets; titles recur across searches"""
+    t = ' '.join(title.lower().split())
+    padded = f' {t} '
+    # Trigrams as character tuples: zip builds them without per-slice Python work
+    return t, frozenset(zip(padded, padded[1:], padded[2:])), frozenset(_WORDS.findall(t))
+
+def score_titles(query: str, titles: Sequence[str]) -> List[float]:
+    """Relevance of each title to ``query`` in [0, 1], computed in one pass.
+
+    Trigram and word sets are built once per distinct title and cached; each
+    title then costs two C-level set intersections, so hundreds of candidates
+    score in well under a millisecond. An exact (normalized) title match
+    scores 1.0.
+    """
+    q, query_grams, query_words = _features(query)
+    if not q:
+        return [0.0] * len(titles)
+    gram_count = len(query_grams)
+    word_count = len(query_words) or 1
+
+    scores = []
+    for title in titles:
+        t, grams, words = _features(title)
+        if t == q:
+            scores.append(1.0)
+            continue
+        shared = len(query_grams & grams)
+        jaccard = shared / (gram_count + len(grams) - shared) if shared else 0.0
+        scores.append(TRIGRAM_WEIGHT * jaccard + (1 - TRIGRAM_WEIGHT) * len(query_words & words) / word_count)
+    return scores
+
+def rank(query: str, results: List[Dict], top_k: Optional[int] = None, min_score: float = 0.0) -> List[Dict]:
+    """Results from any mix of sources ordered by relevance to ``query``.
+
+    Each result gets a ``relevance`` field; ties keep their original order.
+    """
+    scores = score_titles(query, [result.get('title') or '' for result in results])
+    order = sorted(range(len(results)), key=lambda i: -scores[i])
+    ranked = []
+    for i in order:
+        if scores[i] < min_score:
+            break
+        results[i]['relevance'] = round(scores[i], 3)
+        ranked.append(results[i])
+    return ranked[:top_k] if top_k is not None else ranked
+
+def best_match(query: str, results: List[Dict], threshold: float = BEST_MATCH_THRESHOLD) -> Optional[Dict]:
+    """The most relevant result, or None when nothing reaches ``threshold``"""
+    ranked = rank(query, results, top_k=1, min_score=threshold)
+    return ranked[0] if ranked else None
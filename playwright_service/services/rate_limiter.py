@@ -0,0 +1,136 @@
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    ``acquire`` blocks until a token is available, so callers queue behind the
+    limit instead of failing. ``pause_for`` empties the bucket for a while when
+    the server says to back off.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns seconds waited"""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return now - started
+                else:
+                    delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+
+    def pause_for(self, seconds: float) -> None:
+        """Hand out no tokens for ``seconds`` and start empty afterwards"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.updated = self.paused_until
+
+class RateLimitedClient:
+    """HTTP client that keeps a ``requests`` session under an API's rate limits.
+
+    Every request takes a token from the global bucket (and from a route bucket
+    when given). ``X-RateLimit-Remaining: 0`` pauses the bucket until
+    ``X-RateLimit-Retry-After``; a 429 pauses it for ``Retry-After`` and the
+    request is retried instead of surfacing as an error.
+    """
+
+    def __init__(self, session, bucket: TokenBucket, route_buckets: Optional[Dict[str, TokenBucket]] = None,
+                 max_retries: int = 3):
+        self.session = session
+        self.bucket = bucket
+        self.route_buckets = route_buckets or {}
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'throttle_wait_seconds': 0.0,
+            'rate_limited': 0,
+            'retries': 0,
+            'server_pauses': 0
+        }
+
+    def _count(self, key: str, amount=1) -> None:
+        with self._lock:
+            self.stats[key] += amount
+
+    def get(self, url: str, route: Optional[str] = None, **kwargs):
+        """GET ``url``, waiting for rate limit tokens and retrying 429 responses"""
+        buckets = [self.bucket] + ([self.route_buckets[route]] if route in self.route_buckets else [])
+        for attempt in range(self.max_retries + 1):
+            waited = sum(bucket.acquire() for bucket in buckets)
+            if waited > 0.001:
+                self._count('throttled')
+                self._count('throttle_wait_seconds', waited)
+            self._count('requests')
+            response = self.session.get(url, **kwargs)
+            self._observe(response, buckets)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            delay = self._retry_after(response, attempt)
+            self._count('rate_limited')
+            self._count('retries')
+            logger.warning(f"Rate limited by {url} - retrying in {delay:.1f}s")
+            for bucket in buckets:
+                bucket.pause_for(delay)
+        return response
+
+    def _observe(self, response, buckets) -> None:
+        """Pause before the server starts rejecting us when its quota is used up"""
+        if response.headers.get('X-RateLimit-Remaining') == '0':
+            delay = self._retry_after(response, 0)
+            self._count('server_pauses')
+            for bucket in buckets:
+                bucket.pause_for(delay)
+
+    @staticmethod
+    def _retry_after(response, attempt: int) -> float:
+        """Seconds to back off, from Retry-After / X-RateLimit-Retry-After or exponential"""
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        reset_at = response.headers.get('X-RateLimit-Retry-After')
+        if reset_at:
+            try:
+                return max(0.0, float(reset_at) - time.time())
+            except ValueError:
+                pass
+        return float(2 ** attempt)
+
+    def get_stats(self) -> Dict:
+        """Get request and throttling counters"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['throttle_wait_seconds'] = round(stats['throttle_wait_seconds'], 3)
+        return stats
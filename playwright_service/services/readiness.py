@@ -0,0 +1,133 @@
+import time
+import threading
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# JS predicate: at least ``min_count`` elements match ``selector``
+_COUNT_AT_LEAST_JS = "([selector, minCount]) => document.querySelectorAll(selector).length >= minCount"
+
+# JS predicate: more elements match ``selector`` than ``previous`` (a list grew)
+_COUNT_ABOVE_JS = "([selector, previous]) => document.querySelectorAll(selector).length > previous"
+
+class ReadyCheck:
+    """A condition meaning a page's data is present.
+
+    ``selector`` must match at least ``min_count`` elements, or with
+    ``grows=True`` more elements than the count passed to ``wait``.
+    """
+
+    def __init__(self, selector: str, min_count: int = 1, timeout: int = 8000, grows: bool = False):
+        self.selector = selector
+        self.min_count = min_count
+        self.timeout = timeout
+        self.grows = grows
+
+    def expression(self, previous: Optional[int] = None):
+        """The ``(js, arg)`` pair passed to ``wait_for_function``"""
+        if self.grows:
+            return _COUNT_ABOVE_JS, [self.selector, previous or 0]
+        return _COUNT_AT_LEAST_JS, [self.selector, self.min_count]
+
+# What "ready" means for each source and scraping step
+SOURCE_READINESS = {
+    'weebcentral': {
+        'search': ReadyCheck('section.w-full a[href*="/series/"]', timeout=6000),
+        'details': ReadyCheck('h1', timeout=8000),
+        'chapters': ReadyCheck('#chapter-list a[href*="/chapter"], section[x-data*="mark_chapters"] a', timeout=5000),
+        'all_chapters': ReadyCheck('#chapter-list a[href*="/chapter"], section[x-data*="mark_chapters"] a',
+                                   timeout=5000, grows=True),
+        # The reader swaps in every page image at once, so the first is enough
+        'chapter_images': ReadyCheck('img[alt*="Page"], img[alt*="page"], .manga-page img, .reader-page img', timeout=10000)
+    },
+    'asurascans': {
+        'search': ReadyCheck('a[href^="series/"], a[href*="/series/"]', timeout=6000),
+        'details': ReadyCheck('div.pl-4.pr-2.pb-4.overflow-y-auto div.pl-4.py-2.border.rounded-md a', timeout=8000),
+        'chapter_images': ReadyCheck('div.w-full.mx-auto.center img', timeout=10000)
+    }
+}
+
+class Readiness:
+    """Waits until a scraping page's data is present instead of sleeping.
+
+    Each wait proceeds the moment the source's ``ReadyCheck`` holds. A timeout
+    is not an error: the scraper parses whatever has rendered, and the miss is
+    counted in the per-source telemetry.
+    """
+
+    def __init__(self, checks: Optional[Dict[str, Dict[str, ReadyCheck]]] = None):
+        self.checks = checks or SOURCE_READINESS
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def _check(self, source: str, step: str) -> Optional[ReadyCheck]:
+        check = self.checks.get(source, {}).get(step)
+        if check is None:
+            logger.warning(f"No readiness check for {source}.{step}")
+        return check
+
+    def _record(self, source: str, step: str, ready: bool, waited: float) -> None:
+        with self._lock:
+            entry = self.stats.setdefault(f"{source}.{step}", {
+                'ready': 0,
+                'timeouts': 0,
+                'total_wait_ms': 0.0,
+                'max_wait_ms': 0.0
+            })
+            entry['ready' if ready else 'timeouts'] += 1
+            entry['total_wait_ms'] += waited * 1000
+            entry['max_wait_ms'] = max(entry['max_wait_ms'], waited * 1000)
+        if not ready:
+            logger.warning(f"Readiness timeout for {source}.{step} after {waited:.2f}s")
+
+    def wait(self, page, source: str, step: str, previous: Optional[int] = None) -> bool:
+        """Block until ``source``'s ``step`` check holds on a sync page; False on timeout"""
+        check = self._check(source, step)
+        if check is None:
+            return False
+        expression, arg = check.expression(previous)
+        started = time.monotonic()
+        try:
+            page.wait_for_function(expression, arg=arg, timeout=check.timeout)
+            ready = True
+        except Exception:
+            ready = False
+        self._record(source, step, ready, time.monotonic() - started)
+        return ready
+
+    async def async_wait(self, page, source: str, step: str, previous: Optional[int] = None) -> bool:
+        """Async version of ``wait``"""
+        check = self._check(source, step)
+        if check is None:
+            return False
+        expression, arg = check.expression(previous)
+        started = time.monotonic()
+        try:
+            await page.wait_for_function(expression, arg=arg, timeout=check.timeout)
+            ready = True
+        except Exception:
+            ready = False
+        self._record(source, step, ready, time.monotonic() - started)
+        return ready
+
+    def count(self, page, source: str, step: str) -> int:
+        """Current number of elements matching a step's selector (for ``grows`` checks)"""
+        return page.eval_on_selector_all(self.checks[source][step].selector, 'els => els.length')
+
+    def get_stats(self) -> Dict:
+        """Get per source/step readiness telemetry"""
+        with self._lock:
+            stats = {}
+            for key, entry in self.stats.items():
+                waits = entry['ready'] + entry['timeouts']
+                stats[key] = {
+                    'ready': entry['ready'],
+                    'timeouts': entry['timeouts'],
+                    'avg_wait_ms': round(entry['total_wait_ms'] / waits, 1) if waits else 0.0,
+                    'max_wait_ms': round(entry['max_wait_ms'], 1)
+                }
+            return stats
+
+# Global readiness tracker shared by the source scrapers
+readiness = Readiness()
@@ -0,0 +1,148 @@
+import os
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _env_set(name: str, default: str) -> frozenset:
+    return frozenset(item.strip().lower() for item in os.getenv(name, default).split(',') if item.strip())
+
+# Resource types aborted on scraping pages; only the DOM is ever read, and
+# image URLs come from src/srcset attributes, which are set without loading
+BLOCKED_RESOURCE_TYPES = _env_set('SCRAPE_BLOCK_RESOURCE_TYPES', 'image,media,font')
+
+# Ad, analytics and popup hosts aborted regardless of resource type
+# (subdomains included)
+AD_HOSTS = _env_set('SCRAPE_BLOCK_HOSTS', ','.join([
+    'doubleclick.net',
+    'googlesyndication.com',
+    'googletagmanager.com',
+    'googletagservices.com',
+    'google-analytics.com',
+    'adservice.google.com',
+    'amazon-adsystem.com',
+    'adnxs.com',
+    'taboola.com',
+    'outbrain.com',
+    'popads.net',
+    'popcash.net',
+    'propellerads.com',
+    'adsterra.com',
+    'exoclick.com',
+    'juicyads.com',
+    'onclickads.net',
+    'hotjar.com',
+    'scorecardresearch.com',
+    'cloudflareinsights.com'
+]))
+
+def _source_profile(source: str) -> Dict[str, frozenset]:
+    """Resource types and hosts a source's pages must still load
+
+    Set with ``SCRAPE_ALLOW_TYPES_<SOURCE>`` / ``SCRAPE_ALLOW_HOSTS_<SOURCE>``,
+    e.g. ``SCRAPE_ALLOW_HOSTS_ASURASCANS=googletagmanager.com`` when a site
+    stops rendering without one of the default ad hosts.
+    """
+    return {
+        'allow_types': _env_set(f'SCRAPE_ALLOW_TYPES_{source.upper()}', ''),
+        'allow_hosts': _env_set(f'SCRAPE_ALLOW_HOSTS_{source.upper()}', '')
+    }
+
+# Per-source overrides for the sources scraped with a browser
+SOURCE_PROFILES = {source: _source_profile(source) for source in ('weebcentral', 'asurascans')}
+
+class ResourceBlocker:
+    """Route-interception profile applied to every scraping browser context.
+
+    Requests for blocked resource types or known ad hosts are aborted before
+    they leave the browser, so pages reach their load states sooner and ad
+    overlays never render. Set ``SCRAPE_BLOCK_RESOURCES=false`` to disable.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv('SCRAPE_BLOCK_RESOURCES', 'true').lower() == 'true'
+        self.enabled = enabled
+        self.blocked_types = BLOCKED_RESOURCE_TYPES
+        self.ad_hosts = AD_HOSTS
+        self.profiles = SOURCE_PROFILES
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def should_block(self, source: str, resource_type: str, url: str) -> bool:
+        """Decide whether a request made by a ``source`` scraping page is aborted"""
+        profile = self.profiles.get(source, {})
+        host = (urlparse(url).hostname or '').lower()
+        if self._matches(host, profile.get('allow_hosts', ())):
+            return False
+        if self._matches(host, self.ad_hosts):
+            return True
+        return resource_type in self.blocked_types and resource_type not in profile.get('allow_types', ())
+
+    def blocks_ads(self, source: str) -> bool:
+        """Whether every ad host is blocked on ``source`` pages
+
+        False when blocking is off or the source's profile lets an ad host
+        through, in which case scrapers still need to dismiss ad popups.
+        """
+        if not self.enabled or not self.ad_hosts:
+            return False
+        allowed = self.profiles.get(source, {}).get('allow_hosts', ())
+        return not any(self._matches(host, self.ad_hosts) for host in allowed)
+
+    @staticmethod
+    def _matches(host: str, hosts) -> bool:
+        """Whether ``host`` is one of ``hosts`` or a subdomain of one"""
+        parts = host.split('.')
+        return any('.'.join(parts[i:]) in hosts for i in range(len(parts)))
+
+    def _record(self, source: str, blocked: bool) -> None:
+        with self._lock:
+            counts = self.stats.setdefault(source, {'blocked': 0, 'allowed': 0})
+            counts['blocked' if blocked else 'allowed'] += 1
+
+    def apply(self, context, source: str) -> None:
+        """Install the profile on a sync Playwright browser context"""
+        if not self.enabled:
+            return
+
+        def handle(route):
+            request = route.request
+            blocked = self.should_block(source, request.resource_type, request.url)
+            self._record(source, blocked)
+            if blocked:
+                route.abort()
+            else:
+                route.continue_()
+
+        context.route('**/*', handle)
+
+    async def async_apply(self, context, source: str) -> None:
+        """Install the profile on an async Playwright browser context"""
+        if not self.enabled:
+            return
+
+        async def handle(route):
+            request = route.request
+            blocked = self.should_block(source, request.resource_type, request.url)
+            self._record(source, blocked)
+            if blocked:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await context.route('**/*', handle)
+
+    def get_stats(self) -> Dict:
+        """Get per-source blocked/allowed request counts"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'blocked_types': sorted(self.blocked_types),
+                'sources': {source: dict(counts) for source, counts in self.stats.items()}
+            }
+
+# Global blocking profile shared by the browser pool and the async engine
+resource_blocker = ResourceBlocker()
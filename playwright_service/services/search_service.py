@@ -14,7 +14,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import db, PreloadedManga
 from sources import weebcentral, asurascans, mangadex
-from playwright.sync_api import sync_playwright
+from services.browser_pool import browser_pool
+from services.title_index import title_index
+from services.preloaded_store import preloaded_store
 from flask import current_app
 import threading
 import time
@@ -85,6 +87,8 @@ class SearchService:
             db_results = self._search_preloaded_data(normalized_query, sources)
             if db_results:
                 results.extend(db_results)
+                # Every matching row is part of the response, with or without scraping
+                self._record_preloaded_access(db_results)
                 
                 # If we have enough results, return them
                 if len(results) >= 10:
@@ -136,35 +140,31 @@ class SearchService:
         """Search preloaded database data with optimized queries"""
         try:
             with current_app.app_context():
-                # Use optimized query with proper indexing
-                db_results = PreloadedManga.query.filter(
-                    and_(
-                        or_(
-                            PreloadedManga.normalized_title.contains(normalized_query),
-                            PreloadedManga.title.ilike(f'%{normalized_query}%')
-                        ),
-                        PreloadedManga.source.in_(sources),
-                        PreloadedManga.last_updated > datetime.utcnow() - timedelta(days=7)
-                    )
-                ).order_by(
-                    PreloadedManga.popularity.desc(),
-                    PreloadedManga.last_accessed.desc()
-                ).limit(50).all()
+                since = datetime.utcnow() - timedelta(days=7)
+                # Ranked ids from the FTS5 / pg_trgm title index when it is installed
+                ranked_ids = title_index.search_ids(db.session, normalized_query, sources, since)
+                if ranked_ids is not None:
+                    rows = PreloadedManga.query.filter(PreloadedManga.id.in_(ranked_ids)).all() if ranked_ids else []
+                    position = {manga_id: i for i, manga_id in enumerate(ranked_ids)}
+                    db_results = sorted(rows, key=lambda manga: position[manga.id])
+                else:
+                    db_results = PreloadedManga.query.filter(
+                        and_(
+                            or_(
+                                PreloadedManga.normalized_title.contains(normalized_query),
+                                PreloadedManga.title.ilike(f'%{normalized_query}%')
+                            ),
+                            PreloadedManga.source.in_(sources),
+                            PreloadedManga.last_updated > since
+                        )
+                    ).order_by(
+                        PreloadedManga.popularity.desc(),
+                        PreloadedManga.last_accessed.desc()
+                    ).limit(50).all()
                 
                 if not db_results:
                     return []
                 
-                # Update access times in bulk
-                manga_ids = [m.id for m in db_results]
-                PreloadedManga.query.filter(PreloadedManga.id.in_(manga_ids)).update(
-                    {
-                        PreloadedManga.last_accessed: datetime.utcnow(),
-                        PreloadedManga.popularity: PreloadedManga.popularity + 1
-                    },
-                    synchronize_session=False
-                )
-                db.session.commit()
-                
                 # Convert to result format
                 results = []
                 for manga in db_results:
@@ -189,6 +189,25 @@ class SearchService:
         
         return []
     
+    def _record_preloaded_access(self, results: List[Dict]):
+        """Bump access time and popularity of the preloaded rows that were returned"""
+        urls = [result['details_url'] for result in results if result.get('details_url')]
+        if not urls:
+            return
+        try:
+            with current_app.app_context():
+                PreloadedManga.query.filter(PreloadedManga.source_url.in_(urls)).update(
+                    {
+                        PreloadedManga.last_accessed: datetime.utcnow(),
+                        PreloadedManga.popularity: PreloadedManga.popularity + 1
+                    },
+                    synchronize_session=False
+                )
+                db.session.commit()
+        except Exception as e:
+            logger.error(f"Error recording preloaded access: {e}")
+            db.session.rollback()
+    
     def _parallel_scrape_search(self, query: str, sources: List[str]) -> List[Dict]:
         """Perform parallel scraping across multiple sources"""
         results = []
@@ -215,40 +234,20 @@ class SearchService:
         return results
     
     def _scrape_single_source(self, query: str, source: str) -> List[Dict]:
-        """Scrape a single source with thread-safe browser creation"""
+        """Scrape a single source with a page borrowed from the shared browser pool"""
         try:
-            # Create a new Playwright context for this thread (thread-safe)
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor'
-                    ]
-                )
-                
-                page = browser.new_page()
-                
-                # Set page optimizations
-                page.set_viewport_size({"width": 1280, "height": 720})
-                page.set_extra_http_headers({
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                })
-                
-                source_module = self.sources[source]
-                source_results = source_module.search(page, query)
-                
-                # Add metadata
-                for result in source_results:
-                    result['cached'] = False
-                    result['source'] = source
-                
-                page.close()
-                browser.close()
-                return source_results
+            source_module = self.sources[source]
+            source_results = browser_pool.call(source_module, 'search', query, context_options={
+                'viewport': {"width": 1280, "height": 720},
+                'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            })
+            
+            # Add metadata
+            for result in source_results:
+                result['cached'] = False
+                result['source'] = source
+            
+            return source_results
             
         except Exception as e:
             logger.error(f"Single source scraping failed for {source}: {e}")
@@ -269,43 +268,34 @@ class SearchService:
     
     def _save_to_preloaded_async(self, results: List[Dict]):
         """Save results to database asynchronously"""
+        # The worker thread has no app context of its own
+        app = current_app._get_current_object()
+        
         def save_async():
-            try:
-                with current_app.app_context():
-                    # Bulk insert/update
-                    for result in results:
-                        if not result.get('details_url'):
-                            continue
-                            
-                        existing = PreloadedManga.query.filter_by(
-                            source_url=result.get('details_url')
-                        ).first()
-                        
-                        if existing:
-                            # Update existing
-                            existing.last_updated = datetime.utcnow()
-                            existing.popularity += 1
-                        else:
-                            # Create new
-                            manga = PreloadedManga(
-                                title=result.get('title', 'Unknown'),
-                                normalized_title=PreloadedManga.normalize_title(result.get('title', '')),
-                                source_url=result.get('details_url'),
-                                cover_url=result.get('image'),
-                                source=result.get('source'),
-                                status=result.get('status'),
-                                last_updated=datetime.utcnow(),
-                                popularity=1,
-                                last_accessed=datetime.utcnow()
-                            )
-                            db.session.add(manga)
-                    
-                    db.session.commit()
-                    logger.info(f"Saved {len(results)} results to preloaded data")
+            with app.app_context():
+                try:
+                    # One upsert for the batch; seen titles get a popularity bump
+                    now = datetime.utcnow()
+                    saved = preloaded_store.upsert_many(
+                        (
+                            {
+                                'title': result.get('title', 'Unknown'),
+                                'source_url': result.get('details_url'),
+                                'cover_url': result.get('image'),
+                                'source': result.get('source'),
+                                'status': result.get('status'),
+                                'last_updated': now,
+                                'last_accessed': now
+                            }
+                            for result in results
+                        ),
+                        popularity_increment=1
+                    )
+                    logger.info(f"Saved {saved} results to preloaded data")
                     
-            except Exception as e:
-                logger.error(f"Failed to save to preloaded data: {e}")
-                db.session.rollback()
+                except Exception as e:
+                    logger.error(f"Failed to save to preloaded data: {e}")
+                    db.session.rollback()
         
         # Run in background thread
         threading.Thread(target=save_async, daemon=True).start()
@@ -331,13 +321,13 @@ class SearchService:
             'cache_misses': self._metrics['cache_misses'],
             'cache_hit_rate': cache_hit_rate,
             'avg_search_time': self._metrics['avg_search_time'],
-            'active_browsers': 0, # No longer tracking browsers
+            'browser_pool': browser_pool.get_stats(),
             'cache_size': len(self._search_cache)
         }
     
     def cleanup(self):
         """Cleanup resources"""
-        # No longer managing browser pool, so no cleanup needed here
+        # The shared browser pool is owned by services.browser_pool and outlives this service
         
         # Clear old cache entries
         current_time = time.time()
@@ -412,38 +402,22 @@ class SearchService:
     def _scrape_manga_details(self, manga_id: str, source: str) -> Optional[Dict]:
         """Scrape manga details from source"""
         try:
-            # Create a new Playwright context for this thread (thread-safe)
-            with sync_playwright() as p:
-                browser = p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--disable-web-security',
-                        '--disable-features=VizDisplayCompositor'
-                    ]
-                )
-                
-                page = browser.new_page()
-                source_module = self.sources.get(source)
-                if not source_module:
-                    return None
-                
-                details = source_module.get_details(page, manga_id)
-                page.close()
-                browser.close()
-                
-                if details:
-                    details['cached'] = False
-                    # Save to preloaded data in background
-                    threading.Thread(
-                        target=self._save_manga_details_async, 
-                        args=(details, source), 
-                        daemon=True
-                    ).start()
-                
-                return details
+            source_module = self.sources.get(source)
+            if not source_module:
+                return None
+            
+            details = browser_pool.call(source_module, 'get_details', manga_id)
+            
+            if details:
+                details['cached'] = False
+                # Save to preloaded data in background
+                threading.Thread(
+                    target=self._save_manga_details_async, 
+                    args=(details, source), 
+                    daemon=True
+                ).start()
+            
+            return details
                 
         except Exception as e:
             logger.error(f"Failed to scrape manga details: {e}")
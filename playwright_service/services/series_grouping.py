@@ -0,0 +1,277 @@
+import os
+import re
+import copy
+import threading
+import concurrent.futures
+from typing import Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sources in order of how quickly they serve details: MangaDex is a JSON API,
+# WeebCentral has an HTTP fast path, AsuraScans needs a browser
+SOURCE_PREFERENCE = [
+    source.strip() for source in
+    os.getenv('SERIES_SOURCE_PREFERENCE', 'mangadex,weebcentral,asurascans').split(',') if source.strip()
+]
+
+# Trigram Jaccard two series keys from different sources need to count as the same series
+FUZZY_SAME_SERIES = float(os.getenv('SERIES_FUZZY_THRESHOLD', 0.8))
+
+_APOSTROPHES = re.compile(r"['\u2019]")
+_BRACKETED = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+_NON_WORD = re.compile(r'[\W_]+')
+
+def series_key(title: Optional[str]) -> str:
+    """Canonical key for a title: lowercase words without brackets, punctuation or a leading 'the'"""
+    if not title:
+        return ''
+    key = _NON_WORD.sub(' ', _BRACKETED.sub(' ', _APOSTROPHES.sub('', title.lower()))).strip()
+    if key.startswith('the '):
+        key = key[4:]
+    return key or title.lower().strip()
+
+def _trigrams(key: str) -> frozenset:
+    padded = f' {key} '
+    return frozenset(zip(padded, padded[1:], padded[2:]))
+
+def _author_key(author: Optional[str]) -> str:
+    return _NON_WORD.sub('', author.lower()) if author and author.lower() != 'unknown author' else ''
+
+def _source_rank(source: str) -> int:
+    return SOURCE_PREFERENCE.index(source) if source in SOURCE_PREFERENCE else len(SOURCE_PREFERENCE)
+
+class SeriesGrouper:
+    """Clusters search results from different sources into canonical series.
+
+    Results join a cluster when they share a series key (title or any alt
+    title), when the mapping tables already link them, or when titles from
+    different sources are near-identical and their authors do not disagree.
+    The pairwise title comparison only involves listings the mapping tables
+    don't know yet, so repeat searches reuse the persisted clustering.
+    Each group is shaped like a search result of its preferred (fastest)
+    source plus a ``sources`` list, so clients can render it as one card and
+    fetch details from a single source.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # details_url -> canonical series id, mirrored from series_source_links
+        self._links: Dict[str, int] = {}
+        self._series_ids: Dict[str, int] = {}
+        # details_urls handed to the background writer but not yet persisted
+        self._queued: Set[str] = set()
+        self._writer = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='series-persist')
+        self.stats = {
+            'grouped_results': 0,
+            'groups': 0,
+            'fuzzy_comparisons': 0,
+            'links_persisted': 0
+        }
+
+    def group(self, results: List[Dict]) -> List[Dict]:
+        """Group results (already in relevance order); groups keep the order of their best member"""
+        parent = list(range(len(results)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        keys = [self._keys(result) for result in results]
+        seen_keys: Dict[str, int] = {}
+        seen_series: Dict[int, int] = {}
+        with self._lock:
+            known = [self._links.get(result.get('details_url')) for result in results]
+        for i, result_keys in enumerate(keys):
+            for key in result_keys:
+                if key in seen_keys:
+                    union(i, seen_keys[key])
+                else:
+                    seen_keys[key] = i
+            if known[i] is not None:
+                if known[i] in seen_series:
+                    union(i, seen_series[known[i]])
+                else:
+                    seen_series[known[i]] = i
+
+        # Near-identical titles listed by different sources; two listings
+        # that are both already linked were settled when they were persisted
+        grams = [_trigrams(result_keys[0]) if result_keys else frozenset() for result_keys in keys]
+        comparisons = 0
+        for i in (i for i in range(len(results)) if known[i] is None):
+            result = results[i]
+            for j in range(len(results)):
+                if (j == i or (known[j] is None and j < i)
+                        or results[j].get('source') == result.get('source') or find(i) == find(j)):
+                    continue
+                comparisons += 1
+                shared = len(grams[i] & grams[j])
+                if (shared and shared / (len(grams[i]) + len(grams[j]) - shared) >= FUZZY_SAME_SERIES
+                        and self._authors_agree(result, results[j])):
+                    union(i, j)
+
+        clusters: Dict[int, List[int]] = {}
+        for i in range(len(results)):
+            clusters.setdefault(find(i), []).append(i)
+
+        groups = []
+        for root in sorted(clusters):
+            members = [results[i] for i in clusters[root]]
+            series_id = next((known[i] for i in clusters[root] if known[i] is not None), None)
+            groups.append(self._make_group(members, keys[root][0] if keys[root] else '', series_id))
+
+        self.stats['grouped_results'] += len(results)
+        self.stats['groups'] += len(groups)
+        self.stats['fuzzy_comparisons'] += comparisons
+        return groups
+
+    @staticmethod
+    def _keys(result: Dict) -> List[str]:
+        keys = [series_key(result.get('title'))]
+        keys.extend(series_key(alt) for alt in result.get('alt_titles') or [])
+        return [key for key in dict.fromkeys(keys) if key]
+
+    @staticmethod
+    def _authors_agree(a: Dict, b: Dict) -> bool:
+        author_a, author_b = _author_key(a.get('author')), _author_key(b.get('author'))
+        return not author_a or not author_b or author_a == author_b
+
+    @staticmethod
+    def _make_group(members: List[Dict], key: str, series_id: Optional[int]) -> Dict:
+        preferred = min(members, key=lambda member: _source_rank(member.get('source')))
+        group = dict(preferred)
+        group['image'] = preferred.get('image') or next((m['image'] for m in members if m.get('image')), None)
+        group['relevance'] = max((m.get('relevance', 0) for m in members), default=0)
+        group['series_id'] = series_id
+        group['series_key'] = key
+        group['sources'] = [
+            {
+                'source': member.get('source'),
+                'id': member.get('id'),
+                'title': member.get('title'),
+                'details_url': member.get('details_url'),
+                'chapter': member.get('chapter', ''),
+                'status': member.get('status', '')
+            }
+            for member in sorted(members, key=lambda member: _source_rank(member.get('source')))
+        ]
+        return group
+
+    def persist_later(self, groups: List[Dict], app) -> bool:
+        """Queue the groups' new source links for the background writer.
+
+        Returns False without touching the database when every link is
+        already known or queued, which is the common case for repeat searches.
+        """
+        with self._lock:
+            new_urls = {link['details_url'] for group in groups if group['series_key']
+                        for link in group['sources']
+                        if link['details_url'] and link['details_url'] not in self._links
+                        and link['details_url'] not in self._queued}
+            if not new_urls:
+                return False
+            self._queued |= new_urls
+        self._writer.submit(self._persist_in_context, app, copy.deepcopy(groups), new_urls)
+        return True
+
+    def _persist_in_context(self, app, groups: List[Dict], queued_urls: Set[str]) -> None:
+        try:
+            with app.app_context():
+                self.persist(groups)
+        finally:
+            with self._lock:
+                self._queued -= queued_urls
+
+    def persist(self, groups: List[Dict]) -> int:
+        """Record new source links in the mapping tables; returns the number of links added"""
+        with self._lock:
+            pending = [group for group in groups
+                       if group['series_key'] and any(link['details_url'] not in self._links
+                                                      for link in group['sources'] if link['details_url'])]
+        if not pending:
+            return 0
+
+        from models import db, CanonicalSeries, SeriesSourceLink
+        added = 0
+        try:
+            for group in pending:
+                series_id = group['series_id'] or self._series_ids.get(group['series_key'])
+                if series_id is None:
+                    series = CanonicalSeries.query.filter_by(series_key=group['series_key']).first()
+                    if series is None:
+                        series = CanonicalSeries(series_key=group['series_key'], title=group['title'],
+                                                 author=group.get('author'))
+                        db.session.add(series)
+                        db.session.flush()
+                    series_id = series.id
+                for link in group['sources']:
+                    if not link['details_url'] or link['details_url'] in self._links:
+                        continue
+                    db.session.add(SeriesSourceLink(series_id=series_id, source=link['source'],
+                                                    manga_id=str(link['id']), details_url=link['details_url'],
+                                                    title=link['title']))
+                    added += 1
+                group['series_id'] = series_id
+            db.session.commit()
+        except Exception as e:
+            logger.error(f"Failed to persist series links: {e}")
+            db.session.rollback()
+            return 0
+
+        with self._lock:
+            for group in pending:
+                self._series_ids[group['series_key']] = group['series_id']
+                for link in group['sources']:
+                    if link['details_url']:
+                        self._links.setdefault(link['details_url'], group['series_id'])
+            self.stats['links_persisted'] += added
+        return added
+
+    def load_from_db(self) -> int:
+        """Load the persisted mapping so known listings group without recomputation"""
+        from models import db, CanonicalSeries, SeriesSourceLink
+        rows = db.session.query(SeriesSourceLink.details_url, SeriesSourceLink.series_id).all()
+        series = db.session.query(CanonicalSeries.series_key, CanonicalSeries.id).all()
+        with self._lock:
+            self._links = dict(rows)
+            self._series_ids = dict(series)
+        logger.info(f"Loaded {len(rows)} series links for {len(series)} canonical series")
+        return len(rows)
+
+    def get_series(self, series_id: int) -> Optional[Dict]:
+        """A canonical series with its source links, fastest source first"""
+        from models import db, CanonicalSeries
+        series = db.session.get(CanonicalSeries, series_id)
+        if series is None:
+            return None
+        links = sorted(series.links, key=lambda link: _source_rank(link.source))
+        return {
+            'series_id': series.id,
+            'title': series.title,
+            'author': series.author,
+            'preferred': {'source': links[0].source, 'id': links[0].manga_id} if links else None,
+            'sources': [
+                {'source': link.source, 'id': link.manga_id, 'title': link.title, 'details_url': link.details_url}
+                for link in links
+            ]
+        }
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'known_links': len(self._links),
+                'known_series': len(self._series_ids),
+                'queued_links': len(self._queued),
+                'source_preference': SOURCE_PREFERENCE
+            }
+
+# Global series grouper instance
+series_grouper = SeriesGrouper()
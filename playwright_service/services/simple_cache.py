@@ -1,22 +1,50 @@
+import os
 import json
 import time
 import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 class SimpleCache:
-    """Simple in-memory cache with TTL for manga search results"""
+    """Simple in-memory cache with TTL for manga search results.
+
+    Entries younger than ``ttl_hours`` are fresh. Entries between ``ttl_hours``
+    (soft TTL) and ``stale_ttl_hours`` (hard TTL) are stale: ``get`` treats them
+    as misses, but ``get_stale_while_revalidate`` serves them immediately and
+    refreshes them in the background. Entries past the hard TTL are dropped.
+
+    The cache is bounded by ``max_entries`` and ``max_bytes`` (approximate JSON
+    size of the cached data); when either bound is exceeded the least recently
+    used entries are evicted.
+    """
     
-    def __init__(self, ttl_hours: int = 6):
-        self.cache = {}
+    def __init__(self, ttl_hours: int = 6, stale_ttl_hours: Optional[int] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.cache = OrderedDict()  # Ordered from least to most recently used
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
         self.ttl_seconds = ttl_hours * 60 * 60
+        self.stale_ttl_seconds = max(stale_ttl_hours or ttl_hours, ttl_hours) * 60 * 60
         self.lock = threading.Lock()
         self.cleanup_interval = 3600  # Cleanup every hour
         self.last_cleanup = time.time()
         
+        # Keys with a background refresh in progress
+        self.refreshing = set()
+        self.refresh_count = 0
+        
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
         # Start cleanup thread
         self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         self.cleanup_thread.start()
@@ -26,56 +54,159 @@ class SimpleCache:
         with self.lock:
             if key in self.cache:
                 entry = self.cache[key]
-                if time.time() - entry['timestamp'] < self.ttl_seconds:
+                age = time.time() - entry['timestamp']
+                if age < self.ttl_seconds:
+                    self.cache.move_to_end(key)
+                    self.hits += 1
                     logger.debug(f"Cache HIT for key: {key}")
                     return entry['data']
-                else:
-                    # Expired, remove it
-                    del self.cache[key]
+                elif age >= self.stale_ttl_seconds:
+                    # Past the hard TTL, remove it
+                    self._remove(key)
+                    self.expirations += 1
                     logger.debug(f"Cache EXPIRED for key: {key}")
+                else:
+                    logger.debug(f"Cache STALE for key: {key}")
             
+            self.misses += 1
             logger.debug(f"Cache MISS for key: {key}")
             return None
     
+    def peek(self, key: str) -> Optional[Any]:
+        """Get cached data regardless of age, without touching LRU order or counters"""
+        with self.lock:
+            entry = self.cache.get(key)
+            return entry['data'] if entry is not None else None
+    
+    def get_stale_while_revalidate(self, key: str, refresh: Callable[[], Any]) -> Optional[Any]:
+        """
+        Get value from cache, serving stale entries while they are refreshed
+        
+        Args:
+            key: Cache key
+            refresh: Called in a background thread to rebuild a stale entry;
+                its return value replaces the cached data
+            
+        Returns:
+            Fresh or stale cached data, or None if missing or past the hard TTL
+        """
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                logger.debug(f"Cache MISS for key: {key}")
+                return None
+            
+            age = time.time() - entry['timestamp']
+            if age >= self.stale_ttl_seconds:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                logger.debug(f"Cache EXPIRED for key: {key}")
+                return None
+            
+            self.cache.move_to_end(key)
+            if age < self.ttl_seconds:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if key not in self.refreshing:
+                    # Only one background refresh per key at a time
+                    self.refreshing.add(key)
+                    threading.Thread(target=self._refresh, args=(key, refresh), daemon=True).start()
+                    logger.debug(f"Cache STALE for key: {key} - refreshing in background")
+            
+            return entry['data']
+    
+    def _refresh(self, key: str, refresh: Callable[[], Any]) -> None:
+        """Rebuild a stale entry, keeping the stale data if the refresh fails"""
+        try:
+            data = refresh()
+            if data:
+                self.set(key, data)
+                with self.lock:
+                    self.refresh_count += 1
+        except Exception as e:
+            logger.error(f"Cache refresh failed for key {key}: {e}")
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+    
     def set(self, key: str, data: Any) -> None:
-        """Set value in cache with current timestamp"""
+        """Set value in cache with current timestamp, evicting LRU entries if over bounds"""
+        size = self._estimate_size(data)
         with self.lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                logger.warning(f"Cache SKIP for key: {key} - {size} bytes exceeds max_bytes")
+                return
             self.cache[key] = {
                 'data': data,
-                'timestamp': time.time()
+                'timestamp': time.time(),
+                'size': size
             }
+            self.total_bytes += size
+            self._evict()
             logger.debug(f"Cache SET for key: {key}")
     
     def delete(self, key: str) -> None:
         """Delete key from cache"""
         with self.lock:
-            if key in self.cache:
-                del self.cache[key]
+            if self._remove(key):
                 logger.debug(f"Cache DELETE for key: {key}")
     
     def clear(self) -> None:
         """Clear all cache entries"""
         with self.lock:
             self.cache.clear()
+            self.total_bytes = 0
             logger.info("Cache cleared")
     
+    def _remove(self, key: str) -> bool:
+        """Remove an entry and its size accounting (caller holds the lock)"""
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return False
+        self.total_bytes -= entry.get('size', 0)
+        return True
+    
+    def _evict(self) -> None:
+        """Evict least recently used entries until within bounds (caller holds the lock)"""
+        while self.cache and (
+            (self.max_entries is not None and len(self.cache) > self.max_entries) or
+            (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            key, entry = self.cache.popitem(last=False)
+            self.total_bytes -= entry.get('size', 0)
+            self.evictions += 1
+            logger.debug(f"Cache EVICT for key: {key}")
+    
+    @staticmethod
+    def _estimate_size(data: Any) -> int:
+        """Approximate memory footprint of cached data via its JSON length"""
+        try:
+            return len(json.dumps(data, default=str))
+        except (TypeError, ValueError):
+            return len(repr(data))
+    
     def size(self) -> int:
         """Get number of cache entries"""
         with self.lock:
             return len(self.cache)
     
     def _cleanup_expired(self) -> None:
-        """Remove expired entries from cache"""
+        """Remove entries past the hard TTL from cache"""
         current_time = time.time()
         expired_keys = []
         
         with self.lock:
             for key, entry in self.cache.items():
-                if current_time - entry['timestamp'] >= self.ttl_seconds:
+                if current_time - entry['timestamp'] >= self.stale_ttl_seconds:
                     expired_keys.append(key)
             
             for key in expired_keys:
-                del self.cache[key]
+                self._remove(key)
+            self.expirations += len(expired_keys)
         
         if expired_keys:
             logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
@@ -99,17 +230,36 @@ class SimpleCache:
         with self.lock:
             current_time = time.time()
             total_entries = len(self.cache)
-            expired_entries = sum(
-                1 for entry in self.cache.values()
-                if current_time - entry['timestamp'] >= self.ttl_seconds
-            )
+            ages = [current_time - entry['timestamp'] for entry in self.cache.values()]
+            expired_entries = sum(1 for age in ages if age >= self.stale_ttl_seconds)
+            stale_entries = sum(1 for age in ages if self.ttl_seconds <= age < self.stale_ttl_seconds)
+            
+            lookups = self.hits + self.stale_hits + self.misses
             
             return {
                 'total_entries': total_entries,
                 'expired_entries': expired_entries,
-                'valid_entries': total_entries - expired_entries,
-                'ttl_hours': self.ttl_seconds / 3600
+                'stale_entries': stale_entries,
+                'valid_entries': total_entries - expired_entries - stale_entries,
+                'refreshing': len(self.refreshing),
+                'background_refreshes': self.refresh_count,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': f"{(self.hits + self.stale_hits) / lookups:.2%}" if lookups else "0.00%",
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'approx_bytes': self.total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl_hours': self.ttl_seconds / 3600,
+                'stale_ttl_hours': self.stale_ttl_seconds / 3600
             }
 
-# Global cache instance
-search_cache = SimpleCache(ttl_hours=6) 
\ No newline at end of file
+# Global cache instance, bounded for predictable memory use on small containers
+search_cache = SimpleCache(
+    ttl_hours=6,
+    stale_ttl_hours=24,
+    max_entries=int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', 2000)),
+    max_bytes=int(os.getenv('SEARCH_CACHE_MAX_MB', 64)) * 1024 * 1024
+) 
\ No newline at end of file
@@ -1,19 +1,35 @@
 import os
 import sys
 import time
+import functools
+import threading
 import concurrent.futures
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
-from playwright.sync_api import sync_playwright
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sources import weebcentral, asurascans, mangadex
 from services.simple_cache import search_cache
+from services.async_engine import scrape_engine
+from services.single_flight import single_flight
+from services.readiness import readiness
+from services.local_index import local_index, LOCAL_INDEX_MIN_RESULTS
+from services.ranking import rank
 
 logger = logging.getLogger(__name__)
 
+# Error value reported for a source that missed its search deadline
+SOURCE_TIMED_OUT = 'timed_out'
+
+# Seconds a fresh search waits for each source before answering without it
+DEFAULT_SOURCE_DEADLINES = {
+    'weebcentral': float(os.getenv('SEARCH_DEADLINE_WEEBCENTRAL', 8)),
+    'asurascans': float(os.getenv('SEARCH_DEADLINE_ASURASCANS', 12)),
+    'mangadex': float(os.getenv('SEARCH_DEADLINE_MANGADEX', 6))
+}
+
 class SimpleSearchService:
     """Simplified search service using TTL cache instead of complex preloader"""
     
@@ -23,16 +39,24 @@ class SimpleSearchService:
             'asurascans': asurascans,
             'mangadex': mangadex
         }
+        self.source_deadlines = dict(DEFAULT_SOURCE_DEADLINES)
+        
+        # Serializes merging late source results into cached searches
+        self._merge_lock = threading.Lock()
         
         # Performance metrics
         self.metrics = {
             'cache_hits': 0,
             'cache_misses': 0,
             'total_searches': 0,
-            'avg_search_time': 0.0
+            'avg_search_time': 0.0,
+            'source_timeouts': 0,
+            'late_results_merged': 0,
+            'local_hits': 0
         }
     
-    def search(self, query: str, sources: Optional[List[str]] = None, force_refresh: bool = False) -> List[Dict]:
+    def search(self, query: str, sources: Optional[List[str]] = None, force_refresh: bool = False,
+               top_k: Optional[int] = None) -> List[Dict]:
         """
         Search for manga with simple TTL caching
         
@@ -40,9 +64,26 @@ class SimpleSearchService:
             query: Search query string
             sources: List of sources to search (defaults to all)
             force_refresh: Force scraping instead of using cache
+            top_k: Return only the ``top_k`` most relevant results
             
         Returns:
-            List of manga results with cache info
+            List of manga results with cache info, most relevant first
+        """
+        return self.search_with_status(query, sources, force_refresh, top_k)['results']
+    
+    def search_with_status(self, query: str, sources: Optional[List[str]] = None,
+                           force_refresh: bool = False, top_k: Optional[int] = None) -> Dict:
+        """
+        Search for manga, answering within the per-source deadlines
+        
+        Results from all sources are merged and ordered by relevance to the
+        query. Sources that miss their deadline are left out of ``results`` and
+        listed in ``timed_out``; their results are merged into the cache when
+        they arrive, so the next request for the same query gets them.
+        
+        Returns:
+            Dict with ``results``, ``cached``, ``timed_out`` (source names) and
+            ``local`` (answered from the local title index)
         """
         start_time = time.time()
         self.metrics['total_searches'] += 1
@@ -53,87 +94,250 @@ class SimpleSearchService:
         # Create cache key
         cache_key = f"search:{query.lower().strip()}:{','.join(sorted(sources))}"
         
-        # Check cache first (unless force refresh)
+        # Check cache first (unless force refresh); stale entries are served
+        # immediately while a background scrape refreshes them
         if not force_refresh:
-            cached_results = search_cache.get(cache_key)
+            cached_results = search_cache.get_stale_while_revalidate(
+                cache_key, functools.partial(self._scrape_search, query, sources, None)
+            )
             if cached_results and isinstance(cached_results, list):
                 self.metrics['cache_hits'] += 1
                 search_time = time.time() - start_time
                 self._update_avg_time(search_time)
                 
                 logger.info(f"Cache HIT for '{query}' - {len(cached_results)} results in {search_time:.2f}s")
-                return self._add_cache_info(cached_results, True)
+                return {'results': self._add_cache_info(cached_results[:top_k], True), 'cached': True,
+                        'timed_out': [], 'local': False}
+            
+            # Enough preloaded titles match - answer without scraping
+            local_results = self._search_local(query, sources)
+            if local_results:
+                self._update_avg_time(time.time() - start_time)
+                return {'results': local_results[:top_k], 'cached': True, 'timed_out': [], 'local': True}
         
         # Cache miss - scrape fresh data
         self.metrics['cache_misses'] += 1
         logger.info(f"Cache MISS for '{query}' - scraping fresh data")
         
-        fresh_results = self._scrape_search(query, sources)
-        
-        # Cache the results for 6 hours
-        search_cache.set(cache_key, fresh_results)
+        # Concurrent identical misses share a single scrape
+        fresh_results, timed_out = single_flight.do(cache_key, self._scrape_and_cache, cache_key, query, sources)
         
         search_time = time.time() - start_time
         self._update_avg_time(search_time)
         
-        logger.info(f"Fresh search for '{query}' - {len(fresh_results)} results in {search_time:.2f}s")
-        return self._add_cache_info(fresh_results, False)
+        logger.info(f"Fresh search for '{query}' - {len(fresh_results)} results in {search_time:.2f}s"
+                    + (f" (timed out: {', '.join(timed_out)})" if timed_out else ""))
+        return {'results': self._add_cache_info(fresh_results[:top_k], False), 'cached': False,
+                'timed_out': timed_out, 'local': False}
+    
+    def _scrape_and_cache(self, cache_key: str, query: str, sources: List[str]) -> Tuple[List[Dict], List[str]]:
+        """Scrape fresh results within the deadlines and cache them for 6 hours"""
+        fresh_results = []
+        timed_out = []
+        late_futures = {}
+        for source, results, error in self._iter_source_results(query, sources, self.source_deadlines, late_futures):
+            if error == SOURCE_TIMED_OUT:
+                timed_out.append(source)
+            fresh_results.extend(results)
+        
+        fresh_results = rank(query, fresh_results)
+        search_cache.set(cache_key, fresh_results)
+        self._cache_late_results(cache_key, query, late_futures)
+        return fresh_results, timed_out
+    
+    def search_stream(self, query: str, sources: Optional[List[str]] = None,
+                      force_refresh: bool = False) -> Iterator[Dict]:
+        """
+        Search for manga, yielding each source's results as soon as it finishes
+        
+        Frames are dicts with a ``type`` of ``results`` (one per source, or one
+        for a cache hit), ``error`` (a source failed), ``timeout`` (a source
+        missed its deadline) and a final ``summary``. The combined fresh
+        results are cached just like ``search``.
+        """
+        start_time = time.time()
+        self.metrics['total_searches'] += 1
+        
+        if sources is None:
+            sources = list(self.sources.keys())
+        
+        cache_key = f"search:{query.lower().strip()}:{','.join(sorted(sources))}"
+        
+        if not force_refresh:
+            cached_results = search_cache.get_stale_while_revalidate(
+                cache_key, functools.partial(self._scrape_search, query, sources, None)
+            )
+            if cached_results and isinstance(cached_results, list):
+                self.metrics['cache_hits'] += 1
+                self._update_avg_time(time.time() - start_time)
+                yield {'type': 'results', 'source': None, 'results': self._add_cache_info(cached_results, True)}
+                yield {'type': 'summary', 'total': len(cached_results), 'cached': True,
+                       'elapsed': round(time.time() - start_time, 3)}
+                return
+            
+            local_results = self._search_local(query, sources)
+            if local_results:
+                self._update_avg_time(time.time() - start_time)
+                yield {'type': 'results', 'source': None, 'results': local_results}
+                yield {'type': 'summary', 'total': len(local_results), 'cached': True, 'local': True,
+                       'elapsed': round(time.time() - start_time, 3)}
+                return
+        
+        self.metrics['cache_misses'] += 1
+        logger.info(f"Cache MISS for '{query}' - streaming fresh data")
+        
+        all_results = []
+        completed_sources = []
+        failed_sources = []
+        timed_out = []
+        late_futures = {}
+        for source, results, error in self._iter_source_results(query, sources, self.source_deadlines, late_futures):
+            if error == SOURCE_TIMED_OUT:
+                timed_out.append(source)
+                yield {'type': 'timeout', 'source': source}
+                continue
+            if error:
+                failed_sources.append(source)
+                yield {'type': 'error', 'source': source, 'error': error}
+                continue
+            completed_sources.append(source)
+            all_results.extend(results)
+            yield {'type': 'results', 'source': source, 'results': results,
+                   'elapsed': round(time.time() - start_time, 3)}
+        
+        # Frames arrive per source; the cached copy is ranked across sources
+        search_cache.set(cache_key, rank(query, list(all_results)))
+        self._cache_late_results(cache_key, query, late_futures)
+        self._update_avg_time(time.time() - start_time)
+        
+        yield {
+            'type': 'summary',
+            'total': len(all_results),
+            'cached': False,
+            'sources': completed_sources,
+            'failed_sources': failed_sources,
+            'timed_out': timed_out,
+            'elapsed': round(time.time() - start_time, 3)
+        }
+    
+    def _search_local(self, query: str, sources: List[str]) -> Optional[List[Dict]]:
+        """Ranked results from the in-memory title index, or None when too few titles match
+
+        Only prefix and substring hits count toward LOCAL_INDEX_MIN_RESULTS;
+        fuzzy matches are served alongside them but never skip the scrape.
+        """
+        results = local_index.search(query, sources, limit=max(LOCAL_INDEX_MIN_RESULTS, 20))
+        if sum(result['match'] != 'fuzzy' for result in results) < LOCAL_INDEX_MIN_RESULTS:
+            return None
+        self.metrics['local_hits'] += 1
+        logger.info(f"Local index answered '{query}' with {len(results)} results")
+        return rank(query, results)
     
-    def _scrape_search(self, query: str, sources: List[str]) -> List[Dict]:
-        """Scrape search results from sources"""
+    def _scrape_search(self, query: str, sources: List[str],
+                       deadlines: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """Scrape search results from sources concurrently on the async engine"""
         all_results = []
+        for source, results, error in self._iter_source_results(query, sources, deadlines):
+            if results:
+                all_results.extend(results)
+        return rank(query, all_results)
+    
+    def _iter_source_results(self, query: str, sources: List[str],
+                             deadlines: Optional[Dict[str, float]] = None,
+                             late_futures: Optional[Dict[str, concurrent.futures.Future]] = None
+                             ) -> Iterator[Tuple[str, List[Dict], Optional[str]]]:
+        """
+        Yield ``(source, results, error)`` as each source's scrape completes
+        
+        With ``deadlines``, a source still running past its deadline is yielded
+        with ``SOURCE_TIMED_OUT`` as the error and its future is left running
+        and recorded in ``late_futures``. Without them every source is awaited.
+        """
+        pending = {
+            scrape_engine.search(source, query): source
+            for source in sources if source in self.sources
+        }
+        started = time.monotonic()
         
-        # Use ThreadPoolExecutor for parallel scraping
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(sources)) as executor:
-            future_to_source = {}
+        while pending:
+            timeout = None
+            if deadlines is not None:
+                elapsed = time.monotonic() - started
+                timeout = max(0.0, min(self._deadline(deadlines, source) - elapsed for source in pending.values()))
             
-            for source in sources:
-                if source in self.sources:
-                    future = executor.submit(self._scrape_source, query, source)
-                    future_to_source[future] = source
+            done, _ = concurrent.futures.wait(pending, timeout=timeout,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
             
-            # Collect results
-            for future in concurrent.futures.as_completed(future_to_source):
-                source = future_to_source[future]
+            # Collect results as each source finishes
+            for future in done:
+                source = pending.pop(future)
                 try:
-                    results = future.result()
-                    if results:
-                        all_results.extend(results)
-                        logger.debug(f"Got {len(results)} results from {source}")
+                    results = self._tag_results(source, future.result())
+                    logger.debug(f"Got {len(results)} results from {source}")
+                    yield source, results, None
                 except Exception as e:
                     logger.error(f"Error scraping {source}: {e}")
-        
-        return all_results
+                    yield source, [], str(e)
+            
+            if deadlines is None:
+                continue
+            
+            # Give up on sources past their deadline; their scrape keeps running
+            elapsed = time.monotonic() - started
+            for future, source in list(pending.items()):
+                if not future.done() and elapsed >= self._deadline(deadlines, source):
+                    del pending[future]
+                    self.metrics['source_timeouts'] += 1
+                    if late_futures is not None:
+                        late_futures[source] = future
+                    logger.warning(f"Search on {source} missed its {self._deadline(deadlines, source):.1f}s deadline")
+                    yield source, [], SOURCE_TIMED_OUT
+    
+    @staticmethod
+    def _deadline(deadlines: Dict[str, float], source: str) -> float:
+        return deadlines.get(source, max(deadlines.values(), default=10.0))
+    
+    @staticmethod
+    def _tag_results(source: str, results: Optional[List[Dict]]) -> List[Dict]:
+        """Add source information to freshly scraped results"""
+        results = results or []
+        for result in results:
+            result['source'] = source
+            result['cached'] = False
+        return results
+    
+    def _cache_late_results(self, cache_key: str, query: str,
+                            late_futures: Dict[str, concurrent.futures.Future]) -> None:
+        """Merge results of timed-out sources into the cached search once they arrive"""
+        for source, future in late_futures.items():
+            future.add_done_callback(functools.partial(self._merge_late_result, cache_key, query, source))
     
-    def _scrape_source(self, query: str, source: str) -> List[Dict]:
-        """Scrape a single source"""
+    def _merge_late_result(self, cache_key: str, query: str, source: str,
+                           future: concurrent.futures.Future) -> None:
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
-                
-                source_module = self.sources[source]
-                results = source_module.search(page, query)
-                
-                # Add source information to results
-                for result in results:
-                    result['source'] = source
-                    result['cached'] = False
-                
-                browser.close()
-                return results
-                
+            results = self._tag_results(source, future.result())
         except Exception as e:
-            logger.error(f"Failed to scrape {source}: {e}")
-            return []
+            logger.warning(f"Late search on {source} failed: {e}")
+            return
+        if not results:
+            return
+        
+        with self._merge_lock:
+            cached = search_cache.peek(cache_key) or []
+            merged = [r for r in cached if r.get('source') != source] + results
+            search_cache.set(cache_key, rank(query, merged))
+            self.metrics['late_results_merged'] += 1
+        logger.info(f"Merged {len(results)} late results from {source} into {cache_key}")
     
     def _add_cache_info(self, results: List[Dict], from_cache: bool) -> List[Dict]:
-        """Add cache information to results"""
-        for result in results:
-            result['cached'] = from_cache
-            result['cache_timestamp'] = int(time.time()) if from_cache else None
-        
-        return results
+        """Return copies of results annotated with cache information
+
+        Results are shared with the search cache and other in-flight callers,
+        so they are never modified in place. No per-serve timestamp is added,
+        so repeat responses for the same results are byte-identical and keep
+        their ETag.
+        """
+        return [{**result, 'cached': from_cache} for result in results]
     
     def _update_avg_time(self, search_time: float) -> None:
         """Update average search time metric"""
@@ -155,7 +359,16 @@ class SimpleSearchService:
             'cache_misses': self.metrics['cache_misses'],
             'cache_hit_rate': f"{cache_hit_rate:.2%}",
             'avg_search_time': f"{self.metrics['avg_search_time']:.2f}s",
-            'cache_stats': search_cache.get_stats()
+            'source_timeouts': self.metrics['source_timeouts'],
+            'late_results_merged': self.metrics['late_results_merged'],
+            'local_hits': self.metrics['local_hits'],
+            'local_index': local_index.get_stats(),
+            'source_deadlines': self.source_deadlines,
+            'cache_stats': search_cache.get_stats(),
+            'scrape_engine': scrape_engine.get_stats(),
+            'single_flight': single_flight.get_stats(),
+            'readiness': readiness.get_stats(),
+            'mangadex_client': mangadex.client.get_stats()
         }
     
     def clear_cache(self) -> None:
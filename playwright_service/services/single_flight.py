@@ -0,0 +1,77 @@
+import copy
+import threading
+import concurrent.futures
+from typing import Any, Callable, Dict
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesces concurrent identical requests into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still in flight wait for it and receive its exception or their own
+    deep copy of its result, so callers may annotate what they get back
+    without seeing each other's edits. The leader keeps the original, so an
+    uncontended call copies nothing. Once the call finishes the key is
+    released, so later requests go back to the cache as usual.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+        self._waiters: Dict[str, int] = {}
+        self.stats = {
+            'executions': 0,
+            'coalesced': 0
+        }
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` once per key across concurrent callers"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._calls[key] = future
+                self._waiters[key] = 0
+                self.stats['executions'] += 1
+            else:
+                self._waiters[key] += 1
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            logger.debug(f"Single-flight JOIN for key: {key}")
+            return future.result().pop()
+
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._release(key)
+            future.set_exception(e)
+            raise
+        # Waiters' copies are made before the leader can start editing its result
+        waiters = self._release(key)
+        future.set_result([copy.deepcopy(result) for _ in range(waiters)])
+        return result
+
+    def _release(self, key: str) -> int:
+        """Release ``key`` so later callers start a new call; returns how many callers joined"""
+        with self._lock:
+            self._calls.pop(key, None)
+            return self._waiters.pop(key, 0)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being executed"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        return {
+            **self.stats,
+            'in_flight': self.in_flight()
+        }
+
+# Global single-flight instance shared by search, details and chapter lookups
+single_flight = SingleFlight()
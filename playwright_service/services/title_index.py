@@ -0,0 +1,206 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+from sqlalchemy import bindparam, text
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'preloaded_manga_fts'
+
+# Popularity boosts relevance by up to POPULARITY_WEIGHT * POPULARITY_CAP (2x by default)
+POPULARITY_WEIGHT = float(os.getenv('TITLE_INDEX_POPULARITY_WEIGHT', 0.01))
+POPULARITY_CAP = int(os.getenv('TITLE_INDEX_POPULARITY_CAP', 100))
+
+# Titles that don't contain the query need this share of its trigrams to count as a match
+MIN_TRIGRAM_OVERLAP = float(os.getenv('TITLE_INDEX_MIN_OVERLAP', 0.6))
+
+# Trigram candidates fetched per requested result before the overlap filter
+CANDIDATE_FACTOR = 4
+
+SQLITE_SCHEMA = [
+    # External-content FTS5 table: stores only the trigram index, rows live in preloaded_manga
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(normalized_title, content='preloaded_manga', content_rowid='id', tokenize='trigram')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON preloaded_manga BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, normalized_title) VALUES (new.id, new.normalized_title);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON preloaded_manga BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, normalized_title) VALUES ('delete', old.id, old.normalized_title);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF normalized_title ON preloaded_manga BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, normalized_title) VALUES ('delete', old.id, old.normalized_title);
+        INSERT INTO {FTS_TABLE}(rowid, normalized_title) VALUES (new.id, new.normalized_title);
+    END""",
+]
+
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # GIN trigram index serves both LIKE '%q%' and the % similarity operator
+    """CREATE INDEX IF NOT EXISTS idx_preloaded_manga_title_trgm
+        ON preloaded_manga USING gin (normalized_title gin_trgm_ops)""",
+    # Dropped from earlier installs; no query used it
+    "DROP INDEX IF EXISTS idx_preloaded_manga_title_tsv",
+]
+
+def trigrams(value: str) -> List[str]:
+    """Distinct 3-character substrings of ``value`` in order of appearance"""
+    seen = []
+    for i in range(len(value) - 2):
+        gram = value[i:i + 3]
+        if gram not in seen:
+            seen.append(gram)
+    return seen
+
+def fts_match_expression(normalized_query: str) -> str:
+    """FTS5 query matching any trigram of the query; bm25 ranks titles sharing more of them first.
+
+    This only selects candidates: ``is_match`` drops titles that share too few
+    trigrams with the query.
+    """
+    return ' OR '.join('"' + gram.replace('"', '""') + '"' for gram in trigrams(normalized_query))
+
+def trigram_overlap(normalized_query: str, normalized_title: str) -> float:
+    """Share of the query's trigrams that also occur in the title"""
+    query_grams = trigrams(normalized_query)
+    if not query_grams:
+        return 0.0
+    title_grams = set(trigrams(normalized_title))
+    return sum(gram in title_grams for gram in query_grams) / len(query_grams)
+
+def is_match(normalized_query: str, normalized_title: Optional[str]) -> bool:
+    """Whether a title is a substring hit or close enough to the query to count as a result
+
+    Queries of one or two trigrams effectively need all of them, so short
+    queries never match on a single shared trigram.
+    """
+    title = normalized_title or ''
+    return normalized_query in title or trigram_overlap(normalized_query, title) >= MIN_TRIGRAM_OVERLAP
+
+def like_pattern(normalized_query: str) -> str:
+    escaped = normalized_query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+SQLITE_TRIGRAM_SEARCH = text(f"""
+    SELECT m.id, m.normalized_title FROM {FTS_TABLE} f JOIN preloaded_manga m ON m.id = f.rowid
+    WHERE {FTS_TABLE} MATCH :match AND m.source IN :sources AND m.last_updated > :since
+    ORDER BY bm25({FTS_TABLE}) * (1.0 + :weight * MIN(COALESCE(m.popularity, 0), :cap))
+    LIMIT :limit
+""").bindparams(bindparam('sources', expanding=True))
+
+# Queries shorter than a trigram use a range scan on the normalized_title index
+SQLITE_PREFIX_SEARCH = text("""
+    SELECT id FROM preloaded_manga
+    WHERE normalized_title >= :prefix AND normalized_title < :prefix_end
+      AND source IN :sources AND last_updated > :since
+    ORDER BY popularity DESC
+    LIMIT :limit
+""").bindparams(bindparam('sources', expanding=True))
+
+POSTGRES_SEARCH = text("""
+    SELECT id, normalized_title FROM preloaded_manga
+    WHERE (normalized_title LIKE :like ESCAPE '\\' OR normalized_title % :query)
+      AND source IN :sources AND last_updated > :since
+    ORDER BY (normalized_title LIKE :like ESCAPE '\\') DESC,
+             similarity(normalized_title, :query) * (1.0 + :weight * LEAST(COALESCE(popularity, 0), :cap)) DESC
+    LIMIT :limit
+""").bindparams(bindparam('sources', expanding=True))
+
+class TitleIndex:
+    """Database title index over preloaded_manga.
+
+    SQLite gets an FTS5 trigram table kept in sync by triggers; Postgres gets
+    a pg_trgm GIN index, which the database maintains itself.
+    ``search_ids`` returns ids ranked by relevance and popularity, or None when
+    no index is installed so callers can fall back to a LIKE scan. Trigram
+    candidates are kept only if they contain the query or share at least
+    MIN_TRIGRAM_OVERLAP of its trigrams.
+    """
+
+    def __init__(self):
+        self.dialect: Optional[str] = None
+        self.available = False
+        self._lock = threading.Lock()
+        self.stats = {
+            'queries': 0,
+            'fallbacks': 0,
+            'total_ms': 0.0
+        }
+
+    def install(self, engine) -> bool:
+        """Create the index structures for the engine's dialect (idempotent)"""
+        dialect = engine.dialect.name
+        try:
+            with engine.begin() as conn:
+                if dialect == 'sqlite':
+                    self._install_sqlite(conn)
+                elif dialect == 'postgresql':
+                    for statement in POSTGRES_SCHEMA:
+                        conn.execute(text(statement))
+                else:
+                    logger.info(f"No title index for dialect {dialect}; using LIKE scans")
+                    return False
+        except Exception as e:
+            logger.warning(f"Title index unavailable, falling back to LIKE scans: {e}")
+            self.available = False
+            return False
+
+        self.dialect = dialect
+        self.available = True
+        logger.info(f"Title index installed for {dialect}")
+        return True
+
+    def _install_sqlite(self, conn) -> None:
+        existed = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+        ).first() is not None
+        for statement in SQLITE_SCHEMA:
+            conn.execute(text(statement))
+        if not existed:
+            # Index rows that were inserted before the triggers existed
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+    def search_ids(self, session, normalized_query: str, sources: List[str], since: datetime,
+                   limit: int = 50) -> Optional[List[int]]:
+        """Ids of matching titles, best first; None when the index cannot answer"""
+        if not self.available or not normalized_query:
+            with self._lock:
+                self.stats['fallbacks'] += 1
+            return None
+
+        start = time.perf_counter()
+        params = {'sources': list(sources), 'since': since, 'limit': limit,
+                  'weight': POPULARITY_WEIGHT, 'cap': POPULARITY_CAP}
+        if self.dialect != 'postgresql' and len(normalized_query) < 3:
+            params.update(prefix=normalized_query, prefix_end=normalized_query + '\uffff')
+            ids = [row[0] for row in session.execute(SQLITE_PREFIX_SEARCH, params)]
+        else:
+            if self.dialect == 'postgresql':
+                statement = POSTGRES_SEARCH
+                params.update(query=normalized_query, like=like_pattern(normalized_query))
+            else:
+                statement = SQLITE_TRIGRAM_SEARCH
+                params['match'] = fts_match_expression(normalized_query)
+            params['limit'] = limit * CANDIDATE_FACTOR
+            rows = session.execute(statement, params).fetchall()
+            ids = [row[0] for row in rows if is_match(normalized_query, row[1])][:limit]
+        with self._lock:
+            self.stats['queries'] += 1
+            self.stats['total_ms'] += (time.perf_counter() - start) * 1000
+        return ids
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            queries = self.stats['queries']
+            return {
+                'dialect': self.dialect,
+                'available': self.available,
+                'queries': queries,
+                'fallbacks': self.stats['fallbacks'],
+                'avg_ms': self.stats['total_ms'] / queries if queries else 0.0
+            }
+
+# Global title index instance
+title_index = TitleIndex()
@@ -1,6 +1,56 @@
 from playwright.sync_api import Page
+from playwright.async_api import Page as AsyncPage
 import re
-from difflib import SequenceMatcher
+from services.resource_blocking import resource_blocker
+from services.readiness import readiness
+from services.ranking import best_match
+
+# Common ad popup selectors to close
+AD_SELECTORS = [
+    'button[aria-label="Close"]',
+    'button.close',
+    '.close',
+    '[class*="close"]',
+    '[class*="Close"]',
+    '[id*="close"]',
+    '[id*="Close"]',
+    '.modal-close',
+    '.popup-close',
+    '.ad-close',
+    '.overlay-close',
+    'button[class*="dismiss"]',
+    'button[class*="Dismiss"]',
+    '.dismiss',
+    '.Dismiss',
+    '[class*="dismiss"]',
+    '[class*="Dismiss"]',
+    'button[class*="skip"]',
+    'button[class*="Skip"]',
+    '.skip',
+    '.Skip',
+    '[class*="skip"]',
+    '[class*="Skip"]'
+]
+
+# Fallback selectors for search result cards
+ALTERNATIVE_CARD_SELECTORS = [
+    'a[href*="/series/"]',
+    'a[href*="series"]',
+    '[href*="/series/"]',
+    '[href*="series"]'
+]
+
+# Fallback selectors for a card title when the main title span is missing
+ALT_TITLE_SELECTORS = [
+    'span.block',
+    'span',
+    'h3',
+    'h2',
+    'div[class*="title"]',
+    'div[class*="name"]',
+    'img[alt]',
+    '[alt]'
+]
 
 def extract_manga_id_from_url(url):
     # AsuraScans URLs look like series/series-slug or /series/series-slug
@@ -8,174 +58,123 @@ def extract_manga_id_from_url(url):
     return match.group(1) if match else None
 
 def handle_ads_and_popups(page: Page):
-    """Handle common ad popups and overlays that might block content"""
+    """Handle common ad popups and overlays that might block content (call once the page is ready)"""
     try:
-        # Wait a bit for page to load
-        page.wait_for_load_state('networkidle')
-        
-        # Common ad popup selectors to close
-        ad_selectors = [
-            'button[aria-label="Close"]',
-            'button.close',
-            '.close',
-            '[class*="close"]',
-            '[class*="Close"]',
-            '[id*="close"]',
-            '[id*="Close"]',
-            '.modal-close',
-            '.popup-close',
-            '.ad-close',
-            '.overlay-close',
-            'button[class*="dismiss"]',
-            'button[class*="Dismiss"]',
-            '.dismiss',
-            '.Dismiss',
-            '[class*="dismiss"]',
-            '[class*="Dismiss"]',
-            'button[class*="skip"]',
-            'button[class*="Skip"]',
-            '.skip',
-            '.Skip',
-            '[class*="skip"]',
-            '[class*="Skip"]'
-        ]
-        
-        # Try to close any visible popups
-        for selector in ad_selectors:
+        # Ad hosts are blocked at the network layer, so ad overlays never
+        # render; the popup sweep is only needed when blocking is off or the
+        # asurascans profile lets an ad host through
+        if not resource_blocker.blocks_ads('asurascans'):
+            # Try to close any visible popups
+            for selector in AD_SELECTORS:
+                try:
+                    elements = page.query_selector_all(selector)
+                    for element in elements:
+                        if element.is_visible():
+                            element.click()
+                            print(f"AsuraScans: Closed popup with selector: {selector}")
+                            element.wait_for_element_state('hidden', timeout=1000)
+                except Exception as e:
+                    continue
+            
+            # Try to click on the page to dismiss any overlays
             try:
-                elements = page.query_selector_all(selector)
-                for element in elements:
-                    if element.is_visible():
-                        element.click()
-                        print(f"AsuraScans: Closed popup with selector: {selector}")
-                        page.wait_for_timeout(500)  # Wait a bit after closing
-            except Exception as e:
-                continue
-        
-        # Try to click on the page to dismiss any overlays
-        try:
-            page.click('body', position={'x': 100, 'y': 100})
-            page.wait_for_timeout(500)
-        except:
-            pass
+                page.click('body', position={'x': 100, 'y': 100})
+            except:
+                pass
         
         # Handle any remaining overlays by pressing Escape
         try:
             page.keyboard.press('Escape')
-            page.wait_for_timeout(500)
         except:
             pass
             
     except Exception as e:
         print(f"AsuraScans: Error handling ads/popups: {e}")
 
-def fuzzy_best_match(query, results):
-    """Return the result with the highest fuzzy match to the query title."""
-    best_score = 0
-    best_result = None
-    for result in results:
-        title = result.get('title', '')
-        score = SequenceMatcher(None, query.lower(), title.lower()).ratio()
-        if score > best_score:
-            best_score = score
-            best_result = result
-    # Only return if above a reasonable threshold (e.g., 0.7)
-    return best_result if best_score > 0.7 else None
+# Extracts every search card in one round trip (title fallbacks included);
+# ids, URL-based titles and filtering are finished in cards_to_results
+SEARCH_CARDS_JS = r"""
+(cards, altTitleSelectors) => {
+    const text = el => el ? (el.innerText || el.textContent || '').trim() : '';
+    return cards.map(card => {
+        const img = card.querySelector('img');
+        let title = text(card.querySelector('span.text-\\[13\\.3px\\].block'));
+        if (!title) {
+            for (const selector of altTitleSelectors) {
+                const el = card.querySelector(selector);
+                if (!el) continue;
+                const value = (selector === 'img[alt]' || selector === '[alt]') ? el.getAttribute('alt') : text(el);
+                if (value && value.toLowerCase() !== 'none') {
+                    title = value;
+                    break;
+                }
+            }
+        }
+        const chapterSpan = Array.from(card.querySelectorAll('span')).find(span => /Chapter/.test(text(span)));
+        return {
+            href: card.getAttribute('href'),
+            image: img ? img.getAttribute('src') : null,
+            title: title || null,
+            chapter: chapterSpan ? text(chapterSpan).replace('Chapter', '').trim() : ''
+        };
+    });
+}
+"""
+
+def cards_to_results(cards):
+    """Build search result dicts from raw cards extracted by SEARCH_CARDS_JS"""
+    results = []
+    for card in cards:
+        link = card.get('href')
+        manga_id = extract_manga_id_from_url(link) if link else None
+        title = card.get('title')
+        # If still no title, try to extract from URL
+        if not title and link:
+            url_parts = link.split('/')
+            if len(url_parts) >= 2:
+                potential_title = url_parts[-1].replace('-', ' ').title()
+                if potential_title and len(potential_title) > 3:
+                    title = potential_title
+        # Only add results with valid titles
+        if title and title.lower() != 'none':
+            results.append({
+                'id': manga_id,
+                'title': title,
+                'status': '',
+                'chapter': card.get('chapter') or '',
+                'image': card.get('image'),
+                'details_url': link,
+                'source': 'asurascans'
+            })
+        else:
+            print(f"AsuraScans: Skipping result with invalid title: '{title}' for URL: {link}")
+    return results
 
 def search(page: Page, query: str, fuzzy=True):
     search_url = f"https://asuracomic.net/series?page=1&name={query}"
-    page.goto(search_url)
+    page.goto(search_url, wait_until='domcontentloaded')
+    readiness.wait(page, 'asurascans', 'search')
     
     # Handle ads and popups before trying to extract content
     handle_ads_and_popups(page)
     
-    results = []
     # Each manga card is an <a href^="series/"> inside the grid
-    cards = page.query_selector_all('a[href^="series/"]')
+    cards = page.eval_on_selector_all('a[href^="series/"]', SEARCH_CARDS_JS, ALT_TITLE_SELECTORS)
     print(f"AsuraScans: found {len(cards)} cards for query '{query}'")
     
     # If no cards found, try alternative selectors
     if not cards:
         print("AsuraScans: No cards found with 'a[href^=\"series/\"]', trying alternatives...")
-        alternative_selectors = [
-            'a[href*="/series/"]',
-            'a[href*="series"]',
-            '[href*="/series/"]',
-            '[href*="series"]'
-        ]
-        
-        for selector in alternative_selectors:
-            cards = page.query_selector_all(selector)
+        for selector in ALTERNATIVE_CARD_SELECTORS:
+            cards = page.eval_on_selector_all(selector, SEARCH_CARDS_JS, ALT_TITLE_SELECTORS)
             if cards:
                 print(f"AsuraScans: Found {len(cards)} cards with selector: {selector}")
                 break
     
-    for card in cards:
-        try:
-            link = card.get_attribute('href')
-            manga_id = extract_manga_id_from_url(link) if link else None
-            # Image
-            img_elem = card.query_selector('img')
-            image_url = img_elem.get_attribute('src') if img_elem else None
-            # Title (use span.text-[13.3px].block for most specific selection)
-            title_elem = card.query_selector('span.text-\[13\.3px\].block')
-            title = title_elem.inner_text().strip() if title_elem else None
-            # If title not found, try alternative selectors
-            if not title:
-                alt_title_selectors = [
-                    'span.block',
-                    'span',
-                    'h3',
-                    'h2',
-                    'div[class*="title"]',
-                    'div[class*="name"]',
-                    'img[alt]',
-                    '[alt]'
-                ]
-                for selector in alt_title_selectors:
-                    alt_elem = card.query_selector(selector)
-                    if alt_elem:
-                        if selector in ['img[alt]', '[alt]']:
-                            text = alt_elem.get_attribute('alt')
-                        else:
-                            text = alt_elem.inner_text().strip()
-                        if text and len(text) > 0 and text.lower() != 'none':
-                            title = text
-                            break
-                # If still no title, try to extract from URL
-                if not title and link:
-                    url_parts = link.split('/')
-                    if len(url_parts) >= 2:
-                        potential_title = url_parts[-1].replace('-', ' ').title()
-                        if potential_title and len(potential_title) > 3:
-                            title = potential_title
-            # Chapter (regex-based extraction using page.locator)
-            chapter = ''
-            try:
-                chapter_span = page.locator(f'a[href="{link}"] span', has_text=re.compile(r'Chapter'))
-                if chapter_span.count() > 0:
-                    chapter = chapter_span.first.inner_text().replace('Chapter', '').strip()
-            except Exception as e:
-                print(f"AsuraScans chapter regex error: {e}")
-            # Only add results with valid titles
-            if title and title.lower() != 'none':
-                results.append({
-                    'id': manga_id,
-                    'title': title,
-                    'status': '',
-                    'chapter': chapter,
-                    'image': image_url,
-                    'details_url': link,
-                    'source': 'asurascans'
-                })
-            else:
-                print(f"AsuraScans: Skipping result with invalid title: '{title}' for URL: {link}")
-        except Exception as e:
-            print(f"AsuraScans error: {e}")
-            continue
+    results = cards_to_results(cards)
     print(f"AsuraScans: returning {len(results)} results for query '{query}'")
     if fuzzy and results:
-        best = fuzzy_best_match(query, results)
+        best = best_match(query, results)
         if best:
             print(f"AsuraScans: Fuzzy best match for '{query}' is '{best['title']}'")
             return [best]
@@ -183,8 +182,8 @@ def search(page: Page, query: str, fuzzy=True):
 
 def get_details(page: Page, manga_id: str):
     manga_url = f"https://asuracomic.net/series/{manga_id}"
-    page.goto(manga_url)
-    page.wait_for_load_state('networkidle')
+    page.goto(manga_url, wait_until='domcontentloaded')
+    readiness.wait(page, 'asurascans', 'details')
     details = {}
     # Select the main container
     container = page.query_selector('div.col-span-12.sm\\:col-span-9')
@@ -249,14 +248,9 @@ def get_chapter_images(page: Page, manga_id: str, chapter_id: str):
     match = re.search(r'/chapter/(.+)$', chapter_id)
     chapter_number = match.group(1) if match else chapter_id
     chapter_url = f"https://asuracomic.net/series/{manga_id}/chapter/{chapter_number}"
-    page.goto(chapter_url)
-    page.wait_for_load_state('networkidle')
-    # Print the HTML for debugging
-    print('--- PAGE HTML START ---')
-    print(page.content())
-    print('--- PAGE HTML END ---')
-    # Wait for at least one image to appear
-    page.wait_for_selector('img')
+    page.goto(chapter_url, wait_until='domcontentloaded')
+    # Wait for the reader images to be attached
+    readiness.wait(page, 'asurascans', 'chapter_images')
     # Use JS to get all relevant image srcs from divs with class "w-full mx-auto center"
     images = page.eval_on_selector_all(
         'div.w-full.mx-auto.center img',
@@ -267,18 +261,67 @@ def get_chapter_images(page: Page, manga_id: str, chapter_id: str):
     )
     return images
 
+# Async search used by the scraping engine (services/async_engine.py).
+# It mirrors the sync search above and returns identical dicts; details and
+# chapter pages are only scraped through the browser pool.
+
+async def async_handle_ads_and_popups(page: AsyncPage):
+    """Async version of handle_ads_and_popups"""
+    try:
+        if not resource_blocker.blocks_ads('asurascans'):
+            for selector in AD_SELECTORS:
+                try:
+                    elements = await page.query_selector_all(selector)
+                    for element in elements:
+                        if await element.is_visible():
+                            await element.click()
+                            print(f"AsuraScans: Closed popup with selector: {selector}")
+                            await element.wait_for_element_state('hidden', timeout=1000)
+                except Exception:
+                    continue
+            try:
+                await page.click('body', position={'x': 100, 'y': 100})
+            except Exception:
+                pass
+        try:
+            await page.keyboard.press('Escape')
+        except Exception:
+            pass
+    except Exception as e:
+        print(f"AsuraScans: Error handling ads/popups: {e}")
+
+async def async_search(page: AsyncPage, query: str, fuzzy=True):
+    search_url = f"https://asuracomic.net/series?page=1&name={query}"
+    await page.goto(search_url, wait_until='domcontentloaded')
+    await readiness.async_wait(page, 'asurascans', 'search')
+    await async_handle_ads_and_popups(page)
+    
+    cards = await page.eval_on_selector_all('a[href^="series/"]', SEARCH_CARDS_JS, ALT_TITLE_SELECTORS)
+    if not cards:
+        for selector in ALTERNATIVE_CARD_SELECTORS:
+            cards = await page.eval_on_selector_all(selector, SEARCH_CARDS_JS, ALT_TITLE_SELECTORS)
+            if cards:
+                break
+    
+    results = cards_to_results(cards)
+    if fuzzy and results:
+        best = best_match(query, results)
+        if best:
+            return [best]
+    return results
+
 # If using Flask or FastAPI, add a route handler (example for Flask style):
 from flask import Blueprint, jsonify, request
 chapter_bp = Blueprint('chapter_bp', __name__)
 
 @chapter_bp.route('/chapter-images/asurascans/<manga_id>/<path:chapter_id>', methods=['GET'])
 def chapter_images(manga_id, chapter_id):
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        try:
-            images = get_chapter_images(page, manga_id, chapter_id)
-            return jsonify({'images': images})
-        finally:
-            browser.close() 
\ No newline at end of file
+    from services.browser_pool import browser_pool
+    from services.single_flight import single_flight
+    images = single_flight.do(f"chapter:asurascans:{manga_id}/{chapter_id}", browser_pool.run,
+                              get_chapter_images, manga_id, chapter_id, source='asurascans')
+    response = jsonify({'images': images})
+    if not images:
+        # A failed scrape; don't let the proxy or browser cache it
+        response.headers['Cache-Control'] = 'no-store'
+    return response
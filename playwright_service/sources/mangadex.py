@@ -1,95 +1,125 @@
+import concurrent.futures
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask import Blueprint, jsonify
+from services.rate_limiter import TokenBucket, RateLimitedClient
+
+# MangaDex is served from its JSON API, so callers never need to borrow a browser page
+USES_BROWSER = False
+
+API_URL = "https://api.mangadex.org"
+COVERS_URL = "https://uploads.mangadex.org/covers"
+HTTP_TIMEOUT = 10
+
+# The chapter feed returns at most 500 chapters per page and 10000 in total
+FEED_PAGE_SIZE = 500
+FEED_MAX_RESULTS = 10000
+
+def _create_session():
+    """Keep-alive session that retries transient server errors with backoff"""
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True
+    )
+    session.mount('https://', HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16))
+    session.headers.update({'User-Agent': 'DUDE-MANGA/1.0'})
+    return session
+
+_session = _create_session()
+
+# MangaDex allows about 5 requests/second per IP, and 40/minute on the
+# at-home image server endpoint
+client = RateLimitedClient(
+    _session,
+    TokenBucket(rate=5, capacity=5),
+    route_buckets={'at-home': TokenBucket(rate=40 / 60, capacity=40)}
+)
+_feed_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='mangadex-feed')
+
+def _get(path, params=None):
+    resp = client.get(f"{API_URL}{path}", params=params, timeout=HTTP_TIMEOUT)
+    resp.raise_for_status()
+    return resp.json()
+
+def _title(attributes):
+    return attributes["title"].get("en") or next(iter(attributes["title"].values()), "Unknown Title")
+
+def _cover_url(manga):
+    """Cover URL from an expanded cover_art relationship (requested via includes[])"""
+    for rel in manga.get("relationships", []):
+        if rel["type"] == "cover_art":
+            file_name = rel.get("attributes", {}).get("fileName")
+            if file_name:
+                return f"{COVERS_URL}/{manga['id']}/{file_name}"
+    return None
+
+def _alt_titles(attributes):
+    """English and romanized alternative titles (used to group the same series across sources)"""
+    return [title for alt in attributes.get("altTitles", [])
+            for lang, title in alt.items() if lang in ("en", "ja-ro", "ko-ro", "zh-ro")]
+
+def _author(manga):
+    for rel in manga.get("relationships", []):
+        if rel["type"] == "author" and rel.get("attributes", {}).get("name"):
+            return rel["attributes"]["name"]
+    return None
 
 def search(page, query):
     """Search MangaDex for manga titles matching the query."""
-    url = "https://api.mangadex.org/manga"
     params = {
         "title": query,
         "limit": 10,
         "availableTranslatedLanguage[]": "en",
-        "order[relevance]": "desc"
+        "order[relevance]": "desc",
+        "includes[]": ["cover_art", "author"]
     }
-    resp = requests.get(url, params=params)
-    resp.raise_for_status()
-    data = resp.json()
+    data = _get("/manga", params)
     results = []
     for manga in data.get("data", []):
         attributes = manga["attributes"]
-        title = attributes["title"].get("en") or next(iter(attributes["title"].values()), "Unknown Title")
-        description = attributes["description"].get("en") or ""
-        cover_id = None
-        for rel in manga.get("relationships", []):
-            if rel["type"] == "cover_art":
-                cover_id = rel["id"]
-        image_url = None
-        if cover_id:
-            # Fetch cover filename from MangaDex API
-            cover_resp = requests.get(f"https://api.mangadex.org/cover/{cover_id}")
-            if cover_resp.ok:
-                cover_data = cover_resp.json()
-                file_name = cover_data.get("data", {}).get("attributes", {}).get("fileName")
-                if file_name:
-                    image_url = f"https://uploads.mangadex.org/covers/{manga['id']}/{file_name}"
         results.append({
             "id": manga["id"],
-            "title": title,
-            "description": description,
-            "image": image_url,
+            "title": _title(attributes),
+            "alt_titles": _alt_titles(attributes),
+            "author": _author(manga),
+            "description": attributes["description"].get("en") or "",
+            "image": _cover_url(manga),
             "details_url": f"https://mangadex.org/title/{manga['id']}",
             "source": "mangadex"
         })
     return results
 
-def get_details(page, manga_id):
-    """Get manga details and chapters from MangaDex."""
-    # Get manga details
-    manga_url = f"https://api.mangadex.org/manga/{manga_id}"
-    resp = requests.get(manga_url)
-    resp.raise_for_status()
-    manga = resp.json()["data"]
-    attributes = manga["attributes"]
-    title = attributes["title"].get("en") or next(iter(attributes["title"].values()), "Unknown Title")
-    description = attributes["description"].get("en") or ""
-    status = attributes.get("status", "Unknown")
-    author = None
-    cover_id = None
-    # Find author and cover_id from relationships
-    for rel in manga.get("relationships", []):
-        if rel["type"] == "author":
-            # If attributes are present, use them; otherwise, fetch author details
-            if "attributes" in rel and rel["attributes"].get("name"):
-                author = rel["attributes"]["name"]
-            else:
-                # Fetch author details
-                author_resp = requests.get(f"https://api.mangadex.org/author/{rel['id']}")
-                if author_resp.ok:
-                    author_data = author_resp.json()
-                    author = author_data.get("data", {}).get("attributes", {}).get("name", author)
-        if rel["type"] == "cover_art":
-            cover_id = rel["id"]
-    # Fetch cover filename for thumbnail
-    image_url = None
-    if cover_id:
-        cover_resp = requests.get(f"https://api.mangadex.org/cover/{cover_id}")
-        if cover_resp.ok:
-            cover_data = cover_resp.json()
-            file_name = cover_data.get("data", {}).get("attributes", {}).get("fileName")
-            if file_name:
-                image_url = f"https://uploads.mangadex.org/covers/{manga_id}/{file_name}"
-    # Get chapters (first 100, English only)
-    chapters_url = f"https://api.mangadex.org/chapter"
+def _feed_page(manga_id, offset):
     params = {
-        "manga": manga_id,
         "translatedLanguage[]": "en",
         "order[chapter]": "asc",
-        "limit": 100
+        "limit": FEED_PAGE_SIZE,
+        "offset": offset
     }
-    resp = requests.get(chapters_url, params=params)
-    resp.raise_for_status()
-    chapters_data = resp.json()
+    return _get(f"/manga/{manga_id}/feed", params)
+
+def get_chapter_feed(manga_id):
+    """All English chapters of a manga; pages after the first are fetched concurrently."""
+    first = _feed_page(manga_id, 0)
+    pages = [first.get("data", [])]
+    total = min(first.get("total", 0), FEED_MAX_RESULTS)
+    offsets = range(FEED_PAGE_SIZE, total, FEED_PAGE_SIZE)
+    # map() keeps offset order, so chapters stay sorted
+    pages.extend(page.get("data", []) for page in _feed_executor.map(lambda offset: _feed_page(manga_id, offset), offsets))
+    return [chapter for page in pages for chapter in page]
+
+def get_details(page, manga_id):
+    """Get manga details and chapters from MangaDex."""
+    manga = _get(f"/manga/{manga_id}", [("includes[]", "cover_art"), ("includes[]", "author")])["data"]
+    attributes = manga["attributes"]
+    author = _author(manga)
     chapters = []
-    for ch in chapters_data.get("data", []):
+    for ch in get_chapter_feed(manga_id):
         ch_attr = ch["attributes"]
         ch_num = ch_attr.get("chapter", "?")
         ch_title = ch_attr.get("title", "")
@@ -102,11 +132,11 @@ def get_details(page, manga_id):
         chapters = [{"title": "No chapters found", "url": None}]
     return {
         "id": manga_id,
-        "title": title,
-        "description": description,
-        "status": status,
+        "title": _title(attributes),
+        "description": attributes["description"].get("en") or "",
+        "status": attributes.get("status", "Unknown"),
         "author": author or "Unknown Author",
-        "image": image_url,
+        "image": _cover_url(manga),
         "chapters": chapters,
         "url": f"https://mangadex.org/title/{manga_id}",
         "source": "mangadex"
@@ -114,19 +144,25 @@ def get_details(page, manga_id):
 
 mangadex_chapter_bp = Blueprint('mangadex_chapter_bp', __name__)
 
-@mangadex_chapter_bp.route('/chapter-images/mangadex/<manga_id>/<chapter_id>', methods=['GET'])
-def get_chapter_images(manga_id, chapter_id):
-    """Get image URLs for a MangaDex chapter (original quality)."""
-    at_home_url = f"https://api.mangadex.org/at-home/server/{chapter_id}"
-    resp = requests.get(at_home_url)
+def fetch_chapter_images(chapter_id):
+    """Fetch image URLs for a MangaDex chapter (original quality); None if the API fails."""
+    resp = client.get(f"{API_URL}/at-home/server/{chapter_id}", route='at-home', timeout=HTTP_TIMEOUT)
     if not resp.ok:
-        return jsonify({'error': 'Failed to fetch chapter images from MangaDex'}), 500
+        return None
     data = resp.json()
     base_url = data.get('baseUrl')
     chapter = data.get('chapter', {})
     hash_ = chapter.get('hash')
     page_files = chapter.get('data', [])  # original quality
     if not (base_url and hash_ and page_files):
-        return jsonify({'error': 'Invalid response from MangaDex at-home API'}), 500
-    image_urls = [f"{base_url}/data/{hash_}/{filename}" for filename in page_files]
-    return jsonify({'images': image_urls}) 
\ No newline at end of file
+        return None
+    return [f"{base_url}/data/{hash_}/{filename}" for filename in page_files]
+
+@mangadex_chapter_bp.route('/chapter-images/mangadex/<manga_id>/<chapter_id>', methods=['GET'])
+def get_chapter_images(manga_id, chapter_id):
+    """Get image URLs for a MangaDex chapter (original quality)."""
+    from services.single_flight import single_flight
+    image_urls = single_flight.do(f"chapter:mangadex:{chapter_id}", fetch_chapter_images, chapter_id)
+    if image_urls is None:
+        return jsonify({'error': 'Failed to fetch chapter images from MangaDex'}), 500
+    return jsonify({'images': image_urls})
@@ -1,96 +1,98 @@
 from playwright.sync_api import Page
+from playwright.async_api import Page as AsyncPage
 import re
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
 from flask import Blueprint, jsonify, request
+from services.readiness import readiness
+
+BASE_URL = "https://weebcentral.com"
 
 def extract_manga_id_from_url(url):
     match = re.search(r'/series/([^/]+)/', url)
     return match.group(1) if match else None
 
-def search(page: Page, query: str):
-    search_url = f"https://weebcentral.com/search?text={query}&sort=Best+Match&order=Descending&official=Any&anime=Any&adult=Any&display_mode=Full+Display"
-    page.goto(search_url)
-    page.wait_for_load_state('networkidle')
+# Extracts every search card in one round trip; titles and ids are finished
+# in Python by cards_to_results so the browser and HTTP paths agree
+SEARCH_CARDS_JS = r"""
+sections => {
+    const text = el => el ? (el.innerText || el.textContent || '').trim() : '';
+    const labelled = (section, labels) => {
+        for (const div of section.querySelectorAll('div.opacity-70')) {
+            const strong = div.querySelector('strong');
+            if (strong && labels.some(label => text(strong).includes(label))) {
+                return text(div.querySelector('span'));
+            }
+        }
+        return '';
+    };
+    return sections.map(section => {
+        const card = section.querySelector('a[href*="/series/"]');
+        if (!card) return null;
+        const picture = card.querySelector('picture');
+        const img = picture ? picture.querySelector('img') : card.querySelector('img');
+        const webp = picture ? picture.querySelector('source[type="image/webp"]') : null;
+        let image = webp ? webp.getAttribute('srcset') : null;
+        if (!image && img) image = img.getAttribute('src');
+        return {
+            href: card.getAttribute('href'),
+            image: image,
+            alt: img ? img.getAttribute('alt') : null,
+            title_text: text(card.querySelector('div.text-ellipsis')),
+            status: labelled(section, ['Status:']),
+            chapter: labelled(section, ['Chapter:', 'Chapters:'])
+        };
+    }).filter(Boolean);
+}
+"""
+
+def cards_to_results(cards):
+    """Build search result dicts from raw cards extracted by SEARCH_CARDS_JS or parse_search_html"""
     results = []
-    sections = page.query_selector_all('section.w-full')
-    for section in sections:
-        try:
-            card = section.query_selector('a[href*="/series/"]')
-            if not card:
-                continue
-            link = card.get_attribute('href')
-            manga_id = extract_manga_id_from_url(link) if link else None
-            
-            # Handle picture element structure for images
-            image_url = None
-            picture_elem = card.query_selector('picture')
-            if picture_elem:
-                # Try to get the webp source first (better quality)
-                source_elem = picture_elem.query_selector('source[type="image/webp"]')
-                if source_elem:
-                    image_url = source_elem.get_attribute('srcset')
-                # Fallback to img tag if no webp source
-                if not image_url:
-                    img_elem = picture_elem.query_selector('img')
-                    if img_elem:
-                        image_url = img_elem.get_attribute('src')
-            else:
-                # Fallback to direct img tag if no picture element
-                img_elem = card.query_selector('img')
-                image_url = img_elem.get_attribute('src') if img_elem else None
-            
-            title = None
-            # Try to get title from img alt attribute first
-            if picture_elem:
-                img_elem = picture_elem.query_selector('img')
-                if img_elem:
-                    alt_text = img_elem.get_attribute('alt')
-                    if alt_text:
-                        # Remove "cover" from the alt text to get clean title
-                        title = alt_text.replace(' cover', '').replace(' Cover', '').strip()
-            elif img_elem:
-                alt_text = img_elem.get_attribute('alt')
-                if alt_text:
-                    # Remove "cover" from the alt text to get clean title
-                    title = alt_text.replace(' cover', '').replace(' Cover', '').strip()
-            
-            # Fallback to text element if no alt text
-            if not title:
-                title_div = card.query_selector('div.text-ellipsis')
-                if title_div:
-                    title = title_div.inner_text().strip()
-            
-            # Final fallback to URL-based title
-            if not title:
-                title = link.split('/')[-1].replace('-', ' ').title() if link else "Unknown Title"
-            
-            status = ""
-            status_elem = section.query_selector('div.opacity-70:has(strong:text("Status:")) span')
-            if status_elem:
-                status = status_elem.inner_text().strip()
-            
-            chapter = ""
-            chapter_elem = section.query_selector('div.opacity-70:has(strong:text("Chapter:")), div.opacity-70:has(strong:text("Chapters:")) span')
-            if chapter_elem:
-                chapter = chapter_elem.inner_text().strip()
-            
-            results.append({
-                'id': manga_id,
-                'title': title,
-                'status': status,
-                'chapter': chapter,
-                'image': image_url,
-                'details_url': link,
-                'source': 'weebcentral'
-            })
-        except Exception as e:
-            print(f"WeebCentral error: {e}")
-            continue
+    for card in cards:
+        link = card.get('href')
+        manga_id = extract_manga_id_from_url(link) if link else None
+        
+        title = None
+        # Try to get title from img alt attribute first
+        if card.get('alt'):
+            # Remove "cover" from the alt text to get clean title
+            title = card['alt'].replace(' cover', '').replace(' Cover', '').strip()
+        # Fallback to text element if no alt text
+        if not title:
+            title = card.get('title_text') or None
+        # Final fallback to URL-based title
+        if not title:
+            title = link.split('/')[-1].replace('-', ' ').title() if link else "Unknown Title"
+        
+        results.append({
+            'id': manga_id,
+            'title': title,
+            'status': card.get('status') or "",
+            'chapter': card.get('chapter') or "",
+            'image': card.get('image'),
+            'details_url': link,
+            'source': 'weebcentral'
+        })
     return results
 
+def search(page: Page, query: str):
+    search_url = f"https://weebcentral.com/search?text={query}&sort=Best+Match&order=Descending&official=Any&anime=Any&adult=Any&display_mode=Full+Display"
+    page.goto(search_url, wait_until='domcontentloaded')
+    readiness.wait(page, 'weebcentral', 'search')
+    try:
+        cards = page.eval_on_selector_all('section.w-full', SEARCH_CARDS_JS)
+    except Exception as e:
+        print(f"WeebCentral error: {e}")
+        return []
+    return cards_to_results(cards)
+
 def get_details(page: Page, manga_id: str):
     manga_url = f"https://weebcentral.com/series/{manga_id}"
-    page.goto(manga_url)
-    page.wait_for_load_state('networkidle')
+    page.goto(manga_url, wait_until='domcontentloaded')
+    readiness.wait(page, 'weebcentral', 'details')
     
     # Click the 'Show All Chapters' button if it exists
     try:
@@ -99,11 +101,12 @@ def get_details(page: Page, manga_id: str):
             # Fallback: try by class if text selector fails
             show_all_button = page.query_selector('button.hover\:bg-base-300.p-2')
         if show_all_button:
+            shown = readiness.count(page, 'weebcentral', 'all_chapters')
             show_all_button.click()
-            # Wait for the chapter list to expand and load
-            page.wait_for_timeout(2000)  # Wait 2 seconds for Alpine.js to update
-            # Wait for the chapter list section to be populated
-            page.wait_for_selector('section[x-data*="mark_chapters"]', timeout=5000)
+            # Proceed as soon as the full chapter list has been swapped in
+            readiness.wait(page, 'weebcentral', 'all_chapters', previous=shown)
+        else:
+            readiness.wait(page, 'weebcentral', 'chapters')
     except Exception as e:
         print(f"Show All Chapters button not found or could not be clicked: {e}")
     
@@ -168,8 +171,9 @@ def get_details(page: Page, manga_id: str):
         # First try to click "Show All Chapters" button if it exists
         show_all_btn = page.query_selector('button:has-text("Show All Chapters"), button:has-text("Show All"), .show-all-chapters, [data-testid="show-all-chapters"]')
         if show_all_btn:
+            shown = readiness.count(page, 'weebcentral', 'all_chapters')
             show_all_btn.click()
-            page.wait_for_timeout(2000)  # Wait for chapters to load
+            readiness.wait(page, 'weebcentral', 'all_chapters', previous=shown)
         
         # Look for the specific chapter list container
         chapter_container = page.query_selector('#chapter-list, .chapter-list, [data-testid="chapter-list"], .chapters-container')
@@ -213,11 +217,10 @@ def get_details(page: Page, manga_id: str):
 
 def get_chapter_images(page: Page, chapter_url: str):
     """Get chapter images from WeebCentral chapter URL"""
-    page.goto(chapter_url)
-    page.wait_for_load_state('networkidle')
+    page.goto(chapter_url, wait_until='domcontentloaded')
     
-    # Wait for images to load
-    page.wait_for_timeout(3000)
+    # Wait for the page images to be attached
+    readiness.wait(page, 'weebcentral', 'chapter_images')
     
     images = []
     try:
@@ -250,30 +253,205 @@ def get_chapter_images(page: Page, chapter_url: str):
     print(f"WeebCentral: Returning {len(images)} images")
     return images 
 
+# Async search used by the scraping engine (services/async_engine.py).
+# It mirrors the sync search above and returns identical dicts; details and
+# chapter pages are only scraped through the browser pool.
+
+async def async_search(page: AsyncPage, query: str):
+    search_url = f"https://weebcentral.com/search?text={query}&sort=Best+Match&order=Descending&official=Any&anime=Any&adult=Any&display_mode=Full+Display"
+    await page.goto(search_url, wait_until='domcontentloaded')
+    await readiness.async_wait(page, 'weebcentral', 'search')
+    try:
+        cards = await page.eval_on_selector_all('section.w-full', SEARCH_CARDS_JS)
+    except Exception as e:
+        print(f"WeebCentral error: {e}")
+        return []
+    return cards_to_results(cards)
+
+# HTTP-only variants. Search and series pages are server-rendered (htmx
+# fragments), so these fetch and parse the HTML directly and return the same
+# dicts as the browser scrapers. They return None when the markup can't be
+# parsed, and the callers (BrowserPool.call, AsyncScrapeEngine._call) fall back
+# to Playwright.
+
+HTTP_TIMEOUT = 10
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+_http_session = requests.Session()
+_http_session.headers.update(HTTP_HEADERS)
+_http_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+def _fetch_html(url: str, params=None, htmx: bool = False):
+    headers = {'HX-Request': 'true'} if htmx else None
+    response = _http_session.get(url, params=params, headers=headers, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return BeautifulSoup(response.text, 'lxml')
+
+def _cover(node):
+    """Cover image URL (webp source preferred) and the <img> element of a card or page"""
+    picture_elem = node.select_one('picture')
+    img_elem = (picture_elem or node).select_one('img')
+    source_elem = picture_elem.select_one('source[type="image/webp"]') if picture_elem else None
+    image_url = source_elem.get('srcset') if source_elem else None
+    if not image_url and img_elem:
+        image_url = img_elem.get('src')
+    return image_url, img_elem
+
+def _labelled_text(section, *labels) -> str:
+    for label in labels:
+        elem = section.select_one(f'div.opacity-70:has(strong:-soup-contains("{label}")) span')
+        if elem:
+            return elem.get_text(strip=True)
+    return ""
+
+def parse_search_html(soup) -> list:
+    """Parse search result cards from a search page or its htmx fragment"""
+    cards = []
+    for section in soup.select('section.w-full'):
+        card = section.select_one('a[href*="/series/"]')
+        if not card:
+            continue
+        image_url, img_elem = _cover(card)
+        title_div = card.select_one('div.text-ellipsis')
+        cards.append({
+            'href': card.get('href'),
+            'image': image_url,
+            'alt': img_elem.get('alt') if img_elem else None,
+            'title_text': title_div.get_text(strip=True) if title_div else '',
+            'status': _labelled_text(section, "Status:"),
+            'chapter': _labelled_text(section, "Chapter:", "Chapters:")
+        })
+    return cards_to_results(cards)
+
+def search_http(query: str):
+    """Search WeebCentral over plain HTTP; None if the result markup wasn't found"""
+    params = {
+        'text': query,
+        'sort': 'Best Match',
+        'order': 'Descending',
+        'official': 'Any',
+        'anime': 'Any',
+        'adult': 'Any',
+        'display_mode': 'Full Display'
+    }
+    try:
+        results = parse_search_html(_fetch_html(f"{BASE_URL}/search/data", params=params, htmx=True))
+    except Exception as e:
+        print(f"WeebCentral HTTP search failed: {e}")
+        return None
+    # No cards may just mean the markup changed; let the browser decide
+    return results or None
+
+def parse_chapter_links(soup) -> list:
+    """Parse chapter links from a series page or the full chapter list fragment"""
+    container = soup.select_one('#chapter-list, .chapter-list, [data-testid="chapter-list"], .chapters-container') or soup
+    chapter_links = container.select('a[href*="/chapter"], a[href*="/read"], .chapter-link, [data-testid="chapter-link"]')
+    
+    chapters = []
+    for link in chapter_links:
+        href = link.get('href')
+        text = link.get_text('\n', strip=True)
+        if href and text:
+            chapter_text = text.replace('Chapter', '').strip()
+            if chapter_text:
+                full_url = href if href.startswith('http') else f"{BASE_URL}{href}"
+                chapters.append({
+                    'title': f"Chapter {chapter_text}",
+                    'url': full_url
+                })
+    return chapters
+
+def parse_details_html(soup, manga_id: str) -> dict:
+    """Parse series details (without chapters) from a series page"""
+    manga_url = f"{BASE_URL}/series/{manga_id}"
+    details = {}
+    title_elem = soup.select_one('h1.text-2xl.font-bold, h1.series-title, [data-testid="series-title"], h1')
+    details['title'] = title_elem.get_text(strip=True) if title_elem else "Unknown Title"
+    
+    cover = soup.select_one('.series-cover, .manga-cover, [data-testid="cover-image"]') or soup
+    details['image'], _ = _cover(cover)
+    
+    desc_elem = soup.select_one('p.whitespace-pre-wrap.break-words, .description, .synopsis, [data-testid="description"], .series-description, p.description')
+    if desc_elem:
+        ps = desc_elem.select('p')
+        details['description'] = '\n'.join(p.get_text(strip=True) for p in ps) if ps else desc_elem.get_text(strip=True)
+    else:
+        details['description'] = "No description available"
+    
+    author = ""
+    author_elem = soup.select_one('.author, .creator, [data-testid="author"], .series-author')
+    if author_elem:
+        author = author_elem.get_text(strip=True)
+    else:
+        author_label = soup.select_one('h3:-soup-contains("Author"), .author-label, strong:-soup-contains("Author")')
+        sibling = author_label.find_next_sibling() if author_label else None
+        if sibling:
+            author = sibling.get_text(' ', strip=True)
+    details['author'] = author or "Unknown Author"
+    
+    status_elem = soup.select_one('.status, [data-testid="status"], .series-status')
+    if not status_elem:
+        status_label = soup.select_one('strong:-soup-contains("Status")')
+        status_elem = status_label.parent if status_label else None
+    details['status'] = status_elem.get_text(' ', strip=True).replace('Status', '').strip(' :') if status_elem else ""
+    
+    details['id'] = manga_id
+    details['url'] = manga_url
+    details['source'] = 'weebcentral'
+    return details
+
+def get_details_http(manga_id: str):
+    """Get WeebCentral series details over plain HTTP; None if the page couldn't be parsed"""
+    manga_url = f"{BASE_URL}/series/{urllib.parse.quote(manga_id, safe='/')}"
+    try:
+        soup = _fetch_html(manga_url)
+        if not soup.select_one('h1'):
+            return None
+        details = parse_details_html(soup, manga_id)
+        # The series page only renders the latest chapters; "Show All Chapters"
+        # loads the rest from this fragment
+        try:
+            chapters = parse_chapter_links(_fetch_html(f"{manga_url}/full-chapter-list", htmx=True))
+        except requests.RequestException as e:
+            print(f"WeebCentral HTTP full chapter list failed: {e}")
+            chapters = []
+        details['chapters'] = chapters or parse_chapter_links(soup)
+    except Exception as e:
+        print(f"WeebCentral HTTP details failed: {e}")
+        return None
+    details['images'] = []
+    return details
+
 # If using Flask or FastAPI, add a route handler (example for Flask style):
 weebcentral_chapter_bp = Blueprint('weebcentral_chapter_bp', __name__)
 
 @weebcentral_chapter_bp.route('/chapter-images/weebcentral/<path:chapter_url>', methods=['GET'])
 def chapter_images(chapter_url):
-    from playwright.sync_api import sync_playwright
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        try:
-            # Set headers to avoid CORS issues
-            page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            })
-            
-            # Decode the URL if it's URL-encoded
-            import urllib.parse
-            decoded_url = urllib.parse.unquote(chapter_url)
-            images = get_chapter_images(page, decoded_url)
-            return jsonify({'images': images})
-        finally:
-            browser.close() 
\ No newline at end of file
+    from services.browser_pool import browser_pool
+    from services.single_flight import single_flight
+    import urllib.parse
+    # Decode the URL if it's URL-encoded
+    decoded_url = urllib.parse.unquote(chapter_url)
+    # Set headers to avoid CORS issues
+    context_options = {
+        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'extra_http_headers': {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+        }
+    }
+    images = single_flight.do(f"chapter:weebcentral:{decoded_url}", browser_pool.run,
+                              get_chapter_images, decoded_url, context_options=context_options,
+                              source='weebcentral')
+    response = jsonify({'images': images})
+    if not images:
+        # A failed scrape; don't let the proxy or browser cache it
+        response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -56,6 +56,15 @@ def run_specific_tests():
     """Run specific important tests"""
     important_tests = [
         'test_simple_cache',
+        'test_single_flight',
+        'test_rate_limiter',
+        'test_resource_blocking',
+        'test_cache_manager',
+        'test_title_index',
+        'test_local_index',
+        'test_ranking',
+        'test_series_grouping',
+        'test_preloaded_store',
         'test_simple_cache_working',
         'test_performance',
         'source_health_check'
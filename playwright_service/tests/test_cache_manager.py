@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for CacheManager connection reuse and WAL journaling
+"""
+
+import time
+import json
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from cache_manager import CacheManager
+from services.compact_encoding import is_compact
+
+def make_manager():
+    db_dir = tempfile.mkdtemp()
+    return CacheManager(os.path.join(db_dir, "manga_cache.db"))
+
+def test_connection_is_reused_per_thread():
+    """Each thread keeps one connection; other threads get their own"""
+    print("=== Testing Per-Thread Connections ===")
+
+    cm = make_manager()
+    assert cm._connection() is cm._connection(), "connection was not reused"
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(cm._connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not cm._connection(), "threads shared a connection"
+
+    mode = cm._connection().execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == 'wal', f"journal mode is {mode}"
+    cm.close()
+    print("✅ One WAL connection per thread")
+
+def test_reads_do_not_wait_on_writer():
+    """A read completes while another connection holds an open write transaction"""
+    print("\n=== Testing Reads During Writes ===")
+
+    cm = make_manager()
+    cm.cache_chapter_images("https://example.org/chapter/1", "weebcentral", ["a.jpg"])
+
+    writer = sqlite3.connect(cm.db_path)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute("UPDATE chapter_cache SET images = '[]'")
+
+    start = time.perf_counter()
+    images = cm.get_cached_chapter_images("https://example.org/chapter/1")
+    elapsed = time.perf_counter() - start
+    writer.rollback()
+    writer.close()
+
+    assert images == ["a.jpg"], images
+    assert elapsed < 0.5, f"read waited {elapsed:.3f}s on the writer"
+    cm.close()
+    print(f"✅ Read finished in {elapsed * 1000:.2f}ms while a write was open")
+
+def test_lookup_latency():
+    """Repeat lookups reuse the connection and prepared statement"""
+    print("\n=== Testing Lookup Latency ===")
+
+    cm = make_manager()
+    cm.cache_search_results("solo leveling", "weebcentral", [{'title': 'Solo Leveling'}])
+    cm.get_cached_search("solo leveling", "weebcentral")
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        cm.get_cached_search("solo leveling", "weebcentral")
+    per_lookup = (time.perf_counter() - start) / runs
+    cm.close()
+    print(f"✅ Average cached search lookup: {per_lookup * 1000:.3f}ms")
+
+def test_per_user_rows_are_migrated():
+    """Legacy per-user rows collapse into one shared row per content key"""
+    print("\n=== Testing Per-User Table Migration ===")
+
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, "manga_cache.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute('''
+        CREATE TABLE manga_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, manga_id TEXT NOT NULL,
+            source TEXT NOT NULL, title TEXT NOT NULL, image_url TEXT, status TEXT, author TEXT,
+            description TEXT, chapters TEXT, last_updated TIMESTAMP, last_refreshed TIMESTAMP,
+            UNIQUE(user_id, manga_id, source)
+        )
+    ''')
+    legacy.executemany(
+        'INSERT INTO manga_cache (user_id, manga_id, source, title, chapters, last_updated) VALUES (?, ?, ?, ?, ?, ?)',
+        [(1, 'solo', 'weebcentral', 'Old Title', '[]', '2025-01-01 00:00:00'),
+         (2, 'solo', 'weebcentral', 'New Title', '[]', '2025-02-01 00:00:00'),
+         (None, 'other', 'mangadex', 'Other', '[]', '2025-01-15 00:00:00')]
+    )
+    legacy.commit()
+    legacy.close()
+
+    cm = CacheManager(db_path)
+    stats = cm.get_cache_stats()
+    assert stats['manga_cache']['total'] == 2, stats
+    details = cm.get_cached_manga('solo', 'weebcentral')
+    assert details['title'] == 'New Title', details
+    cm.close()
+    print("✅ Per-user rows merged into the shared tier, newest copy kept")
+
+def test_entries_are_shared():
+    """Details cached by an anonymous preload are served to everyone"""
+    print("\n=== Testing Shared Content Tier ===")
+
+    cm = make_manager()
+    cm.cache_manga_details('solo', 'weebcentral', {'title': 'Solo Leveling', 'chapters': [{'id': '1'}]})
+    cm.cache_manga_details('solo', 'weebcentral', {'title': 'Solo Leveling', 'chapters': [{'id': '2'}]})
+
+    assert cm.get_cache_stats()['manga_cache']['total'] == 1
+    assert cm.get_cached_manga('solo', 'weebcentral')['chapters'] == [{'id': '2'}]
+    cm.close()
+    print("✅ One row per series regardless of who cached it")
+
+def test_compact_encoding_and_migration():
+    """Lists are stored compactly, legacy JSON rows still decode and are migrated"""
+    print("\n=== Testing Compact List Encoding ===")
+
+    cm = make_manager()
+    images = [f"https://cdn.example.org/manga/solo/{n:03d}.png" for n in range(50)]
+    cm.cache_chapter_images("https://example.org/chapter/1", "weebcentral", images)
+    assert cm.get_cached_chapter_images("https://example.org/chapter/1") == images
+
+    # A row written before the compact encoding existed
+    with cm._connection() as conn:
+        conn.execute("INSERT INTO chapter_cache (chapter_url, source, images) VALUES (?, ?, ?)",
+                     ("https://example.org/chapter/2", "weebcentral", json.dumps(images)))
+    assert cm.get_cached_chapter_images("https://example.org/chapter/2") == images
+
+    converted = cm.migrate_compact_encoding()
+    assert converted['chapter_cache'] == 1, converted
+    stored = cm._connection().execute(
+        "SELECT images FROM chapter_cache WHERE chapter_url = ?", ("https://example.org/chapter/2",)
+    ).fetchone()[0]
+    assert is_compact(stored)
+    assert cm.get_cached_chapter_images("https://example.org/chapter/2") == images
+    cm.close()
+    print(f"✅ {len(json.dumps(images))} bytes of JSON stored in {len(stored)} bytes")
+
+def main():
+    """Run all tests"""
+    print("Testing Cache Manager")
+    print("=" * 40)
+
+    test_connection_is_reused_per_thread()
+    test_reads_do_not_wait_on_writer()
+    test_lookup_latency()
+    test_per_user_rows_are_migrated()
+    test_entries_are_shared()
+    test_compact_encoding_and_migration()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test script for the in-memory local title index
+"""
+
+import time
+import random
+import string
+import sys
+import os
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from services.local_index import LocalTitleIndex
+
+def make_doc(title, source='weebcentral', popularity=0):
+    slug = title.lower().replace(' ', '-')
+    return {
+        'id': slug,
+        'title': title,
+        'status': 'Ongoing',
+        'chapter': '',
+        'image': None,
+        'details_url': f"https://example.org/{source}/series/{slug}",
+        'source': source,
+        'popularity': popularity
+    }
+
+def make_index():
+    index = LocalTitleIndex()
+    index.build([
+        make_doc("Solo Leveling", popularity=50),
+        make_doc("Solo Max-Level Newbie", source='asurascans', popularity=10),
+        make_doc("One Piece", popularity=90),
+        make_doc("The Beginning After the End", source='asurascans'),
+        make_doc("Omniscient Reader's Viewpoint", source='mangadex')
+    ])
+    return index
+
+def test_prefix_substring_and_typos():
+    """Prefix, substring and misspelled queries all find the title"""
+    print("=== Testing Match Types ===")
+
+    index = make_index()
+    assert index.search("sol")[0]['title'] == "Solo Leveling", "prefix match failed"
+    assert index.search("after the")[0]['title'] == "The Beginning After the End", "substring match failed"
+    assert index.search("solo levelling")[0]['title'] == "Solo Leveling", "typo match failed"
+    assert index.search("omnicsient reader")[0]['title'] == "Omniscient Reader's Viewpoint", "typo match failed"
+    assert index.search("xyzzy") == []
+    assert index.search("sol")[0]['match'] == 'prefix'
+    assert index.search("after the")[0]['match'] == 'substring'
+    assert index.search("solo levelling")[0]['match'] == 'fuzzy'
+    print("✅ Prefix, substring and typo-tolerant queries work")
+
+def test_source_filter_and_updates():
+    """Results honour the source filter and follow upserts and removals"""
+    print("\n=== Testing Filters and Updates ===")
+
+    index = make_index()
+    results = index.search("solo", sources=['asurascans'])
+    assert [r['title'] for r in results] == ["Solo Max-Level Newbie"], results
+
+    index.upsert(make_doc("Solo Leveling: Ragnarok", popularity=5))
+    assert any(r['title'] == "Solo Leveling: Ragnarok" for r in index.search("ragnarok"))
+
+    renamed = make_doc("One Piece", popularity=90)
+    renamed['title'] = "One Piece (Official Colored)"
+    index.upsert(renamed)
+    titles = [r['title'] for r in index.search("one piece")]
+    assert titles == ["One Piece (Official Colored)"], titles
+
+    index.remove(renamed['details_url'])
+    assert index.search("one piece") == []
+    assert index.size() == 5
+    print("✅ Source filter, upsert and remove work")
+
+def test_only_committed_rows_are_indexed():
+    """Rows flushed in a rolled-back transaction never reach the attached index"""
+    print("\n=== Testing Commit/Rollback ===")
+
+    from flask import Flask
+    from models import db, PreloadedManga
+    from services.local_index import local_index
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        local_index.attach()
+        local_index.build([])
+
+        def add(title):
+            db.session.add(PreloadedManga(title=title, normalized_title=PreloadedManga.normalize_title(title),
+                                          source_url=f"https://weebcentral.com/series/{title}", source='weebcentral'))
+            db.session.flush()
+
+        add("Rolled Back Title")
+        assert local_index.search("rolled back") == [], "flushed rows must wait for the commit"
+        db.session.rollback()
+        add("Committed Title")
+        db.session.commit()
+
+        assert local_index.search("rolled back") == []
+        assert [r['title'] for r in local_index.search("committed")] == ["Committed Title"]
+    print("✅ Only committed rows are indexed")
+
+def test_search_speed():
+    """Queries over a large catalogue stay fast"""
+    print("\n=== Testing Search Speed ===")
+
+    random.seed(7)
+    words = [''.join(random.choices(string.ascii_lowercase, k=random.randint(3, 9))) for _ in range(5000)]
+    index = LocalTitleIndex()
+    start = time.perf_counter()
+    index.build(make_doc(' '.join(random.choices(words, k=3)) + f" {n}") for n in range(20000))
+    build_time = time.perf_counter() - start
+    index.upsert(make_doc("Solo Leveling"))
+
+    queries = ["solo lev", "sollo leveling", words[0][:3], words[1]]
+    runs = 50
+    start = time.perf_counter()
+    for _ in range(runs):
+        for query in queries:
+            index.search(query)
+    per_query = (time.perf_counter() - start) / (runs * len(queries))
+
+    assert index.search("sollo leveling")[0]['title'] == "Solo Leveling"
+    print(f"✅ Built 20k titles in {build_time:.2f}s, {per_query * 1000:.3f}ms per query")
+
+def main():
+    """Run all tests"""
+    print("Testing Local Title Index")
+    print("=" * 40)
+
+    test_prefix_substring_and_typos()
+    test_source_filter_and_updates()
+    test_only_committed_rows_are_indexed()
+    test_search_speed()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script for bulk PreloadedManga upserts
+"""
+
+import time
+import sys
+import os
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from flask import Flask
+from models import db, PreloadedManga
+from services.preloaded_store import PreloadedStore
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+def make_row(n, **extra):
+    return dict({
+        'title': f"Manga {n}",
+        'source_url': f"https://example.org/series/{n}",
+        'source': 'weebcentral',
+        'status': 'Ongoing'
+    }, **extra)
+
+def test_insert_then_update():
+    """New rows are inserted, existing ones only get the named columns and a popularity bump"""
+    print("=== Testing Upsert ===")
+
+    store = PreloadedStore()
+    assert store.upsert_many([make_row(1), make_row(2), make_row(1)], popularity_increment=1) == 2
+    assert PreloadedManga.query.count() == 2
+    assert PreloadedManga.query.filter_by(source_url=make_row(1)['source_url']).one().popularity == 2, \
+        "duplicates in a batch should add up"
+
+    store.upsert_many([make_row(1, title="Renamed", status='Completed', chapters=[{'n': 1}])],
+                      update_columns=('status', 'chapters'), popularity_increment=1)
+    manga = PreloadedManga.query.filter_by(source_url=make_row(1)['source_url']).one()
+    db.session.refresh(manga)
+    assert manga.title == "Manga 1", "columns not named should be kept"
+    assert manga.status == 'Completed' and manga.chapters == [{'n': 1}]
+    assert manga.popularity == 3
+    assert manga.normalized_title == "manga 1"
+
+    store.upsert_many([make_row(2, status='Hiatus')])
+    manga = PreloadedManga.query.filter_by(source_url=make_row(2)['source_url']).one()
+    db.session.refresh(manga)
+    assert manga.status == 'Ongoing' and manga.popularity == 1, "no columns named, no increment"
+
+    assert store.upsert_many([make_row(3, popularity=None), make_row(3, popularity=2)]) == 1
+    assert PreloadedManga.query.filter_by(source_url=make_row(3)['source_url']).one().popularity == 2, \
+        "an explicit None popularity should count as 0"
+    print("✅ Inserts, updates and popularity increments work")
+
+def test_batch_speed():
+    """A large batch is written in a few statements"""
+    print("\n=== Testing Batch Speed ===")
+
+    store = PreloadedStore()
+    rows = [make_row(n) for n in range(100, 2100)]
+    start = time.perf_counter()
+    assert store.upsert_many(rows, popularity_increment=1) == len(rows)
+    insert_time = time.perf_counter() - start
+    start = time.perf_counter()
+    store.upsert_many(rows, popularity_increment=1)
+    update_time = time.perf_counter() - start
+
+    batch_urls = [row['source_url'] for row in rows]
+    assert PreloadedManga.query.filter(PreloadedManga.source_url.in_(batch_urls),
+                                       PreloadedManga.popularity == 2).count() == len(rows)
+    print(f"✅ Inserted 2000 rows in {insert_time * 1000:.1f}ms, updated them in {update_time * 1000:.1f}ms")
+
+def main():
+    """Run all tests"""
+    print("Testing Preloaded Store")
+    print("=" * 40)
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        test_insert_then_update()
+        test_batch_speed()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
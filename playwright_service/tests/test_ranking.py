@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for cross-source relevance ranking
+"""
+
+import time
+import sys
+import os
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from services.ranking import rank, best_match, score_titles
+
+def make_results():
+    return [
+        {'title': 'Solo Max-Level Newbie', 'source': 'asurascans'},
+        {'title': 'The Beginning After the End', 'source': 'weebcentral'},
+        {'title': 'Solo Leveling: Ragnarok', 'source': 'asurascans'},
+        {'title': 'Solo Leveling', 'source': 'mangadex'},
+        {'title': 'Leveling With the Gods', 'source': 'weebcentral'}
+    ]
+
+def test_rank_orders_across_sources():
+    """Results from every source are ordered by relevance"""
+    print("=== Testing Relevance Order ===")
+
+    ranked = rank("solo leveling", make_results())
+    titles = [result['title'] for result in ranked]
+    assert titles[0] == 'Solo Leveling', titles
+    assert titles[1] == 'Solo Leveling: Ragnarok', titles
+    assert titles[-1] == 'The Beginning After the End', titles
+    assert ranked[0]['relevance'] == 1.0
+    print(f"✅ Ranked order: {titles}")
+
+def test_top_k_and_best_only():
+    """Callers can ask for the top k or only a best match above the threshold"""
+    print("\n=== Testing Top-k and Best Match ===")
+
+    assert len(rank("solo", make_results(), top_k=2)) == 2
+    assert best_match("solo levelin", make_results())['title'] == 'Solo Leveling'
+    assert best_match("one piece", make_results()) is None
+    print("✅ top_k and best_match work")
+
+def test_best_match_threshold():
+    """AsuraScans narrows to one result for full titles and typos, not for partial queries"""
+    print("\n=== Testing Best Match Threshold ===")
+
+    catalogue = [{'title': title, 'source': 'asurascans'} for title in (
+        "Omniscient Reader's Viewpoint", 'Return of the Mount Hua Sect', 'The Greatest Estate Developer',
+        'Solo Max-Level Newbie', 'Reaper of the Drifting Moon'
+    )]
+    matched = {
+        'omniscient reader': "Omniscient Reader's Viewpoint",
+        'return of the mount hua sect': 'Return of the Mount Hua Sect',
+        'greatest estate': 'The Greatest Estate Developer',
+        'the greatest estate develper': 'The Greatest Estate Developer'
+    }
+    for query, title in matched.items():
+        best = best_match(query, catalogue)
+        assert best and best['title'] == title, (query, best)
+    for query in ('solo', 'mount hua', 'reaper', 'martial peak'):
+        assert best_match(query, catalogue) is None, query
+    print("✅ Full titles and typos match, partial queries keep all results")
+
+def test_ranking_speed():
+    """Hundreds of candidates rank in well under the per-search budget"""
+    print("\n=== Testing Ranking Speed ===")
+
+    titles = [f"Series Number {n} Chronicles" for n in range(300)] + ['Solo Leveling']
+    score_titles("solo leveling", titles)
+
+    runs = 100
+    start = time.perf_counter()
+    for _ in range(runs):
+        score_titles("solo leveling", titles)
+    per_pass = (time.perf_counter() - start) / runs
+    # About 0.3ms on a laptop; the bound leaves room for slow CI machines
+    assert per_pass < 0.01, f"scoring {len(titles)} titles took {per_pass * 1000:.2f}ms"
+    print(f"✅ Scored {len(titles)} titles in {per_pass * 1000:.3f}ms")
+
+def main():
+    """Run all tests"""
+    print("Testing Ranking")
+    print("=" * 40)
+
+    test_rank_orders_across_sources()
+    test_top_k_and_best_only()
+    test_best_match_threshold()
+    test_ranking_speed()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script for the token bucket and rate-limit aware HTTP client
+"""
+
+import time
+import sys
+import os
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from services.rate_limiter import TokenBucket, RateLimitedClient
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeSession:
+    """Returns the queued responses in order and records each request time"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(time.monotonic())
+        return self.responses.pop(0)
+
+def test_bucket_limits_rate():
+    """Bursts beyond capacity are queued at the refill rate"""
+    print("=== Testing Token Bucket ===")
+
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+
+    # 2 tokens are free, the other 4 arrive at 20/s
+    assert elapsed >= 0.18, f"bucket let requests through too fast ({elapsed:.3f}s)"
+    print(f"✅ 6 requests through a 20/s bucket took {elapsed:.2f}s")
+
+def test_429_is_retried_after_retry_after():
+    """A 429 is retried once Retry-After has passed instead of being returned"""
+    print("\n=== Testing 429 Retry ===")
+
+    session = FakeSession([FakeResponse(429, {'Retry-After': '0.2'}), FakeResponse(200)])
+    client = RateLimitedClient(session, TokenBucket(rate=100))
+    response = client.get("https://api.example.org/manga")
+
+    assert response.status_code == 200
+    assert len(session.calls) == 2
+    assert session.calls[1] - session.calls[0] >= 0.18, "retry did not honour Retry-After"
+    stats = client.get_stats()
+    assert stats['rate_limited'] == 1 and stats['retries'] == 1, stats
+    print("✅ 429 retried after Retry-After")
+
+def test_exhausted_quota_pauses_bucket():
+    """X-RateLimit-Remaining: 0 holds the next request until the reset time"""
+    print("\n=== Testing Quota Pause ===")
+
+    reset_at = str(time.time() + 0.3)
+    session = FakeSession([
+        FakeResponse(200, {'X-RateLimit-Remaining': '0', 'X-RateLimit-Retry-After': reset_at}),
+        FakeResponse(200)
+    ])
+    client = RateLimitedClient(session, TokenBucket(rate=100))
+    client.get("https://api.example.org/manga")
+    client.get("https://api.example.org/manga")
+
+    assert session.calls[1] - session.calls[0] >= 0.25, "request was not held until the quota reset"
+    assert client.get_stats()['server_pauses'] == 1
+    print("✅ Exhausted quota pauses requests until reset")
+
+def main():
+    """Run all tests"""
+    print("Testing Rate Limiter")
+    print("=" * 40)
+
+    test_bucket_limits_rate()
+    test_429_is_retried_after_retry_after()
+    test_exhausted_quota_pauses_bucket()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the per-source resource blocking profiles
+"""
+
+import sys
+import os
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from services.resource_blocking import ResourceBlocker
+
+def make_blocker(**profiles):
+    blocker = ResourceBlocker(enabled=True)
+    blocker.profiles = {
+        source: {'allow_types': frozenset(types), 'allow_hosts': frozenset(hosts)}
+        for source, (types, hosts) in profiles.items()
+    }
+    return blocker
+
+def test_default_profile_blocks_types_and_ad_hosts():
+    """Images and ad hosts are aborted, documents and scripts load"""
+    print("=== Testing Default Profile ===")
+
+    blocker = make_blocker(weebcentral=((), ()))
+    assert blocker.should_block('weebcentral', 'image', 'https://weebcentral.com/cover.webp')
+    assert blocker.should_block('weebcentral', 'script', 'https://pagead2.googlesyndication.com/ads.js')
+    assert not blocker.should_block('weebcentral', 'document', 'https://weebcentral.com/series/1')
+    assert not blocker.should_block('weebcentral', 'script', 'https://weebcentral.com/app.js')
+    assert blocker.blocks_ads('weebcentral')
+    print("✅ Default profile blocks images and ad hosts")
+
+def test_source_profile_overrides():
+    """A source's allowlist only applies to that source's pages"""
+    print("\n=== Testing Source Overrides ===")
+
+    blocker = make_blocker(weebcentral=((), ()), asurascans=(('image',), ('googletagmanager.com',)))
+    tag_url = 'https://www.googletagmanager.com/gtm.js'
+    assert not blocker.should_block('asurascans', 'script', tag_url)
+    assert blocker.should_block('weebcentral', 'script', tag_url)
+    assert not blocker.should_block('asurascans', 'image', 'https://gg.asuracomic.net/cover.webp')
+    assert blocker.should_block('asurascans', 'script', 'https://securepubads.doubleclick.net/tag.js')
+    print("✅ Allowlists are applied per source")
+
+def test_blocks_ads_follows_profile():
+    """Popup handling is still needed when a source lets an ad host through"""
+    print("\n=== Testing blocks_ads ===")
+
+    blocker = make_blocker(weebcentral=((), ()), asurascans=((), ('googletagmanager.com',)))
+    assert blocker.blocks_ads('weebcentral')
+    assert not blocker.blocks_ads('asurascans')
+    assert not ResourceBlocker(enabled=False).blocks_ads('weebcentral')
+    print("✅ blocks_ads reflects each source's profile")
+
+def main():
+    """Run all tests"""
+    print("Testing Resource Blocking")
+    print("=" * 40)
+
+    test_default_profile_blocks_types_and_ad_hosts()
+    test_source_profile_overrides()
+    test_blocks_ads_follows_profile()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for grouping the same series across sources
+"""
+
+import sys
+import os
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from services.series_grouping import SeriesGrouper, series_key
+
+def make_results():
+    return [
+        {'id': 'solo-leveling', 'title': 'Solo Leveling', 'source': 'weebcentral',
+         'details_url': 'https://weebcentral.com/series/01J/Solo-Leveling', 'image': 'wc.jpg'},
+        {'id': 'abc-123', 'title': 'Solo Leveling', 'source': 'mangadex', 'author': 'Chugong',
+         'alt_titles': ['Na Honjaman Level Up'], 'details_url': 'https://mangadex.org/title/abc-123', 'image': None},
+        {'id': 'na-honjaman-level-up', 'title': 'Na Honjaman Level Up', 'source': 'asurascans',
+         'details_url': 'https://asuracomic.net/series/na-honjaman-level-up', 'image': 'asura.jpg'},
+        {'id': 'solo-leveling-ragnarok', 'title': 'Solo Leveling: Ragnarok', 'source': 'asurascans',
+         'details_url': 'https://asuracomic.net/series/solo-leveling-ragnarok', 'image': 'r.jpg'}
+    ]
+
+def test_series_key():
+    """Keys ignore case, punctuation, bracketed notes and a leading 'the'"""
+    print("=== Testing Series Keys ===")
+
+    assert series_key("Solo Leveling") == series_key("SOLO LEVELING (Official)")
+    assert series_key("The Beginning After the End") == series_key("Beginning After The End")
+    assert series_key("Omniscient Reader's Viewpoint") == series_key("Omniscient Readers Viewpoint")
+    assert series_key("Solo Leveling") != series_key("Solo Leveling: Ragnarok")
+    print("✅ Series keys normalize titles")
+
+def test_grouping_by_title_and_alt_titles():
+    """Listings sharing a title or alt title become one group led by the fastest source"""
+    print("\n=== Testing Grouping ===")
+
+    groups = SeriesGrouper().group(make_results())
+    assert len(groups) == 2, [g['title'] for g in groups]
+
+    solo = groups[0]
+    assert [link['source'] for link in solo['sources']] == ['mangadex', 'weebcentral', 'asurascans']
+    assert solo['source'] == 'mangadex', "preferred source should be the fastest one"
+    assert solo['image'] == 'wc.jpg', "missing cover should come from another member"
+    assert groups[1]['title'] == 'Solo Leveling: Ragnarok'
+    print("✅ Three listings of Solo Leveling grouped, Ragnarok kept separate")
+
+def test_fuzzy_titles_need_matching_authors():
+    """Near-identical titles across sources merge unless their authors differ"""
+    print("\n=== Testing Fuzzy Grouping ===")
+
+    grouper = SeriesGrouper()
+    results = [
+        {'id': '1', 'title': "Omniscient Reader's Viewpoint", 'source': 'mangadex', 'author': 'sing N song',
+         'details_url': 'https://mangadex.org/title/1'},
+        {'id': '2', 'title': 'Omniscient Reader Viewpoint', 'source': 'weebcentral',
+         'details_url': 'https://weebcentral.com/series/2'}
+    ]
+    assert len(grouper.group(results)) == 1
+
+    results[1]['author'] = 'Someone Else'
+    assert len(grouper.group(results)) == 2
+    print("✅ Fuzzy matches respect authors")
+
+def test_known_links_skip_fuzzy_pass():
+    """Listings linked in the mapping tables group by series id without pairwise comparison"""
+    print("\n=== Testing Known Links ===")
+
+    grouper = SeriesGrouper()
+    results = make_results()
+    grouper._links = {result['details_url']: 1 for result in results[:3]}
+    grouper._links[results[3]['details_url']] = 2
+
+    groups = grouper.group(results)
+    assert len(groups) == 2 and groups[0]['series_id'] == 1 and groups[1]['series_id'] == 2
+    assert grouper.stats['fuzzy_comparisons'] == 0, grouper.stats
+
+    # Only pairs involving the unlinked listing are compared
+    del grouper._links[results[3]['details_url']]
+    grouper.group(results)
+    assert grouper.stats['fuzzy_comparisons'] == 2, grouper.stats
+    print("✅ Known listings reuse their persisted series")
+
+def main():
+    """Run all tests"""
+    print("Testing Series Grouping")
+    print("=" * 40)
+
+    test_series_key()
+    test_grouping_by_title_and_alt_titles()
+    test_fuzzy_titles_need_matching_authors()
+    test_known_links_skip_fuzzy_pass()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
 
-from services.simple_cache import search_cache
+from services.simple_cache import search_cache, SimpleCache
 from services.simple_search import simple_search_service
 
 def test_cache_basic():
@@ -66,6 +66,68 @@ def test_cache_expiration():
     else:
         print(f"❌ Cache expiration failed: {result}")
 
+def test_stale_while_revalidate():
+    """Test serving stale entries while refreshing them in the background"""
+    print("\n=== Testing Stale-While-Revalidate ===")
+    
+    cache = SimpleCache(ttl_hours=6, stale_ttl_hours=24)
+    cache.set("swr_test", ["old"])
+    
+    refresh_calls = []
+    def refresh():
+        refresh_calls.append(1)
+        time.sleep(0.1)
+        return ["new"]
+    
+    # Past the soft TTL: stale data is served and one refresh is scheduled
+    with cache.lock:
+        cache.cache["swr_test"]["timestamp"] = time.time() - (7 * 3600)
+    assert cache.get("swr_test") is None, "plain get() should treat stale entries as misses"
+    first = cache.get_stale_while_revalidate("swr_test", refresh)
+    second = cache.get_stale_while_revalidate("swr_test", refresh)
+    assert first == ["old"] and second == ["old"], (first, second)
+    
+    time.sleep(0.3)
+    assert len(refresh_calls) == 1, f"expected 1 deduplicated refresh, got {len(refresh_calls)}"
+    assert cache.get("swr_test") == ["new"], cache.get("swr_test")
+    print("✅ Stale entry served and refreshed once in the background")
+    
+    # Past the hard TTL: the entry is dropped and the caller must block
+    with cache.lock:
+        cache.cache["swr_test"]["timestamp"] = time.time() - (25 * 3600)
+    assert cache.get_stale_while_revalidate("swr_test", refresh) is None
+    assert cache.size() == 0
+    print("✅ Entries past the hard TTL are treated as misses")
+
+def test_bounded_eviction():
+    """Test LRU eviction by entry count and approximate size"""
+    print("\n=== Testing Bounded LRU Eviction ===")
+    
+    cache = SimpleCache(ttl_hours=6, max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, [key])
+    cache.get("a")  # "a" becomes most recently used
+    cache.set("d", ["d"])
+    
+    assert cache.get("b") is None, "least recently used entry should be evicted"
+    assert cache.get("a") == ["a"] and cache.get("d") == ["d"]
+    assert cache.size() == 3
+    print("✅ Entry bound evicts the least recently used key")
+    
+    big = ["x" * 100]
+    entry_size = SimpleCache._estimate_size(big)
+    cache = SimpleCache(ttl_hours=6, max_bytes=entry_size * 2)
+    cache.set("one", big)
+    cache.set("two", big)
+    cache.set("three", big)
+    assert cache.get("one") is None and cache.size() == 2
+    assert cache.total_bytes <= entry_size * 2
+    
+    stats = cache.get_stats()
+    assert stats['evictions'] == 1 and stats['misses'] == 1, stats
+    assert stats['approx_bytes'] == cache.total_bytes
+    print(f"✅ Byte bound enforced: {stats['approx_bytes']} bytes, {stats['evictions']} eviction")
+
 def test_search_service():
     """Test the search service with cache"""
     print("\n=== Testing Search Service ===")
@@ -108,6 +170,8 @@ def main():
     try:
         test_cache_basic()
         test_cache_expiration()
+        test_stale_while_revalidate()
+        test_bounded_eviction()
         test_search_service()
         test_cache_stats()
         
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight request coalescing
+"""
+
+import time
+import sys
+import os
+import threading
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from services.single_flight import SingleFlight
+
+def test_concurrent_calls_coalesce():
+    """Concurrent calls for one key run the function once and share its result"""
+    print("=== Testing Concurrent Coalescing ===")
+
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_scrape(query):
+        calls.append(query)
+        time.sleep(0.2)
+        return [f"result for {query}"]
+
+    def worker():
+        results.append(flight.do("search:naruto", slow_scrape, "naruto"))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1, f"expected 1 scrape, got {len(calls)}"
+    assert all(r == ["result for naruto"] for r in results), results
+    assert flight.stats['coalesced'] == 9, flight.stats
+    assert flight.in_flight() == 0
+    print(f"✅ 10 concurrent requests caused {len(calls)} scrape")
+
+def test_different_keys_run_separately():
+    """Different keys never share a call"""
+    print("\n=== Testing Independent Keys ===")
+
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.stats['executions'] == 2
+    print("✅ Different keys run independently")
+
+def test_exceptions_propagate():
+    """An exception in the leader reaches every waiter and the key is released"""
+    print("\n=== Testing Exception Propagation ===")
+
+    flight = SingleFlight()
+    errors = []
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("source down")
+
+    def worker():
+        try:
+            flight.do("manga:weebcentral:1", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == ["source down"] * 5, errors
+    assert flight.do("manga:weebcentral:1", lambda: "recovered") == "recovered"
+    print("✅ Exceptions reach all waiters and the key is released")
+
+def test_waiters_get_independent_copies():
+    """Mutating a shared result in one caller is invisible to the others"""
+    print("\n=== Testing Result Isolation ===")
+
+    flight = SingleFlight()
+    results = []
+
+    def slow_details():
+        time.sleep(0.2)
+        return {'title': 'Naruto', 'chapters': [{'title': 'Chapter 1'}]}
+
+    def worker():
+        details = flight.do("manga:weebcentral:1", slow_details)
+        details['source'] = threading.current_thread().name
+        details['chapters'].append({'title': 'local edit'})
+        results.append(details)
+
+    threads = [threading.Thread(target=worker, name=f"caller-{i}") for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert flight.stats['coalesced'] == 4, flight.stats
+    assert len({id(details) for details in results}) == 5
+    assert sorted(details['source'] for details in results) == [f"caller-{i}" for i in range(5)]
+    assert all(len(details['chapters']) == 2 for details in results), results
+    print("✅ Each caller gets its own copy of the shared result")
+
+def test_uncontended_call_is_not_copied():
+    """Without waiters the leader gets the function's own result back"""
+    print("\n=== Testing Uncontended Calls ===")
+
+    flight = SingleFlight()
+    details = {'title': 'Naruto', 'chapters': []}
+    assert flight.do("manga:weebcentral:1", lambda: details) is details
+    print("✅ A call nobody joined returns the original result")
+
+def main():
+    """Run all tests"""
+    print("Testing Single-Flight Coalescing")
+    print("=" * 40)
+
+    test_concurrent_calls_coalesce()
+    test_different_keys_run_separately()
+    test_exceptions_propagate()
+    test_waiters_get_independent_copies()
+    test_uncontended_call_is_not_copied()
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for the FTS5 trigram title index over preloaded_manga
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directories to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # playwright_service
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))  # project root
+
+from flask import Flask
+from models import db, PreloadedManga
+from services.title_index import TitleIndex, is_match, trigram_overlap
+
+TITLES = ["One Piece", "One Punch Man", "Piece of Cake", "Solo Leveling", "Onee-san Next Door"]
+
+def make_app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+def search_titles(index, query):
+    since = datetime.utcnow() - timedelta(days=7)
+    ids = index.search_ids(db.session, PreloadedManga.normalize_title(query), ['weebcentral'], since)
+    return [db.session.get(PreloadedManga, manga_id).title for manga_id in ids]
+
+def test_match_rules():
+    """Substrings always match; other titles need most of the query's trigrams"""
+    print("=== Testing Match Rules ===")
+
+    assert is_match("piece", "one piece")
+    assert trigram_overlap("one piese", "one piece") >= 0.6
+    assert is_match("one piese", "one piece"), "a one-letter typo should still match"
+    assert not is_match("one piece", "onee-san next door"), "one shared trigram is not a match"
+    assert not is_match("solo", "one piece")
+    print("✅ Only substring or high-overlap titles match")
+
+def test_index_filters_loose_candidates(index):
+    """The FTS MATCH selects candidates, but only real matches are returned"""
+    print("\n=== Testing Index Results ===")
+
+    assert search_titles(index, "one piece") == ["One Piece"], search_titles(index, "one piece")
+    assert search_titles(index, "one piese") == ["One Piece"]
+    assert set(search_titles(index, "piece")) == {"One Piece", "Piece of Cake"}
+    assert search_titles(index, "leveling") == ["Solo Leveling"]
+    print("✅ Titles sharing a single trigram are not returned")
+
+def main():
+    """Run all tests"""
+    print("Testing Title Index")
+    print("=" * 40)
+
+    test_match_rules()
+
+    app = make_app()
+    with app.app_context():
+        db.create_all()
+        index = TitleIndex()
+        assert index.install(db.engine), "FTS5 trigram tokenizer unavailable"
+        for n, title in enumerate(TITLES):
+            db.session.add(PreloadedManga(title=title, normalized_title=PreloadedManga.normalize_title(title),
+                                          source_url=f"https://example.org/series/{n}", source='weebcentral',
+                                          last_updated=datetime.utcnow()))
+        db.session.commit()
+        test_index_filters_loose_candidates(index)
+
+    print("\n" + "=" * 40)
+    print("✅ All tests completed!")
+
+if __name__ == "__main__":
+    main()
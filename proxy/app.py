@@ -1,8 +1,12 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 import os
+import gzip
 from dotenv import load_dotenv
+from response_cache import CACHE_POLICIES, ResponseCache, cache_control, compute_etag, etag_matches, merge_vary
 
 load_dotenv()
 
@@ -11,128 +15,238 @@ CORS(app)
 
 PLAYWRIGHT_URL = f"http://localhost:{os.getenv('PLAYWRIGHT_PORT', 5000)}"
 
+# (connect, read) timeouts for calls to the Playwright service; reads allow for cold scrapes
+UPSTREAM_TIMEOUT = (
+    float(os.getenv('PROXY_CONNECT_TIMEOUT', 3.05)),
+    float(os.getenv('PROXY_READ_TIMEOUT', 60))
+)
+
+# Keep-alive connections to the Playwright service, shared by all request threads
+session = requests.Session()
+session.mount('http://', HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=int(os.getenv('PROXY_POOL_SIZE', 32)),
+    pool_block=False
+))
+
+# Optional in-proxy cache of anonymous GET responses
+response_cache = (
+    ResponseCache(max_entries=int(os.getenv('PROXY_CACHE_ENTRIES', 256)))
+    if os.getenv('PROXY_RESPONSE_CACHE', 'true').lower() == 'true' else None
+)
+
+UPSTREAM_ERRORS = (requests.RequestException, Urllib3HTTPError)
+
+# Upstream response headers that must not be copied onto our response
+EXCLUDED_RESPONSE_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+    'trailers', 'transfer-encoding', 'upgrade', 'content-length', 'server', 'date'
+}
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
 def get_forward_headers():
     headers = {}
     if 'Authorization' in request.headers:
         headers['Authorization'] = request.headers['Authorization']
     if 'Cookie' in request.headers:
         headers['Cookie'] = request.headers['Cookie']
+    # Bodies are passed through undecoded, so only ask for encodings the client accepts
+    headers['Accept-Encoding'] = request.headers.get('Accept-Encoding', 'identity')
     return headers
 
+def pass_through_headers(upstream):
+    return [
+        (name, value) for name, value in upstream.headers.items()
+        if name.lower() not in EXCLUDED_RESPONSE_HEADERS and not name.lower().startswith('access-control-')
+    ]
+
+def fetch(method, path, **kwargs):
+    """Call the Playwright service; returns its status, relayable headers and raw body"""
+    upstream = session.request(method, f"{PLAYWRIGHT_URL}{path}", headers=get_forward_headers(),
+                               timeout=UPSTREAM_TIMEOUT, stream=True, **kwargs)
+    try:
+        # Read the body undecoded so JSON and content encoding are relayed as-is
+        body = upstream.raw.read(decode_content=False)
+    except Urllib3HTTPError:
+        upstream.close()
+        raise
+    # Fully read, so the connection goes back to the pool
+    upstream.raw.release_conn()
+    return upstream.status_code, pass_through_headers(upstream), body
+
+def forward(method, path, error_message, **kwargs):
+    """Forward the request to the Playwright service and relay its status, headers and raw body"""
+    try:
+        status, headers, body = fetch(method, path, **kwargs)
+    except UPSTREAM_ERRORS as e:
+        return jsonify({'error': f'{error_message}: {str(e)}'}), 500
+    return Response(body, status=status, headers=headers)
+
+def is_anonymous():
+    return 'Authorization' not in request.headers and 'Cookie' not in request.headers
+
+def cached_forward(policy_name, path, error_message, params=None):
+    """Forward a cacheable GET with an ETag and Cache-Control, answering If-None-Match with 304
+
+    Anonymous responses are also kept in the in-proxy cache for the route's
+    max-age. Upstream responses that set their own Cache-Control (e.g. partial
+    search results) are relayed as-is and never stored.
+    """
+    policy = CACHE_POLICIES[policy_name]
+    private = not is_anonymous()
+    use_cache = (response_cache is not None and not private
+                 and request.args.get('refresh', 'false').lower() != 'true')
+    cache_key = (path, tuple(sorted((params or {}).items())), request.headers.get('Accept-Encoding', ''))
+    
+    entry = response_cache.get(cache_key) if use_cache else None
+    cache_status = 'HIT' if entry else 'MISS'
+    if entry is None:
+        try:
+            status, headers, body = fetch('GET', path, params=params)
+        except UPSTREAM_ERRORS as e:
+            return jsonify({'error': f'{error_message}: {str(e)}'}), 500
+        if status != 200:
+            return Response(body, status=status, headers=headers)
+        
+        etag = compute_etag(body)
+        headers = merge_vary(headers, 'Accept-Encoding', 'Authorization', 'Cookie') + [('ETag', etag)]
+        cacheable = not any(name.lower() == 'cache-control' for name, _ in headers)
+        if cacheable:
+            headers.append(('Cache-Control', cache_control(policy, private)))
+        entry = {'status': status, 'headers': headers, 'body': body, 'etag': etag}
+        if use_cache and cacheable:
+            response_cache.set(cache_key, status, headers, body, etag, policy['max_age'])
+    
+    if etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+        not_modified_headers = [(name, value) for name, value in entry['headers']
+                                if name.lower() in ('etag', 'cache-control', 'vary')]
+        return Response(status=304, headers=not_modified_headers + [('X-Proxy-Cache', cache_status)])
+    return Response(entry['body'], status=entry['status'],
+                    headers=entry['headers'] + [('X-Proxy-Cache', cache_status)])
+
+@app.after_request
+def compress_response(response):
+    """Gzip large JSON bodies the backend didn't already compress"""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code != 200
+            or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+    response.vary.add('Accept-Encoding')
+    if 'gzip' not in request.headers.get('Accept-Encoding', '').lower():
+        return response
+    body = response.get_data()
+    if len(body) >= COMPRESSION_MIN_SIZE:
+        response.set_data(gzip.compress(body, compresslevel=6, mtime=0))
+        response.headers['Content-Encoding'] = 'gzip'
+        # The ETag was computed on the uncompressed body
+        etag = response.headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response.headers['ETag'] = f'W/{etag}'
+    return response
+
 @app.route('/api/search', methods=['GET'])
 def search_manga():
     """Search for manga titles"""
+    return cached_forward('search', "/search", 'Failed to fetch search results', params=dict(request.args))
+
+@app.route('/api/search/suggest', methods=['GET'])
+def search_suggest():
+    """Typeahead suggestions from the backend's local title index"""
+    return cached_forward('search', "/search/suggest", 'Failed to fetch suggestions', params=dict(request.args))
+
+@app.route('/api/search/stream', methods=['GET'])
+def search_manga_stream():
+    """Stream search results (NDJSON) through without buffering"""
     params = dict(request.args)
     try:
         headers = get_forward_headers()
-        response = requests.get(f"{PLAYWRIGHT_URL}/search", params=params, headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
+        response = session.get(f"{PLAYWRIGHT_URL}/search/stream", params=params, headers=headers,
+                               timeout=UPSTREAM_TIMEOUT, stream=True)
+        if response.status_code != 200:
+            # Backend errors (e.g. 400 for a missing query) are relayed as-is
+            try:
+                return Response(response.content, status=response.status_code,
+                                content_type=response.headers.get('Content-Type'))
+            finally:
+                response.close()
     except requests.RequestException as e:
         return jsonify({'error': f'Failed to fetch search results: {str(e)}'}), 500
 
+    def generate():
+        try:
+            # chunk_size=None yields data as soon as it arrives from the backend
+            for chunk in response.iter_content(chunk_size=None):
+                yield chunk
+        finally:
+            response.close()
+
+    return Response(
+        stream_with_context(generate()),
+        content_type=response.headers.get('Content-Type', 'application/x-ndjson'),
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/api/manga/<manga_id>', methods=['GET'])
 def get_manga_details(manga_id):
     """Get detailed information about a specific manga"""
-    try:
-        headers = get_forward_headers()
-        response = requests.get(f"{PLAYWRIGHT_URL}/manga/{manga_id}", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to fetch manga details: {str(e)}'}), 500
+    return cached_forward('manga', f"/manga/{manga_id}", 'Failed to fetch manga details')
 
 @app.route('/api/manga/<source>/<manga_id>', methods=['GET'])
 def get_manga_details_with_source(source, manga_id):
     """Get detailed information about a specific manga from a specific source"""
-    try:
-        headers = get_forward_headers()
-        response = requests.get(f"{PLAYWRIGHT_URL}/manga/{source}/{manga_id}", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to fetch manga details: {str(e)}'}), 500
+    return cached_forward('manga', f"/manga/{source}/{manga_id}", 'Failed to fetch manga details')
+
+@app.route('/api/series/<int:series_id>', methods=['GET'])
+def get_series(series_id):
+    """Get a canonical series and its per-source links"""
+    return cached_forward('manga', f"/series/{series_id}", 'Failed to fetch series')
 
 @app.route('/api/chapter-images/<source>/<manga_id>/<path:chapter_id>', methods=['GET'])
 def get_chapter_images(source, manga_id, chapter_id):
-    try:
-        headers = get_forward_headers()
-        if source == 'weebcentral':
-            response = requests.get(f"{PLAYWRIGHT_URL}/chapter-images/{source}/{chapter_id}", headers=headers)
-        else:
-            response = requests.get(f"{PLAYWRIGHT_URL}/chapter-images/{source}/{manga_id}/{chapter_id}", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to fetch chapter images: {str(e)}'}), 500
+    if source == 'weebcentral':
+        path = f"/chapter-images/{source}/{chapter_id}"
+    else:
+        path = f"/chapter-images/{source}/{manga_id}/{chapter_id}"
+    return cached_forward('chapter-images', path, 'Failed to fetch chapter images')
 
 @app.route('/api/cache/stats', methods=['GET'])
 def get_cache_stats():
     """Get cache statistics"""
-    try:
-        headers = get_forward_headers()
-        response = requests.get(f"{PLAYWRIGHT_URL}/cache/stats", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to get cache stats: {str(e)}'}), 500
+    return forward('GET', "/cache/stats", 'Failed to get cache stats')
 
 @app.route('/api/cache/clear', methods=['POST'])
 def clear_cache():
-    """Clear cache based on parameters"""
+    """Clear cache based on parameters; the proxy cache is only dropped once the backend accepts"""
     try:
-        data = request.get_json() or {}
-        headers = get_forward_headers()
-        response = requests.post(f"{PLAYWRIGHT_URL}/cache/clear", json=data, headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
+        status, headers, body = fetch('POST', "/cache/clear", json=request.get_json(silent=True) or {})
+    except UPSTREAM_ERRORS as e:
         return jsonify({'error': f'Failed to clear cache: {str(e)}'}), 500
+    if response_cache is not None and 200 <= status < 300:
+        response_cache.clear()
+    return Response(body, status=status, headers=headers)
 
 @app.route('/api/cache/cleanup', methods=['POST'])
 def cleanup_cache():
     """Clean up expired cache entries"""
-    try:
-        headers = get_forward_headers()
-        response = requests.post(f"{PLAYWRIGHT_URL}/cache/cleanup", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to cleanup cache: {str(e)}'}), 500
+    return forward('POST', "/cache/cleanup", 'Failed to cleanup cache')
 
 @app.route('/api/preloader/status', methods=['GET'])
 def preloader_status():
     """Get preloader status"""
-    try:
-        headers = get_forward_headers()
-        response = requests.get(f"{PLAYWRIGHT_URL}/preloader/status", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to get preloader status: {str(e)}'}), 500
+    return forward('GET', "/preloader/status", 'Failed to get preloader status')
 
 @app.route('/api/preloader/trigger', methods=['POST'])
 def trigger_preload():
     """Trigger preloading"""
-    try:
-        data = request.get_json() or {}
-        headers = get_forward_headers()
-        response = requests.post(f"{PLAYWRIGHT_URL}/preloader/trigger", json=data, headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to trigger preload: {str(e)}'}), 500
+    return forward('POST', "/preloader/trigger", 'Failed to trigger preload', json=request.get_json(silent=True) or {})
 
 @app.route('/api/preloader/search-stats', methods=['GET'])
 def preloader_search_stats():
     """Get preloader search statistics"""
-    try:
-        headers = get_forward_headers()
-        response = requests.get(f"{PLAYWRIGHT_URL}/preloader/search-stats", headers=headers)
-        response.raise_for_status()
-        return jsonify(response.json())
-    except requests.RequestException as e:
-        return jsonify({'error': f'Failed to get search stats: {str(e)}'}), 500
+    return forward('GET', "/preloader/search-stats", 'Failed to get search stats')
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -0,0 +1,272 @@
+"""
+Asyncio proxy server (same routes as app.py)
+
+Every request waiting on a slow scrape is just a coroutine, so the number of
+concurrent requests is bounded by the Playwright service rather than by proxy
+worker threads. Run with ``python async_app.py`` (or ``PROXY_MODE=async``
+with start_services.py).
+"""
+
+import os
+import json
+from aiohttp import web, ClientSession, ClientTimeout, TCPConnector, ClientError
+from dotenv import load_dotenv
+from response_cache import CACHE_POLICIES, ResponseCache, cache_control, compute_etag, etag_matches, merge_vary
+
+load_dotenv()
+
+PLAYWRIGHT_URL = f"http://localhost:{os.getenv('PLAYWRIGHT_PORT', 5000)}"
+
+UPSTREAM_TIMEOUT = ClientTimeout(
+    total=None,
+    sock_connect=float(os.getenv('PROXY_CONNECT_TIMEOUT', 3.05)),
+    sock_read=float(os.getenv('PROXY_READ_TIMEOUT', 60))
+)
+
+# Upstream connections held open at once; waiting requests queue as coroutines
+POOL_SIZE = int(os.getenv('PROXY_ASYNC_POOL_SIZE', 256))
+
+response_cache = (
+    ResponseCache(max_entries=int(os.getenv('PROXY_CACHE_ENTRIES', 256)))
+    if os.getenv('PROXY_RESPONSE_CACHE', 'true').lower() == 'true' else None
+)
+
+# Upstream response headers that must not be copied onto our response
+EXCLUDED_RESPONSE_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+    'trailers', 'transfer-encoding', 'upgrade', 'content-length', 'server', 'date'
+}
+
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Authorization, Content-Type, If-None-Match'
+}
+
+def get_forward_headers(request):
+    headers = {}
+    if 'Authorization' in request.headers:
+        headers['Authorization'] = request.headers['Authorization']
+    if 'Cookie' in request.headers:
+        headers['Cookie'] = request.headers['Cookie']
+    # Bodies are passed through undecoded, so only ask for encodings the client accepts
+    headers['Accept-Encoding'] = request.headers.get('Accept-Encoding', 'identity')
+    return headers
+
+def pass_through_headers(upstream):
+    return [
+        (name, value) for name, value in upstream.headers.items()
+        if name.lower() not in EXCLUDED_RESPONSE_HEADERS and not name.lower().startswith('access-control-')
+    ]
+
+def error_response(message, status=500):
+    return web.json_response({'error': message}, status=status)
+
+async def fetch(request, method, path, **kwargs):
+    """Call the Playwright service; returns its status, relayable headers and raw body"""
+    session = request.app['session']
+    async with session.request(method, f"{PLAYWRIGHT_URL}{path}", headers=get_forward_headers(request),
+                               **kwargs) as upstream:
+        body = await upstream.read()
+        return upstream.status, pass_through_headers(upstream), body
+
+async def forward(request, method, path, error_message, **kwargs):
+    """Forward the request to the Playwright service and relay its status, headers and raw body"""
+    try:
+        status, headers, body = await fetch(request, method, path, **kwargs)
+    except ClientError as e:
+        return error_response(f'{error_message}: {str(e)}')
+    return web.Response(body=body, status=status, headers=headers)
+
+def is_anonymous(request):
+    return 'Authorization' not in request.headers and 'Cookie' not in request.headers
+
+async def cached_forward(request, policy_name, path, error_message, params=None):
+    """Forward a cacheable GET with an ETag and Cache-Control (see app.cached_forward)"""
+    policy = CACHE_POLICIES[policy_name]
+    private = not is_anonymous(request)
+    use_cache = (response_cache is not None and not private
+                 and request.query.get('refresh', 'false').lower() != 'true')
+    cache_key = (path, tuple(sorted((params or {}).items())), request.headers.get('Accept-Encoding', ''))
+
+    entry = response_cache.get(cache_key) if use_cache else None
+    cache_status = 'HIT' if entry else 'MISS'
+    if entry is None:
+        try:
+            status, headers, body = await fetch(request, 'GET', path, params=params)
+        except ClientError as e:
+            return error_response(f'{error_message}: {str(e)}')
+        if status != 200:
+            return web.Response(body=body, status=status, headers=headers)
+
+        etag = compute_etag(body)
+        headers = merge_vary(headers, 'Accept-Encoding', 'Authorization', 'Cookie') + [('ETag', etag)]
+        cacheable = not any(name.lower() == 'cache-control' for name, _ in headers)
+        if cacheable:
+            headers.append(('Cache-Control', cache_control(policy, private)))
+        entry = {'status': status, 'headers': headers, 'body': body, 'etag': etag}
+        if use_cache and cacheable:
+            response_cache.set(cache_key, status, headers, body, etag, policy['max_age'])
+
+    if etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+        not_modified_headers = [(name, value) for name, value in entry['headers']
+                                if name.lower() in ('etag', 'cache-control', 'vary')]
+        return web.Response(status=304, headers=not_modified_headers + [('X-Proxy-Cache', cache_status)])
+    return web.Response(body=entry['body'], status=entry['status'],
+                        headers=entry['headers'] + [('X-Proxy-Cache', cache_status)])
+
+async def request_json(request):
+    """JSON request body, or {} when missing or invalid"""
+    try:
+        return await request.json() or {}
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return {}
+
+routes = web.RouteTableDef()
+
+@routes.get('/api/search')
+async def search_manga(request):
+    """Search for manga titles"""
+    return await cached_forward(request, 'search', "/search", 'Failed to fetch search results',
+                                params=dict(request.query))
+
+@routes.get('/api/search/suggest')
+async def search_suggest(request):
+    """Typeahead suggestions from the backend's local title index"""
+    return await cached_forward(request, 'search', "/search/suggest", 'Failed to fetch suggestions',
+                                params=dict(request.query))
+
+@routes.get('/api/search/stream')
+async def search_manga_stream(request):
+    """Stream search results (NDJSON) through without buffering"""
+    session = request.app['session']
+    headers = get_forward_headers(request)
+    # Frames are relayed as they arrive, so ask for an uncompressed stream
+    headers['Accept-Encoding'] = 'identity'
+    try:
+        upstream = await session.get(f"{PLAYWRIGHT_URL}/search/stream", params=dict(request.query),
+                                     headers=headers)
+    except ClientError as e:
+        return error_response(f'Failed to fetch search results: {str(e)}')
+
+    try:
+        if upstream.status != 200:
+            # Backend errors (e.g. 400 for a missing query) are relayed as-is
+            return web.Response(body=await upstream.read(), status=upstream.status,
+                                headers=pass_through_headers(upstream))
+        response = web.StreamResponse(headers={
+            'Content-Type': upstream.headers.get('Content-Type', 'application/x-ndjson'),
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        await response.prepare(request)
+        async for chunk in upstream.content.iter_any():
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+    finally:
+        upstream.release()
+
+@routes.get('/api/manga/{manga_id}')
+async def get_manga_details(request):
+    """Get detailed information about a specific manga"""
+    manga_id = request.match_info['manga_id']
+    return await cached_forward(request, 'manga', f"/manga/{manga_id}", 'Failed to fetch manga details')
+
+@routes.get('/api/manga/{source}/{manga_id}')
+async def get_manga_details_with_source(request):
+    """Get detailed information about a specific manga from a specific source"""
+    source, manga_id = request.match_info['source'], request.match_info['manga_id']
+    return await cached_forward(request, 'manga', f"/manga/{source}/{manga_id}", 'Failed to fetch manga details')
+
+@routes.get(r'/api/series/{series_id:\d+}')
+async def get_series(request):
+    """Get a canonical series and its per-source links"""
+    series_id = request.match_info['series_id']
+    return await cached_forward(request, 'manga', f"/series/{series_id}", 'Failed to fetch series')
+
+@routes.get('/api/chapter-images/{source}/{manga_id}/{chapter_id:.+}')
+async def get_chapter_images(request):
+    source = request.match_info['source']
+    manga_id = request.match_info['manga_id']
+    chapter_id = request.match_info['chapter_id']
+    if source == 'weebcentral':
+        path = f"/chapter-images/{source}/{chapter_id}"
+    else:
+        path = f"/chapter-images/{source}/{manga_id}/{chapter_id}"
+    return await cached_forward(request, 'chapter-images', path, 'Failed to fetch chapter images')
+
+@routes.get('/api/cache/stats')
+async def get_cache_stats(request):
+    """Get cache statistics"""
+    return await forward(request, 'GET', "/cache/stats", 'Failed to get cache stats')
+
+@routes.post('/api/cache/clear')
+async def clear_cache(request):
+    """Clear cache based on parameters; the proxy cache is only dropped once the backend accepts"""
+    try:
+        status, headers, body = await fetch(request, 'POST', "/cache/clear", json=await request_json(request))
+    except ClientError as e:
+        return error_response(f'Failed to clear cache: {str(e)}')
+    if response_cache is not None and 200 <= status < 300:
+        response_cache.clear()
+    return web.Response(body=body, status=status, headers=headers)
+
+@routes.post('/api/cache/cleanup')
+async def cleanup_cache(request):
+    """Clean up expired cache entries"""
+    return await forward(request, 'POST', "/cache/cleanup", 'Failed to cleanup cache')
+
+@routes.get('/api/preloader/status')
+async def preloader_status(request):
+    """Get preloader status"""
+    return await forward(request, 'GET', "/preloader/status", 'Failed to get preloader status')
+
+@routes.post('/api/preloader/trigger')
+async def trigger_preload(request):
+    """Trigger preloading"""
+    return await forward(request, 'POST', "/preloader/trigger", 'Failed to trigger preload',
+                         json=await request_json(request))
+
+@routes.get('/api/preloader/search-stats')
+async def preloader_search_stats(request):
+    """Get preloader search statistics"""
+    return await forward(request, 'GET', "/preloader/search-stats", 'Failed to get search stats')
+
+@routes.get('/api/health')
+async def health_check(request):
+    """Health check endpoint"""
+    return web.json_response({'status': 'healthy', 'service': 'async-proxy'})
+
+@web.middleware
+async def cors_preflight(request, handler):
+    """Answer CORS preflight requests like flask-cors does for app.py"""
+    if request.method == 'OPTIONS':
+        return web.Response(headers=CORS_HEADERS)
+    return await handler(request)
+
+async def add_cors_headers(request, response):
+    # Runs before headers are sent, so streamed responses get them too
+    response.headers.update(CORS_HEADERS)
+
+async def open_session(app):
+    app['session'] = ClientSession(
+        connector=TCPConnector(limit=POOL_SIZE, keepalive_timeout=30),
+        timeout=UPSTREAM_TIMEOUT,
+        auto_decompress=False
+    )
+
+async def close_session(app):
+    await app['session'].close()
+
+def create_app():
+    app = web.Application(middlewares=[cors_preflight])
+    app.add_routes(routes)
+    app.on_response_prepare.append(add_cors_headers)
+    app.on_startup.append(open_session)
+    app.on_cleanup.append(close_session)
+    return app
+
+if __name__ == '__main__':
+    port = int(os.getenv('FLASK_PORT', 3006))
+    web.run_app(create_app(), host='0.0.0.0', port=port)
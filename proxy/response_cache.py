@@ -0,0 +1,116 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Cache-Control lifetimes (seconds) per route, derived from the backend caches:
+# search results are fresh for 6 hours and served stale for up to 24, manga
+# details are refreshed daily, and chapter images never change once published
+CACHE_POLICIES = {
+    'search': {
+        'max_age': int(os.getenv('PROXY_SEARCH_MAX_AGE', 300)),
+        'stale_while_revalidate': 6 * 60 * 60
+    },
+    'manga': {
+        'max_age': int(os.getenv('PROXY_MANGA_MAX_AGE', 600)),
+        'stale_while_revalidate': 24 * 60 * 60
+    },
+    'chapter-images': {
+        'max_age': int(os.getenv('PROXY_CHAPTER_MAX_AGE', 24 * 60 * 60)),
+        'stale_while_revalidate': 0
+    }
+}
+
+def compute_etag(body):
+    """Strong ETag for a relayed response body
+
+    The backend's bodies are byte-stable for the same results (sorted JSON
+    keys, no per-serve timestamps, gzip without an mtime), so the raw bytes
+    are hashed as relayed, without decoding them.
+    """
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _opaque_tag(tag):
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value matches ``etag``"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # Weak comparison is used for If-None-Match
+    return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(',')}
+
+def merge_vary(headers, *fields):
+    """Replace any Vary headers in a header list with one that also covers ``fields``"""
+    vary = {}
+    for name, value in headers:
+        if name.lower() == 'vary':
+            for field in value.split(','):
+                if field.strip():
+                    vary.setdefault(field.strip().lower(), field.strip())
+    for field in fields:
+        vary.setdefault(field.lower(), field)
+    return [(name, value) for name, value in headers if name.lower() != 'vary'] + [('Vary', ', '.join(vary.values()))]
+
+def cache_control(policy, private=False):
+    """Cache-Control header value for a CACHE_POLICIES entry"""
+    directives = ['private' if private else 'public', f"max-age={policy['max_age']}"]
+    if policy.get('stale_while_revalidate'):
+        directives.append(f"stale-while-revalidate={policy['stale_while_revalidate']}")
+    return ', '.join(directives)
+
+class ResponseCache:
+    """Small in-proxy LRU cache of anonymous GET responses.
+
+    Entries hold the relayed status, headers and body and expire after the
+    route's ``max_age``, so a repeat view never reaches the Playwright service.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry['expires_at'] <= time.time():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key, status, headers, body, etag, max_age):
+        with self.lock:
+            self.entries[key] = {
+                'status': status,
+                'headers': headers,
+                'body': body,
+                'etag': etag,
+                'expires_at': time.time() + max_age
+            }
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -58,7 +58,7 @@ const CacheManager = () => {
         }),
       });
       const data = await response.json();
-      setMessage(data.message || 'Cache cleared successfully');
+      setMessage(response.ok ? (data.message || 'Cache cleared successfully') : (data.error || 'Failed to clear cache'));
       fetchCacheStats(); // Refresh stats
     } catch (error) {
       console.error('Failed to clear cache:', error);
@@ -62,10 +62,33 @@ const SearchPage = () => {
         params.refresh = 'true';
       }
       const queryString = new URLSearchParams(params).toString();
-      const response = await authFetch(`/api/search?${queryString}`);
-      const data = await response.json();
-      setResults(data.results || []);
-      setCacheInfo(data.cached);
+      const response = await authFetch(`/api/search/stream?${queryString}`);
+      if (!response.ok || !response.body) {
+        throw new Error('Search request failed');
+      }
+
+      // Read newline-delimited JSON frames and show each source's results as they arrive
+      setResults([]);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split('\n');
+        buffer = lines.pop();
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const frame = JSON.parse(line);
+          if (frame.type === 'results') {
+            setResults(prev => [...prev, ...(frame.results || [])]);
+            setLoading(false);
+          } else if (frame.type === 'summary') {
+            setCacheInfo(frame.cached);
+          }
+        }
+      }
     } catch (err) {
       setError('Failed to search manga');
       setResults([]);
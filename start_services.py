@@ -43,9 +43,10 @@ def main():
     # Wait a moment for Playwright to initialize
     time.sleep(3)
     
-    # Start Flask proxy
+    # Start Flask proxy (PROXY_MODE=async runs the asyncio implementation)
+    proxy_script = "proxy/async_app.py" if os.getenv('PROXY_MODE') == 'async' else "proxy/app.py"
     flask_process = start_service(
-        "proxy/app.py",
+        proxy_script,
         "Flask Proxy",
         os.getenv('FLASK_PORT', 3006)
     )